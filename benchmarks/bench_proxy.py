@@ -0,0 +1,78 @@
+"""Ters vekil maliyeti: in-process v1/v2 uygulamalarına doğrudan ve /proxy/ üzerinden istek/sn ve gecikme.
+
+    python -m benchmarks.bench_proxy --requests 2000 --concurrency 50 --split 90 10
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+
+from proxy import ReverseProxy, TrafficSplit
+from services.v1.app import app as v1_app
+from services.v2.app import app as v2_app
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _load(client, path, requests, concurrency):
+    latencies, versions = [], {}
+    pending = iter(range(requests))
+
+    async def worker():
+        for _ in pending:
+            start = time.perf_counter()
+            r = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            v = r.headers.get("x-upstream-version", "direct")
+            versions[v] = versions.get(v, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {"rps": round(requests / wall, 1), "p50_ms": round(_percentile(latencies, 0.5), 3),
+            "p99_ms": round(_percentile(latencies, 0.99), 3), "versions": versions}
+
+
+def run(requests=2000, concurrency=50, split=(90, 10)):
+    proxy = ReverseProxy(lambda v: f"http://{v}", TrafficSplit({"v1": split[0], "v2": split[1]}),
+                         transports={"v1": httpx.ASGITransport(app=v1_app), "v2": httpx.ASGITransport(app=v2_app)})
+    front = FastAPI()
+
+    @front.get("/proxy/{path:path}")
+    async def route(path: str, request: Request):
+        return await proxy.handle(request, path)
+
+    async def _main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=v1_app), base_url="http://v1") as direct, \
+                httpx.AsyncClient(transport=httpx.ASGITransport(app=front), base_url="http://front") as proxied:
+            await _load(direct, "/", 50, 5)
+            await _load(proxied, "/proxy/", 50, 5)
+            result = {"direct": await _load(direct, "/", requests, concurrency),
+                      "proxied": await _load(proxied, "/proxy/", requests, concurrency)}
+        await proxy.aclose()
+        return result
+
+    result = asyncio.run(_main())
+    d, p = result["direct"], result["proxied"]
+    return dict(result, requests=requests, concurrency=concurrency, split={"v1": split[0], "v2": split[1]},
+                overhead_p50_ms=round(p["p50_ms"] - d["p50_ms"], 3),
+                throughput_ratio=round(p["rps"] / d["rps"], 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--split", type=int, nargs=2, default=[90, 10])
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.concurrency, tuple(args.split)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Reconciler tick süresi: 1k+ replikada sabit durum, tek pod ölümü ve canary adımı.
+
+    python -m benchmarks.bench_reconciler --services 100 --replicas 20
+"""
+import argparse
+import json
+import time
+
+from reconciler import FakeRuntime, Reconciler, ServiceSpec
+
+
+def _timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(services=100, replicas=20, repeat=200):
+    clock = [1000.0]
+    rec = Reconciler(FakeRuntime(), clock=lambda: clock[0])
+    specs = [ServiceSpec(f"svc-{i}", "local://demo@v1", replicas, strategy="Canary", steps=[25, 50, 100], pause=5)
+             for i in range(services)]
+    for spec in specs:
+        rec.apply(spec)
+
+    result = {"services": services, "replicas_total": services * replicas}
+    result["initial_tick_ms"] = _timed(lambda: (rec.tick(), rec.tick()))
+    assert len(rec.pods) == services * replicas
+
+    # Hiçbir şey değişmedi: tick maliyeti pod sayısından bağımsız olmalı
+    result["steady_tick_ms"] = _timed(rec.tick, repeat)
+
+    def one_pod_died():
+        rec.pod_exited(next(iter(rec.pods)))
+        rec.tick()
+        rec.tick()
+    result["one_pod_death_tick_ms"] = _timed(one_pod_died, repeat)
+
+    # Tek serviste canary başlat ve ilk adımı uygula
+    spec = specs[0]
+    rec.apply(ServiceSpec(spec.name, "local://demo@v2", replicas, strategy="Canary", steps=[25, 50, 100], pause=5))
+    result["canary_start_tick_ms"] = _timed(lambda: (rec.tick(), rec.tick()))
+    clock[0] += 5
+    result["canary_step_tick_ms"] = _timed(lambda: (rec.tick(), rec.tick()))
+    result["canary_summary"] = rec.summary()[spec.name]["pods"]
+    return {k: (round(v, 4) if isinstance(v, float) else v) for k, v in result.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--services", type=int, default=100)
+    parser.add_argument("--replicas", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.services, args.replicas, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Probe takvimi maliyeti: N servis için probe/sn, CPU kullanımı ve en büyük gecikme.
+
+    python -m benchmarks.bench_scheduler --services 1000 10000 --interval 2 --seconds 6
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from probe_engine import ProbeEngine, ProbeSchedule
+
+
+async def _noop_probe(url):
+    return True, "OK"
+
+
+def run(services=1000, interval=2.0, seconds=6.0):
+    names = {f"svc-{i}": f"http://svc-{i}/health" for i in range(services)}
+    engine = ProbeEngine(lambda: names, lambda *a: None, probe=_noop_probe,
+                         default_schedule=ProbeSchedule(interval, 1.0, interval / 2),
+                         max_concurrency=1000)
+
+    async def _main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(seconds)
+        engine.stop()
+        await task
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(_main())
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return {"services": services, "interval": interval, "probes": engine.stats["probes"],
+            "probes_per_sec": round(engine.stats["probes"] / wall, 1),
+            "expected_per_sec": round(services / interval, 1),
+            "cpu_percent": round(cpu / wall * 100, 1),
+            "cpu_us_per_probe": round(cpu / max(engine.stats["probes"], 1) * 1e6, 2),
+            "max_lag_ms": round(engine.stats["max_lag"] * 1000, 2), "late": engine.stats["late"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--services", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--seconds", type=float, default=6.0)
+    args = parser.parse_args()
+    print(json.dumps([run(n, args.interval, args.seconds) for n in args.services], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Yük altında kaos senaryosu: sabit RPS açık döngü trafik + zaman çizelgesinde hata enjeksiyonu.
+
+    python -m benchmarks.chaos --target http://localhost:8000/proxy/ --rps 50 --duration 60 \
+        --event 10:cpu:100 --event 25:reset --event 30:corruption --event 45:stop \
+        --monitor http://localhost:8000 --user admin --password secure123
+
+İstekler önceden belirlenmiş anlarda gönderilir (yanıt beklenmez); gecikme
+planlanan gönderim anından ölçülür, böylece yavaşlayan servis örnek sayısını
+azaltıp sonuçları olduğundan iyi göstermez (coordinated omission). Her faz
+(iki olay arası) için ayrı HDR histogramı tutulur.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from stats import HdrHistogram
+
+PERCENTILES = (50, 90, 99, 99.9)
+FAULTS = ("cpu", "corruption", "stop")
+
+
+# --- ZAMAN ÇİZELGESİ ---
+class Event:
+    def __init__(self, at, action, arg=None):
+        if action not in FAULTS + ("reset",):
+            raise ValueError(f"Bilinmeyen olay: {action}")
+        self.at = at
+        self.action = action
+        self.arg = arg
+
+    @classmethod
+    def parse(cls, text):
+        # "10:cpu:100", "30:corruption", "45:stop", "50:reset"
+        parts = text.split(":")
+        return cls(float(parts[0]), parts[1], parts[2] if len(parts) > 2 else None)
+
+    @property
+    def label(self):
+        return f"{self.action}:{self.arg}" if self.arg else self.action
+
+
+class Injector:
+    """Olayları o an trafiği karşılayan sürüme uygular: /simulate uçları ya da konteyner durdurma."""
+
+    def __init__(self, client, upstreams, docker_factory=None):
+        self.client = client
+        self.upstreams = upstreams
+        self.docker_factory = docker_factory
+
+    async def apply(self, event, version):
+        base = self.upstreams[version]
+        if event.action == "cpu":
+            await self.client.post(f"{base}/simulate/cpu/{event.arg or 100}")
+        elif event.action == "corruption":
+            await self.client.post(f"{base}/simulate/corruption")
+        elif event.action == "reset":
+            for url in self.upstreams.values():
+                try: await self.client.post(f"{url}/simulate/reset")
+                except httpx.HTTPError: pass
+        elif event.action == "stop":
+            client = self.docker_factory()
+            await asyncio.to_thread(lambda: client.containers.get(f"my-{version}-container").stop())
+
+
+class MonitorWatcher:
+    # Monitörün /jobs ucundan failover işinin ne zaman açılıp bittiğini izler
+    def __init__(self, client, base, auth, interval=0.2):
+        self.client = client
+        self.base = base.rstrip("/")
+        self.auth = auth
+        self.interval = interval
+        self.jobs = {}
+
+    async def run(self, stop):
+        while not stop.is_set():
+            try:
+                r = await self.client.get(f"{self.base}/jobs", auth=self.auth)
+                for job in r.json().get("jobs", []):
+                    if job["kind"] == "failover": self.jobs[job["id"]] = job
+            except (httpx.HTTPError, ValueError):
+                pass
+            try: await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError: pass
+
+    def first_after(self, wall):
+        jobs = sorted((j for j in self.jobs.values() if j["created"] >= wall), key=lambda j: j["created"])
+        return jobs[0] if jobs else None
+
+
+# --- ÇALIŞTIRICI ---
+class Phase:
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.hist = HdrHistogram()
+        self.errors = 0
+        self.slow = 0
+
+    def report(self):
+        out = {"phase": self.name, "start_s": round(self.start, 3), "count": self.hist.count, "errors": self.errors,
+               "error_rate": round(self.errors / self.hist.count, 4) if self.hist.count else 0.0}
+        for q in PERCENTILES:
+            v = self.hist.percentile(q)
+            out[f"p{q:g}_ms"] = round(v * 1000, 3) if v is not None else None
+        out["max_ms"] = round(self.hist.max * self.hist.unit * 1000, 3)
+        return out
+
+
+class ScenarioRunner:
+    def __init__(self, client, target, rps, duration, events, injector, timeout=2.0, max_inflight=1000,
+                 slo_target=0.999, latency_slo_ms=800, watcher=None):
+        self.client = client
+        self.target = target
+        self.rps = rps
+        self.duration = duration
+        self.events = sorted(events, key=lambda e: e.at)
+        self.injector = injector
+        self.timeout = timeout
+        self.max_inflight = max_inflight
+        self.slo_target = slo_target
+        self.latency_slo_ms = latency_slo_ms
+        self.watcher = watcher
+        self.phases = [Phase("baseline", 0.0)]
+        self.version = None
+        self.initial_version = None
+        self.inflight = 0
+        self.dropped = 0
+        self.fault_at = None
+        self.fault_wall = None
+        self.first_error_at = None
+        self.switched_at = None
+
+    def _phase_for(self, offset):
+        for phase in reversed(self.phases):
+            if phase.start <= offset: return phase
+        return self.phases[0]
+
+    def _record(self, phase, offset, ok, latency, version):
+        phase.hist.record(latency)
+        if not ok:
+            phase.errors += 1
+            if self.fault_at is not None and self.first_error_at is None and offset >= self.fault_at:
+                self.first_error_at = offset
+        elif latency * 1000 > self.latency_slo_ms:
+            phase.slow += 1
+        if ok and version:
+            if self.initial_version is None: self.initial_version = version
+            self.version = version
+            if (self.fault_at is not None and self.switched_at is None and offset >= self.fault_at
+                    and version != self.initial_version):
+                self.switched_at = offset
+
+    async def _one(self, t0, offset):
+        phase = self._phase_for(offset)
+        ok, version = False, None
+        try:
+            r = await self.client.get(self.target, timeout=self.timeout)
+            ok = r.status_code < 500
+            version = r.headers.get("x-upstream-version")
+            if version is None and ok:
+                try: version = r.json().get("version")
+                except ValueError: pass
+        except httpx.HTTPError:
+            pass
+        finally:
+            self.inflight -= 1
+        self._record(phase, offset, ok, time.monotonic() - (t0 + offset), version)
+
+    async def _timeline(self, t0):
+        for event in self.events:
+            await asyncio.sleep(max(0.0, t0 + event.at - time.monotonic()))
+            if event.action in FAULTS and self.fault_at is None:
+                self.fault_at, self.fault_wall = event.at, time.time()
+            # Faz planlanan anda başlar; enjeksiyon sürerken gönderilen istekler yeni faza sayılır
+            phase = Phase(f"{event.at:g}s {event.label}", event.at)
+            self.phases.append(phase)
+            try: await self.injector.apply(event, self.version or self.initial_version or "v1")
+            except Exception as e: phase.name += f" (enjeksiyon hatası: {e})"
+
+    async def run(self):
+        stop = asyncio.Event()
+        t0 = time.monotonic()
+        background = [asyncio.create_task(self._timeline(t0))]
+        if self.watcher is not None: background.append(asyncio.create_task(self.watcher.run(stop)))
+        tasks = set()
+        total = int(self.duration * self.rps)
+        for i in range(total):
+            offset = i / self.rps
+            await asyncio.sleep(max(0.0, t0 + offset - time.monotonic()))
+            if self.inflight >= self.max_inflight:
+                # Açık döngü: yetişemeyen istek beklemez, hata sayılır
+                self.dropped += 1
+                self._phase_for(offset).errors += 1
+                continue
+            self.inflight += 1
+            task = asyncio.create_task(self._one(t0, offset))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        stop.set()
+        for task in background: task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        return self.report()
+
+    def report(self):
+        total = sum(p.hist.count for p in self.phases) + self.dropped
+        bad = sum(p.errors + p.slow for p in self.phases)
+        allowed = total * (1 - self.slo_target)
+        overall = Phase("overall", 0.0)
+        for p in self.phases:
+            overall.hist.merge(p.hist)
+            overall.errors += p.errors
+        result = {"rps": self.rps, "duration_s": self.duration, "requests": total, "dropped": self.dropped,
+                  "initial_version": self.initial_version, "final_version": self.version,
+                  "fault_at_s": self.fault_at,
+                  "first_error_after_fault_s": self._since_fault(self.first_error_at),
+                  "client_failover_s": self._since_fault(self.switched_at),
+                  "error_budget": {"slo_target": self.slo_target, "latency_slo_ms": self.latency_slo_ms,
+                                   "bad_requests": bad, "burned": round(bad / allowed, 3) if allowed else None},
+                  "overall": overall.report(), "phases": [p.report() for p in self.phases]}
+        if self.watcher is not None and self.fault_wall is not None:
+            job = self.watcher.first_after(self.fault_wall)
+            result["time_to_detect_s"] = round(job["created"] - self.fault_wall, 3) if job else None
+            result["time_to_failover_s"] = round(job["finished"] - self.fault_wall, 3) \
+                if job and job.get("finished") else None
+        return result
+
+    def _since_fault(self, offset):
+        return round(offset - self.fault_at, 3) if offset is not None and self.fault_at is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="http://localhost:8000/proxy/")
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--event", action="append", default=[], help="saniye:olay[:arg], ör. 10:cpu:100")
+    parser.add_argument("--upstream", action="append", default=[], help="sürüm=url, ör. v1=http://localhost:8001")
+    parser.add_argument("--monitor", help="failover işlerini izlemek için monitör adresi")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="secure123")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--slo", type=float, default=0.999)
+    parser.add_argument("--latency-slo-ms", type=float, default=800)
+    parser.add_argument("--out", help="raporun yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    upstreams = {"v1": "http://localhost:8001", "v2": "http://localhost:8002", "v3": "http://localhost:8003"}
+    upstreams.update(dict(u.split("=", 1) for u in args.upstream))
+
+    def docker_factory():
+        import docker
+        return docker.from_env()
+
+    async def _main():
+        limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+        async with httpx.AsyncClient(limits=limits) as client:
+            watcher = MonitorWatcher(client, args.monitor, (args.user, args.password)) if args.monitor else None
+            runner = ScenarioRunner(client, args.target, args.rps, args.duration,
+                                    [Event.parse(e) for e in args.event], Injector(client, upstreams, docker_factory),
+                                    timeout=args.timeout, slo_target=args.slo, latency_slo_ms=args.latency_slo_ms,
+                                    watcher=watcher)
+            return await runner.run()
+
+    report = asyncio.run(_main())
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import time
+
+QUANTILES = ("p50", "p95", "p99")
+
+
+# --- POLİTİKA ---
+class CanaryPolicy:
+    """Adımlar (trafik yüzdesi) ve her adımdan sonra beklenecek süre; karşılaştırma eşikleri.
+
+    Canary sürümün hata oranı taban sürümünkünü `max_error_delta`'dan fazla aşarsa
+    ya da herhangi bir kantili `latency_ratio` x taban + `latency_slack_ms`'i geçerse
+    geri alınır. Bir adım değerlendirilmeden önce iki sürümde de `min_samples`
+    yanıt birikmiş olmalıdır.
+    """
+
+    def __init__(self, steps=(25, 50, 100), pause=5.0, min_samples=20, max_error_delta=0.01, latency_ratio=1.5,
+                 latency_slack_ms=5.0, max_wait=120.0):
+        self.steps = sorted(p for p in steps if 0 < p <= 100)
+        # Son adım her zaman terfidir (%100)
+        if not self.steps or self.steps[-1] != 100: self.steps.append(100)
+        self.pause = pause
+        self.min_samples = min_samples
+        self.max_error_delta = max_error_delta
+        self.latency_ratio = latency_ratio
+        self.latency_slack_ms = latency_slack_ms
+        self.max_wait = max_wait
+
+    @classmethod
+    def from_spec(cls, spec, **overrides):
+        # Service YAML'daki rollout.steps / pauseSeconds (bkz. examples/api-canary.yaml)
+        return cls(steps=spec.steps, pause=spec.pause, **overrides)
+
+
+def compare(baseline, canary, policy):
+    """İki sürümün pencere özetini (ServiceStats.snapshot) karşılaştırır; geri alma
+    gerekiyorsa nedenini, yoksa None döndürür."""
+    if canary["failure_rate"] > baseline["failure_rate"] + policy.max_error_delta:
+        return f"hata oranı %{canary['failure_rate'] * 100:.1f} > taban %{baseline['failure_rate'] * 100:.1f}"
+    for q in QUANTILES:
+        b, c = baseline.get(q), canary.get(q)
+        if b is None or c is None: continue
+        if c > b * policy.latency_ratio + policy.latency_slack_ms:
+            return f"{q} {c:.1f} ms > taban {b:.1f} ms"
+    return None
+
+
+def _summary(s):
+    return f"hata %{s['failure_rate'] * 100:.1f}, " + ", ".join(f"{q} {s[q]:.1f} ms" for q in QUANTILES if s.get(q) is not None)
+
+
+# --- ROLLOUT ---
+class CanaryRollout:
+    """Trafiği `baseline` sürümünden `target` sürümüne adım adım taşır.
+
+    `split` bir TrafficSplit, `stats(v)` sürümün proxy yanıtlarından beslenen
+    ServiceStats'ıdır (bellekteki kayan pencere). Her `evaluate` çağrısında adımın
+    bekleme süresi dolduysa iki sürüm karşılaştırılır: sorun yoksa sonraki adıma
+    geçilir (son adım %100 = terfi), varsa trafik tamamen tabana döner.
+    Her karar `on_decision(işlem, detay)` ile bildirilir.
+    """
+
+    def __init__(self, split, baseline, target, stats, policy, on_decision=None, clock=time.time):
+        self.split = split
+        self.baseline = baseline
+        self.target = target
+        self.stats = stats
+        self.policy = policy
+        self.on_decision = on_decision
+        self.clock = clock
+        self.state = "pending"
+        self.step = 0
+        self.step_started = None
+        self.reason = None
+        self.history = []
+
+    @property
+    def percent(self):
+        return self.policy.steps[self.step]
+
+    def _decide(self, action, detail):
+        self.history.append({"ts": self.clock(), "action": action, "detail": detail, "percent": self.percent})
+        if self.on_decision is not None: self.on_decision(action, detail)
+
+    def _apply(self, now):
+        p = self.percent
+        self.split.set({self.target: 100} if p >= 100 else {self.baseline: 100 - p, self.target: p})
+        self.step_started = now
+        # Önceki adımın örnekleri bu adımın kararına karışmasın
+        self.stats(self.baseline).reset()
+        self.stats(self.target).reset()
+
+    def start(self, now=None):
+        now = self.clock() if now is None else now
+        self.state = "running"
+        self._apply(now)
+        self._decide("CANARY_BAŞLAT", f"{self.baseline} -> {self.target}, adımlar {self.policy.steps}, ilk adım %{self.percent}")
+        if self.percent >= 100: self._promote()
+        return self
+
+    def evaluate(self, now=None):
+        """Rollout durumunu döndürür: "running", "promoted", "rolled_back" ya da "aborted"."""
+        now = self.clock() if now is None else now
+        if self.state != "running" or now < self.step_started + self.policy.pause:
+            return self.state
+        base, cand = self.stats(self.baseline).snapshot(now), self.stats(self.target).snapshot(now)
+        if min(base["count"], cand["count"]) < self.policy.min_samples:
+            if now >= self.step_started + self.policy.max_wait:
+                self.rollback(f"%{self.percent} adımında {self.policy.max_wait:g} sn içinde yeterli örnek yok "
+                              f"(taban {base['count']}, canary {cand['count']})")
+            return self.state
+        reason = compare(base, cand, self.policy)
+        if reason is not None:
+            self.rollback(reason)
+            return self.state
+        detail = f"%{self.percent} adımı geçti ({self.target}: {_summary(cand)}; {self.baseline}: {_summary(base)})"
+        self.step += 1
+        self._apply(now)
+        if self.percent >= 100:
+            self._promote(detail)
+        else:
+            self._decide("CANARY_ADIM", f"{detail}, %{self.percent} trafiğe geçildi")
+        return self.state
+
+    def _promote(self, detail=""):
+        self.state = "promoted"
+        self._decide("CANARY_TERFİ", f"{self.target} trafiğin %100'ünü aldı. {detail}".strip())
+
+    def rollback(self, reason):
+        if self.state != "running": return
+        self.split.set({self.baseline: 100})
+        self.state, self.reason = "rolled_back", reason
+        self._decide("CANARY_GERİ_AL", f"{self.target} geri alındı, trafik {self.baseline}'e döndü: {reason}")
+
+    def abort(self, reason):
+        # Dışarıdan (ör. failover) sonlandırma: trafiğe dokunulmaz, çağıran yönetir
+        if self.state != "running": return
+        self.state, self.reason = "aborted", reason
+        self._decide("CANARY_İPTAL", reason)
+
+    def snapshot(self):
+        return {"baseline": self.baseline, "target": self.target, "state": self.state, "percent": self.percent,
+                "step": self.step, "steps": self.policy.steps, "reason": self.reason, "history": self.history,
+                "weights": self.split.weights()}
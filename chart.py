@@ -0,0 +1,127 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from itertools import groupby
+
+METHODS = ("lttb", "minmax")
+
+
+# --- KAYNAK SEÇİMİ ---
+def pick_source(since, now, raw_seconds, minute_seconds):
+    # Ham örnekler budanmışsa aynı aralık rollup tablolarından okunur
+    if since >= now - raw_seconds: return "health_logs"
+    if since >= now - minute_seconds: return "health_rollup_1m"
+    return "health_rollup_1h"
+
+
+def read_points(conn, source, service, since, until, method, batch=1000):
+    """(ts, gecikme) çiftlerini zaman sırasıyla, `fetchmany` ile akış halinde döndürür.
+    Rollup satırları LTTB için ortalama, min/max için hem min hem max değeri verir."""
+    if source == "health_logs":
+        cur = conn.execute("SELECT ts, latency FROM health_logs WHERE service = ? AND ts >= ? AND ts < ? ORDER BY ts, id",
+                           (service, since, until))
+    else:
+        cur = conn.execute(f"SELECT bucket, lat_sum / count, lat_min, lat_max FROM {source} "
+                           "WHERE service = ? AND bucket >= ? AND bucket < ? ORDER BY bucket", (service, since, until))
+    try:
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows: return
+            for row in rows:
+                if source == "health_logs": yield row
+                elif method == "minmax":
+                    yield row[0], row[2]
+                    yield row[0], row[3]
+                else: yield row[0], row[1]
+    finally:
+        cur.close()
+
+
+# --- ÖRNEK AZALTMA ---
+def _area(a, p, c):
+    return abs((a[0] - c[0]) * (p[1] - a[1]) - (a[0] - p[0]) * (c[1] - a[1]))
+
+
+def _mean(points):
+    n = len(points)
+    return sum(p[0] for p in points) / n, sum(p[1] for p in points) / n
+
+
+def lttb(points, threshold, since, until):
+    """Largest-Triangle-Three-Buckets, tek geçişte. Kovalar zaman aralığını eşit
+    böler; bir kovadan seçim için sonraki kovanın ortalaması gerekir, bu yüzden
+    bellekte en fazla iki kova tutulur. En fazla `threshold` nokta döner."""
+    it = iter(points)
+    first = next(it, None)
+    if first is None: return
+    yield first
+    width = max((until - since) / max(threshold - 2, 1), 1e-9)
+    selected, held = first, None
+    for _, group in groupby(it, key=lambda p: int((p[0] - since) // width)):
+        group = list(group)
+        if held is not None:
+            target = _mean(group)
+            selected = max(held, key=lambda p: _area(selected, p, target))
+            yield selected
+        held = group
+    if held is None: return
+    last = held.pop()
+    if held:
+        yield max(held, key=lambda p: _area(selected, p, last))
+    yield last
+
+
+def minmax(points, threshold, since, until):
+    """Her kovanın en küçük ve en büyük noktası (zaman sırasıyla); tepe ve çukurlar
+    kaybolmaz. `threshold / 2` kova kullanılır."""
+    width = max((until - since) / max(threshold // 2, 1), 1e-9)
+    for _, group in groupby(points, key=lambda p: int((p[0] - since) // width)):
+        lo = hi = None
+        for p in group:
+            if lo is None or p[1] < lo[1]: lo = p
+            if hi is None or p[1] > hi[1]: hi = p
+        if lo is hi: yield lo
+        else: yield from sorted((lo, hi))
+
+
+def downsample(points, threshold, since, until, method="lttb"):
+    return list((lttb if method == "lttb" else minmax)(points, threshold, since, until))
+
+
+def quantize(since, until, points):
+    # Aralığı kova genişliğine hizalar: birkaç saniye arayla gelen aynı istek aynı anahtarı üretir
+    step = max(1, math.ceil((until - since) / max(points, 1)))
+    end = -(-int(until) // step) * step
+    return end - step * math.ceil((until - since) / step), end, step
+
+
+# --- ÖNBELLEK ---
+class ChartCache:
+    """(servis, aralık, çözünürlük, yöntem) -> seri. En fazla `size` girdi (LRU);
+    bir girdi `ttl` saniye geçerlidir (en yeni kova dolmaya devam ettiği için)."""
+
+    def __init__(self, size=128, clock=time.monotonic):
+        self.size = size
+        self.clock = clock
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, ttl, compute):
+        now = self.clock()
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None and item[0] > now:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return item[1], True
+        value = compute()
+        with self.lock:
+            self.misses += 1
+            self.items[key] = (now + ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+        return value, False
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import socket
+import time
+
+# Failover kararlarını veren liderin kira kaydı
+LEASE = "failover"
+
+
+def worker_identity():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _score(worker, name):
+    # Python'un hash()'i süreç başına tuzlanır; worker'ların aynı sonucu bulması için sabit özet
+    return int.from_bytes(hashlib.blake2b(f"{worker}\0{name}".encode(), digest_size=8).digest(), "big")
+
+
+# --- ÇOKLU WORKER KOORDİNASYONU ---
+class Coordinator:
+    """Aynı SQLite dosyasını paylaşan worker'ları eşgüdümler.
+
+    - `heartbeat` worker'ı `workers` tablosunda canlı tutar ve `leases`
+      tablosundaki failover kirasını alır / yeniler; kira `ttl` saniye
+      yenilenmezse başka bir worker devralır.
+    - `owns(isim)` servisleri canlı worker'lar arasında rendezvous hash ile
+      paylaştırır: her servisi tam olarak bir worker yoklar, bir worker gelip
+      gidince yalnızca onun payı yer değiştirir. `pinned` servisler (failover
+      servisi) her zaman lidere düşer.
+    - `failover_state` tek satırlık tablodur; sürüm indeksi yalnızca kirayı
+      tutan worker tarafından ve karşılaştır-değiştir ile ilerletilir.
+
+    Metotlar bağlantıyı parametre olarak alır; commit çağırana aittir.
+    """
+
+    def __init__(self, worker_id=None, ttl=10.0, pinned=(), clock=time.time):
+        self.worker_id = worker_id or worker_identity()
+        self.ttl = ttl
+        self.pinned = set(pinned)
+        self.clock = clock
+        self.members = (self.worker_id,)
+        self.leader = False
+        self._owners = {}
+
+    def heartbeat(self, conn):
+        """Üyeliği ve kirayı tazeler; üyelik ya da liderlik değiştiyse True."""
+        now = self.clock()
+        conn.execute("INSERT INTO workers (id, heartbeat_ts) VALUES (?, ?) "
+                     "ON CONFLICT(id) DO UPDATE SET heartbeat_ts = excluded.heartbeat_ts", (self.worker_id, now))
+        conn.execute("DELETE FROM workers WHERE heartbeat_ts < ?", (now - self.ttl,))
+        cur = conn.execute("INSERT INTO leases (name, holder, expires_ts) VALUES (?, ?, ?) "
+                           "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_ts = excluded.expires_ts "
+                           "WHERE leases.holder = excluded.holder OR leases.expires_ts < ?",
+                           (LEASE, self.worker_id, now + self.ttl, now))
+        leader = cur.rowcount == 1
+        members = tuple(sorted(r[0] for r in conn.execute("SELECT id FROM workers")))
+        changed = members != self.members or leader != self.leader
+        if members != self.members: self._owners = {}
+        self.members, self.leader = members, leader
+        return changed
+
+    def resign(self, conn):
+        # Kapanışta kira hemen bırakılır; diğer worker'lar ttl dolmasını beklemez
+        conn.execute("DELETE FROM workers WHERE id = ?", (self.worker_id,))
+        conn.execute("UPDATE leases SET expires_ts = 0 WHERE name = ? AND holder = ?", (LEASE, self.worker_id))
+        self.leader = False
+
+    def owner(self, name):
+        if name in self.pinned: return None
+        owner = self._owners.get(name)
+        if owner is None:
+            owner = self._owners[name] = max(self.members, key=lambda w: _score(w, name))
+        return owner
+
+    def owns(self, name):
+        if name in self.pinned: return self.leader
+        return self.owner(name) == self.worker_id
+
+    # --- ORTAK FAILOVER DURUMU ---
+    def init_state(self, conn, index, version):
+        conn.execute("INSERT OR IGNORE INTO failover_state (id, current_v_index, active_version, last_switch_time, updated_ts) "
+                     "VALUES (1, ?, ?, 0, ?)", (index, version, self.clock()))
+
+    def load_state(self, conn):
+        row = conn.execute("SELECT current_v_index, active_version, last_switch_time FROM failover_state WHERE id = 1").fetchone()
+        if row is None: return None
+        return {"current_v_index": row[0], "active_version": row[1], "last_switch_time": row[2]}
+
+    def claim_failover(self, conn, expected, target, cooldown):
+        """Sürüm indeksini `expected`'tan `target`'a ilerletir. Yalnızca kirayı hâlâ
+        tutan worker, bekleme süresi dolmuşsa ve başka biri araya girmemişse kazanır."""
+        now = self.clock()
+        cur = conn.execute("UPDATE failover_state SET current_v_index = ?, updated_ts = ? "
+                           "WHERE id = 1 AND current_v_index = ? AND last_switch_time <= ? "
+                           "AND EXISTS (SELECT 1 FROM leases WHERE name = ? AND holder = ? AND expires_ts >= ?)",
+                           (target, now, expected, now - cooldown, LEASE, self.worker_id, now))
+        return cur.rowcount == 1
+
+    def record_switch(self, conn, version, when):
+        conn.execute("UPDATE failover_state SET active_version = ?, last_switch_time = ?, updated_ts = ? WHERE id = 1",
+                     (version, when, self.clock()))
+
+    def snapshot(self):
+        return {"worker": self.worker_id, "leader": self.leader, "members": list(self.members)}
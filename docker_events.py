@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+
+# İzlenen konteyner olayları; health_status "health_status: unhealthy" biçiminde gelir
+WATCHED_ACTIONS = ("die", "oom", "health_status")
+
+
+# --- KONTEYNER ÖNBELLEĞİ ---
+class ContainerCache:
+    """Konteyner nesnelerini isimle önbellekler; her restart için yeniden
+    `containers.get` (bir HTTP çağrısı) yapılmaz. Kaldırılan ya da bulunamayan
+    konteyner `invalidate` ile düşürülür."""
+
+    def __init__(self, client):
+        self.client = client
+        self.items = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        c = self.items.get(name)
+        if c is not None:
+            self.hits += 1
+            return c
+        self.misses += 1
+        c = self.client().containers.get(name)
+        with self.lock:
+            self.items[name] = c
+        return c
+
+    def invalidate(self, name):
+        with self.lock:
+            self.items.pop(name, None)
+
+
+# --- OLAY AKIŞI ---
+def docker_source(client):
+    """Docker daemon'un olay akışı: yalnızca izlenen konteyner olayları."""
+    def source():
+        return client().events(decode=True, filters={"type": "container", "event": list(WATCHED_ACTIONS)})
+    return source
+
+
+class FakeEventSource:
+    """Testler için: `emit` ile Docker olay sözlüğü biçiminde olay üretir."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self
+
+    def __iter__(self):
+        while True:
+            event = self.queue.get()
+            if event is None: return
+            yield event
+
+    def emit(self, name, action, **attributes):
+        self.queue.put({"Type": "container", "Action": action, "time": int(time.time()),
+                        "timeNano": time.time_ns(), "Actor": {"Attributes": dict(attributes, name=name)}})
+
+    def close(self):
+        self.queue.put(None)
+
+
+class EventWatcher:
+    """Olay akışını ayrı bir thread'de okur ve `containers()` ({servis: konteyner})
+    içindeki konteynerler için `on_event(servis, tür, olay)` çağırır. Tür "die",
+    "oom" ya da "unhealthy"dır; "healthy" olayları yok sayılır.
+
+    `expect(isim)` ile işaretlenen konteynerin (ör. biz yeniden başlatıyoruz)
+    kısa süre içindeki olayları bildirilmez. Akış koparsa artan beklemeyle
+    yeniden bağlanılır.
+    """
+
+    def __init__(self, source, containers, on_event, expect_window=15.0, max_backoff=30.0, clock=time.monotonic):
+        self.source = source
+        self.containers = containers
+        self.on_event = on_event
+        self.expect_window = expect_window
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.expected = {}
+        self.stream = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.stats = {"events": 0, "handled": 0, "ignored": 0, "reconnects": 0, "errors": 0}
+
+    def expect(self, name):
+        self.expected[name] = self.clock() + self.expect_window
+
+    @staticmethod
+    def classify(event):
+        action = event.get("Action") or event.get("status") or ""
+        if action.startswith("health_status"):
+            return "unhealthy" if action.endswith("unhealthy") else None
+        return action if action in ("die", "oom") else None
+
+    def handle(self, event):
+        self.stats["events"] += 1
+        kind = self.classify(event)
+        name = ((event.get("Actor") or {}).get("Attributes") or {}).get("name")
+        owner = None
+        if kind is not None and name is not None:
+            owner = next((svc for svc, c in list(self.containers().items()) if c == name), None)
+        if owner is None or self.expected.get(name, 0) > self.clock():
+            self.stats["ignored"] += 1
+            return False
+        self.stats["handled"] += 1
+        self.on_event(owner, kind, event)
+        return True
+
+    def run(self):
+        backoff = 1.0
+        while not self.stopped.is_set():
+            try:
+                self.stream = self.source()
+                backoff = 1.0
+                for event in self.stream:
+                    if self.stopped.is_set(): break
+                    try: self.handle(event)
+                    except Exception: self.stats["errors"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+            if self.stopped.is_set(): break
+            self.stats["reconnects"] += 1
+            self.stopped.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True, name="docker-events")
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        stream, self.stream = self.stream, None
+        if stream is not None and hasattr(stream, "close"):
+            try: stream.close()
+            except Exception: pass
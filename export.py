@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import zlib
+
+# Dışa aktarılabilen tablolar: kısa ad -> (tablo, sütunlar, servis filtresi)
+# audit_logs'ta servis sütunu yok; servis adı detay metninde geçen satırlar seçilir.
+TABLES = {
+    "health": ("health_logs", ("id", "ts", "timestamp", "service", "status", "latency"), "service = ?"),
+    "audit": ("audit_logs", ("id", "ts", "timestamp", "user", "action", "detail"), "instr(detail, ?) > 0"),
+}
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _where(kind, service, since, until, after=None):
+    _, _, service_clause = TABLES[kind]
+    clauses, params = [], []
+    if service:
+        clauses.append(service_clause); params.append(service)
+    if since is not None:
+        clauses.append("ts >= ?"); params.append(int(since))
+    if until is not None:
+        clauses.append("ts < ?"); params.append(int(until))
+    if after is not None:
+        # Keyset: (ts, id) sırası (service, ts) / (ts) indekslerinin sırasıyla aynı, OFFSET taraması yok
+        clauses.append("(ts, id) > (?, ?)"); params.extend(after)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def iter_batches(conn, kind, service=None, since=None, until=None, batch=1000):
+    """Satırları tek bir imleçten `fetchmany` ile parça parça döndürür; bellekte
+    hiçbir zaman `batch`'ten fazla satır tutulmaz."""
+    table, columns, _ = TABLES[kind]
+    where, params = _where(kind, service, since, until)
+    cur = conn.execute(f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY ts, id", params)
+    try:
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows: return
+            yield rows
+    finally:
+        cur.close()
+
+
+def encode(kind, batches, fmt):
+    # Her parti tek bir metin parçasına dönüşür; satır başına yield edilmez
+    columns = TABLES[kind][1]
+    if fmt == "ndjson":
+        for rows in batches:
+            yield "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows).encode()
+        return
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buf.getvalue().encode()
+        buf.seek(0); buf.truncate()
+    if buf.tell(): yield buf.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=6):
+    # Akış halinde gzip: her parça sıkıştırılıp hemen gönderilir, dosya bütün olarak tutulmaz
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out: yield out
+    yield z.flush()
+
+
+def export_stream(conn, kind, fmt="ndjson", service=None, since=None, until=None, gzip=False, batch=1000):
+    """Bağlantıyı akış bitince (ya da istemci kopunca) kapatan bayt üreteci."""
+    try:
+        chunks = encode(kind, iter_batches(conn, kind, service, since, until, batch), fmt)
+        yield from (gzip_chunks(chunks) if gzip else chunks)
+    finally:
+        conn.close()
+
+
+def encode_cursor(ts, row_id):
+    return f"{ts}:{row_id}"
+
+
+def decode_cursor(text):
+    ts, _, row_id = text.partition(":")
+    return int(ts), int(row_id)
+
+
+def query_page(conn, kind, service=None, since=None, until=None, cursor=None, limit=100):
+    """Keyset sayfalama: `next_cursor` bir sonraki sayfanın başlangıcıdır, son sayfada None."""
+    table, columns, _ = TABLES[kind]
+    where, params = _where(kind, service, since, until, decode_cursor(cursor) if cursor else None)
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY ts, id LIMIT ?",
+                        params + [limit + 1]).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {"rows": [dict(zip(columns, r)) for r in rows],
+            "next_cursor": encode_cursor(rows[-1][1], rows[-1][0]) if more else None}
@@ -0,0 +1,163 @@
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+
+# --- İMAJ ÖNBELLEĞİ ---
+def dir_hash(path):
+    # Dizin içeriğinin (göreli yol + dosya içeriği) hash'i; kaynak değişmedikçe aynı kalır
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__" and not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(".pyc"): continue
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).replace(os.sep, "/").encode() + b"\0")
+            with open(full, "rb") as f:
+                h.update(f.read())
+            h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+class ImageCache:
+    """`service-{v}:{içerik-hash}` etiketli imajları yeniden kullanır; yalnızca
+    servis dizini değiştiğinde build eder."""
+
+    def __init__(self):
+        self.known = set()
+        self.builds = 0
+        self.hits = 0
+
+    def ensure(self, client, version, path):
+        tag = f"service-{version}:{dir_hash(path)}"
+        if tag in self.known:
+            self.hits += 1
+            return tag
+        try:
+            client.images.get(tag)
+            self.hits += 1
+        except Exception:
+            client.images.build(path=path, tag=tag, rm=True)
+            self.builds += 1
+        self.known.add(tag)
+        return tag
+
+
+# --- ARKA PLAN İŞ YÜRÜTÜCÜSÜ ---
+class Job:
+    def __init__(self, job_id, kind, fn):
+        self.id = job_id
+        self.kind = kind
+        self.fn = fn
+        self.state = "queued"
+        self.phase = None
+        self.phases = []
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.listeners = []
+        self._phase_start = None
+
+    def progress(self, phase):
+        now = time.monotonic()
+        self._close_phase(now)
+        self.phase, self._phase_start = phase, now
+        for listener in self.listeners:
+            listener(self, phase)
+
+    def _close_phase(self, now):
+        if self.phase is not None and self._phase_start is not None:
+            self.phases.append((self.phase, round(now - self._phase_start, 3)))
+            self._phase_start = None
+
+    def as_dict(self):
+        return {"id": self.id, "kind": self.kind, "state": self.state, "phase": self.phase,
+                "phases": self.phases, "error": self.error, "created": self.created, "finished": self.finished}
+
+
+class JobExecutor:
+    """Docker işlerini monitör thread'inin dışında, tek bir worker'da sırayla çalıştırır.
+
+    Aynı türden bir iş zaten kuyruktaysa ya da çalışıyorsa yenisi eklenmez; böylece
+    üst üste gelen hata sinyalleri ikinci bir failover başlatmaz.
+    """
+
+    def __init__(self, history=20):
+        self.queue = queue.Queue()
+        self.jobs = deque(maxlen=history)
+        self.active = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.thread = None
+        # on_finish(job): iş bittiğinde (başarılı ya da değil) çağrılır
+        self.on_finish = None
+
+    def submit(self, kind, fn, listener=None):
+        with self.lock:
+            if kind in self.active:
+                return None
+            job = Job(next(self.ids), kind, fn)
+            if listener is not None: job.listeners.append(listener)
+            self.active[kind] = job
+            self.jobs.append(job)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True, name="failover-jobs")
+                self.thread.start()
+        self.queue.put(job)
+        return job
+
+    def run_job(self, job):
+        job.state = "running"
+        try:
+            job.fn(job)
+            job.state = "done"
+        except Exception as e:
+            job.state, job.error = "failed", str(e)
+        finally:
+            job._close_phase(time.monotonic())
+            job.finished = time.time()
+            if self.on_finish is not None:
+                try: self.on_finish(job)
+                except Exception: pass
+            with self.lock:
+                self.active.pop(job.kind, None)
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            self.run_job(job)
+            self.queue.task_done()
+
+    def wait(self, timeout=None):
+        # Testler ve kapanış için: kuyruktaki işler bitene kadar bekle
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.active:
+            if deadline is not None and time.monotonic() > deadline: return False
+            time.sleep(0.01)
+        return True
+
+    def busy(self, kind):
+        return kind in self.active
+
+    def recent(self):
+        return [j.as_dict() for j in reversed(self.jobs)]
+
+
+# --- SICAK YEDEK ---
+def container_running(client, name):
+    try:
+        c = client.containers.get(name)
+        c.reload()
+        return c.status == "running"
+    except Exception:
+        return False
+
+
+def start_container(client, image, name, port):
+    try: client.containers.get(name).remove(force=True)
+    except Exception: pass
+    return client.containers.run(image, detach=True, ports={'80/tcp': port}, name=name)
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from email.utils import formatdate
+
+
+# --- CANLI DURUM (RING BUFFER) ---
+class LiveState:
+    """Servis başına son sağlık örneklerini ve son audit kayıtlarını sabit boyutlu
+    ring buffer'larda tutar. Satırlar DB ile aynı biçimdedir:
+    health -> (id, timestamp, service, status, latency), audit -> (id, timestamp, user, action, detail).
+
+    Her değişiklik `version`'ı artırır; dashboard önbelleği buna bakarak yeniden
+    çizim gerekip gerekmediğine karar verir.
+
+    Çoklu worker'da her worker yalnızca kendi probe ve audit satırlarını ekler;
+    `sync` diğer worker'ların DB'ye yazdığı satırları id sırasıyla, kaldığı yerden çeker.
+    """
+
+    def __init__(self, health_size=10, audit_size=5, hub=None):
+        self.hub = hub
+        self.health_size = health_size
+        self.audit_size = audit_size
+        self.health = {}
+        self.audit = deque(maxlen=audit_size)
+        self.lock = threading.Lock()
+        self.seq = itertools.count(1)
+        self.version = 0
+        self.updated_at = time.time()
+        # Tablo başına DB'den okunan son id
+        self.synced = {"health_logs": 0, "audit_logs": 0}
+
+    def _touch(self):
+        self.version += 1
+        self.updated_at = time.time()
+
+    def add_health(self, timestamp, service, status, latency):
+        with self.lock:
+            buf = self.health.get(service)
+            if buf is None:
+                buf = self.health[service] = deque(maxlen=self.health_size)
+            row = (next(self.seq), timestamp, service, status, latency)
+            buf.append(row)
+            self._touch()
+        if self.hub is not None:
+            self.hub.publish("health", {"id": row[0], "timestamp": timestamp, "service": service,
+                                        "status": status, "latency": latency})
+
+    def add_audit(self, timestamp, user, action, detail):
+        with self.lock:
+            row = (next(self.seq), timestamp, user, action, detail)
+            self.audit.append(row)
+            self._touch()
+        if self.hub is not None:
+            self.hub.publish("audit", {"id": row[0], "timestamp": timestamp, "user": user,
+                                       "action": action, "detail": detail})
+
+    def touch(self):
+        with self.lock:
+            self._touch()
+
+    def recent_health(self, n=None):
+        # En yeni önce; servis buffer'ları sıra numarasına göre birleştirilir
+        with self.lock:
+            merged = heapq.merge(*[reversed(b) for b in self.health.values()], key=lambda r: r[0], reverse=True)
+            return list(itertools.islice(merged, n or self.health_size))
+
+    def recent_audit(self):
+        with self.lock:
+            return list(reversed(self.audit))
+
+    def load(self, conn):
+        # Yeniden başlatmada buffer'ları DB'deki son satırlarla bir kez doldur
+        health = conn.execute("SELECT id, timestamp, service, status, latency FROM health_logs ORDER BY id DESC LIMIT ?",
+                              (self.health_size,)).fetchall()
+        audit = conn.execute("SELECT id, timestamp, user, action, detail FROM audit_logs ORDER BY id DESC LIMIT ?",
+                             (self.audit_size,)).fetchall()
+        hub, self.hub = self.hub, None
+        try:
+            for r in reversed(health): self.add_health(*r[1:])
+            for r in reversed(audit): self.add_audit(*r[1:])
+        finally:
+            self.hub = hub
+        for table in self.synced:
+            self.synced[table] = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    def sync(self, conn, worker, limit=1000):
+        """Son `sync`'ten beri başka worker'ların yazdığı satırları ekler (SSE'ye de yayınlanır);
+        eklenen satır sayısını döndürür. Birikmiş çok satır varsa yalnızca en yeni `limit` tanesi alınır."""
+        added = 0
+        for table, columns, add in (("health_logs", "timestamp, service, status, latency", self.add_health),
+                                    ("audit_logs", "timestamp, user, action, detail", self.add_audit)):
+            top = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            rows = conn.execute(f"SELECT {columns} FROM {table} WHERE id > ? AND id <= ? AND worker IS NOT ? "
+                                "ORDER BY id DESC LIMIT ?", (self.synced[table], top, worker, limit)).fetchall()
+            self.synced[table] = top
+            for r in reversed(rows): add(*r)
+            added += len(rows)
+        return added
+
+
+# --- CANLI YAYIN (SSE) ---
+class EventHub:
+    """Monitör thread'inden gelen olayları tüm abonelere tek seferde dağıtır.
+
+    Olay bir kez SSE metnine çevrilir; her event loop'a tek bir
+    `call_soon_threadsafe` ile gönderilir ve orada abonelerin kuyruklarına
+    konur. Kuyruğu dolan yavaş abone olayı kaçırır, yayını yavaşlatmaz.
+    """
+
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self.subscribers = {}
+        self.lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(self.max_queue)
+        with self.lock:
+            self.subscribers.setdefault(loop, set()).add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            for loop, queues in list(self.subscribers.items()):
+                queues.discard(q)
+                if not queues: del self.subscribers[loop]
+
+    def _deliver(self, queues, payload):
+        for q in queues:
+            try: q.put_nowait(payload)
+            except asyncio.QueueFull: self.dropped += 1
+
+    def publish(self, kind, data):
+        payload = format_sse(kind, data)
+        self.published += 1
+        with self.lock:
+            targets = [(loop, tuple(queues)) for loop, queues in self.subscribers.items()]
+        for loop, queues in targets:
+            try: loop.call_soon_threadsafe(self._deliver, queues, payload)
+            except RuntimeError: pass  # loop kapanmış
+
+    def count(self):
+        with self.lock:
+            return sum(len(q) for q in self.subscribers.values())
+
+
+def format_sse(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# --- ÇİZİM ÖNBELLEĞİ ---
+class RenderCache:
+    """Son çizilen sayfayı anahtarıyla birlikte saklar; anahtar değişmedikçe aynı
+    gövde, ETag ve Last-Modified döner."""
+
+    def __init__(self):
+        self.key = None
+        self.body = None
+        self.etag = None
+        self.last_modified = None
+        self.renders = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, render):
+        with self.lock:
+            if key != self.key:
+                body = render()
+                self.key, self.body = key, body
+                self.etag = '"' + hashlib.sha1(body.encode()).hexdigest()[:16] + '"'
+                self.last_modified = formatdate(time.time(), usegmt=True)
+                self.renders += 1
+            return self.body, self.etag, self.last_modified
+
+
+def not_modified(headers, etag, last_modified):
+    inm = headers.get("if-none-match")
+    if inm is not None:
+        return etag in [t.strip().removeprefix("W/") for t in inm.split(",")] or inm.strip() == "*"
+    return headers.get("if-modified-since") == last_modified
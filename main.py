@@ -1,25 +1,43 @@
-from fastapi import FastAPI, Request, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, FastAPI, Request, Depends, HTTPException, status
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-import docker
+from pydantic import BaseModel
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import time
 import threading
 import sqlite3
 import json
-import smtplib
+import html
 import secrets
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import os
-from dotenv import load_dotenv
+from probe_engine import AdaptivePolicy, ProbeEngine, ProbeSchedule
+import storage
+import export
+import chart
+from chart import ChartCache
+from storage import BatchWriter, Rollups, Retention, StateSnapshot
+from failover import ImageCache, JobExecutor, container_running, start_container
+from docker_events import ContainerCache, EventWatcher, docker_source
+from notifier import Outbox
+from stats import FailoverPolicy, StatsRegistry
+from metrics import Registry
+from registry import ServiceRegistry
+from cluster import Coordinator, worker_identity
+from proxy import ReverseProxy, TrafficSplit
+from canary import CanaryPolicy, CanaryRollout
+from live import EventHub, LiveState, RenderCache, format_sse, not_modified
 
-# .env dosyasındaki değişkenleri yükle
-load_dotenv()
+# .env dosyasındaki değişkenleri yükle; dosya yoksa python-dotenv hiç import edilmez
+if os.path.exists(".env"):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # --- MONITOR KONTROLU ---
 try:
     from monitor import check_service_health
+    _builtin_check = None
 except ImportError:
     def check_service_health(url):
         import requests
@@ -28,8 +46,10 @@ except ImportError:
             return (r.status_code == 200), "OK"
         except:
             return False, "BAĞLANTI YOK"
+    _builtin_check = check_service_health
 
-app = FastAPI(title="Güvenli Otonom Sistem vFinal")
+# Uçlar modül seviyesinde router'a bağlanır; uygulamanın kendisi `create_app()` ile kurulur
+router = APIRouter()
 security = HTTPBasic()
 
 # --- GÜVENLİK ---
@@ -43,29 +63,154 @@ DB_NAME = "monitor.db"
 SENDER_EMAIL = os.getenv("MAIL_USER")
 SENDER_PASSWORD = os.getenv("MAIL_PASS")
 RECEIVER_EMAIL = os.getenv("MAIL_RECEIVER")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+# Bu süre (sn) içinde gelen bildirimler tek bir özet mailde toplanır
+MAIL_DIGEST_WINDOW = float(os.getenv("MAIL_DIGEST_WINDOW", "10"))
+outbox = None
 
 VERSIONS = ["v1", "v2", "v3"]
 PORTS = {"v1": 8001, "v2": 8002, "v3": 8003}
 current_v_index = 0
+SERVICES_DIR = "./services"
 
+# Sıcak yedek: sıradaki sürüm önceden build edilip başlatılır, failover sadece yönlendirme yapar
+WARM_STANDBY = os.getenv("WARM_STANDBY", "0") == "1"
+failover_jobs = JobExecutor()
+failover_jobs.on_finish = lambda job: record_job(job)
+image_cache = ImageCache()
+
+# Tek, uzun ömürlü Docker istemcisi; ilk kullanımda oluşturulur ve tüm yollar onu paylaşır.
+# docker-py de (requests ile birlikte) ancak o an import edilir.
+docker = None
+docker_client = None
+docker_lock = threading.Lock()
+container_cache = ContainerCache(lambda: get_docker())
+# Konteyner ölümleri HTTP probe'larını beklemeden Docker olay akışından yakalanır
+DOCKER_EVENTS = os.getenv("DOCKER_EVENTS", "1") == "1"
+event_watcher = None
+# Docker restart'ı saniyeler sürebilir; probe döngüsünde değil bu havuzda çalışır.
+# Aynı servis için aynı anda en fazla bir restart sürer.
+RESTART_WORKERS = 4
+restart_pool = None
+restarting = set()
+restart_lock = threading.Lock()
+
+def get_docker():
+    global docker, docker_client
+    if docker_client is None:
+        with docker_lock:
+            if docker_client is None:
+                if docker is None: import docker
+                docker_client = docker.from_env()
+    return docker_client
+
+# Sürüm rotasyonu (VERSIONS) yalnızca bu servise uygulanır; diğerleri kendi konteynerini yeniden başlatır
+FAILOVER_SERVICE = "Ana Servis"
 REGISTERED_SERVICES = {"Ana Servis": f"http://localhost:{PORTS['v1']}/health"}
 CONTAINER_MAP = {"Ana Servis": "my-v1-container"}
 
-failure_log = []
 last_switch_time = 0
 COOLDOWN = 15
 FAIL_LIMIT = 5
+FAIL_WINDOW = 10
+# p95 gecikmesi bu eşiği aşarsa servis ayakta olsa bile failover tetiklenir
+LATENCY_SLO_MS = 800
+LATENCY_MIN_SAMPLES = 5
+# Servis bazında farklı eşikler: isim -> FailoverPolicy(fail_limit, window, latency_slo_ms, ...)
+SERVICE_POLICIES = {}
+service_stats = StatsRegistry(FailoverPolicy(FAIL_LIMIT, FAIL_WINDOW, LATENCY_SLO_MS, min_samples=LATENCY_MIN_SAMPLES),
+                              SERVICE_POLICIES)
+
+# Probe takvimi: servis bazında aralık / zaman aşımı / jitter (saniye)
+PROBE_INTERVAL = 2
+PROBE_TIMEOUT = 1
+PROBE_JITTER = 0.2
+PROBE_CONCURRENCY = 100
+# Benchmark/test için: probe'lar ağ yerine bu httpx transport'una (ör. ASGITransport) gider
+PROBE_TRANSPORT = None
+SERVICE_SCHEDULES = {}
+DEFAULT_SCHEDULE = ProbeSchedule(PROBE_INTERVAL, PROBE_TIMEOUT, PROBE_JITTER)
+# Zaman aşımı ve hedge eşiği servisin gözlenen gecikmesinden hesaplanır; süre PROBE_TIMEOUT'un altına
+# inmez, yalnızca yavaş servisler için uzar (None: hep PROBE_TIMEOUT)
+PROBE_ADAPTIVE = AdaptivePolicy(multiplier=3.0, min_timeout=0.05, max_timeout=10.0)
+# Üst üste bu kadar hatadan sonra servis PROBE_BREAKER_OPEN saniye yoklanmaz (0: kapalı).
+# FAILOVER_SERVICE hariçtir: FAIL_WINDOW içinde FAIL_LIMIT hata görebilmesi için hep yoklanır.
+PROBE_BREAKER_THRESHOLD = 5
+PROBE_BREAKER_OPEN = 10
+monitor_engine = None
+
+# Çalışma anında eklenen servisler SQLite'taki `services` tablosunda saklanır
+service_registry = ServiceRegistry(REGISTERED_SERVICES, CONTAINER_MAP, SERVICE_SCHEDULES, SERVICE_POLICIES,
+                                   DEFAULT_SCHEDULE, service_stats.default_policy, managed=[FAILOVER_SERVICE])
+
 system_status_msg = "Sistem Güvenli ve Stabil"
 
+# --- TRAFİK ---
+# İstemciler sabit port yerine /proxy/ üzerinden gelir; failover ve canary yalnızca ağırlık değiştirir
+PROXY_TIMEOUT = 10
+PROXY_DRAIN_TIMEOUT = 10
+traffic = TrafficSplit({VERSIONS[current_v_index]: 100})
+upstream_stats = StatsRegistry(FailoverPolicy(FAIL_LIMIT, FAIL_WINDOW, LATENCY_SLO_MS, min_samples=LATENCY_MIN_SAMPLES))
+proxy = ReverseProxy(lambda v: f"http://localhost:{PORTS[v]}", traffic, timeout=PROXY_TIMEOUT,
+                     on_response=lambda v, ok, latency: upstream_stats.get(v).record(ok, latency))
+
+# --- METRİKLER ---
+# Kayıt thread başına parçalara yapılır, kilit yalnızca /metrics okunurken alınır
+metrics = Registry()
+PROBE_LATENCY = metrics.histogram("monitor_probe_latency_seconds", "Servis başına probe gecikmesi", ["service"])
+MONITOR_TICK = metrics.histogram("monitor_tick_seconds", "Bir probe sonucunun işlenme süresi")
+DB_WRITE = metrics.histogram("monitor_sqlite_write_seconds", "SQLite parti yazma süresi (insert/commit)", ["phase"])
+DASHBOARD_RENDER = metrics.histogram("monitor_dashboard_render_seconds", "Dashboard HTML çizim süresi")
+FAILOVER_PHASE = metrics.histogram("monitor_failover_phase_seconds", "Failover aşama süreleri", ["phase"],
+                                   buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+RESTARTS = metrics.counter("monitor_container_restarts_total", "Konteyner yeniden başlatmaları", ["service"])
+FAILOVERS = metrics.counter("monitor_failovers_total", "Failover işleri", ["result"])
+CONTAINER_EVENTS = metrics.counter("monitor_container_events_total", "İşlenen Docker olayları", ["kind"])
+EVENT_LAG = metrics.histogram("monitor_container_event_lag_seconds", "Docker olayından işlenmesine kadar geçen süre")
+SWALLOWED = metrics.counter("monitor_swallowed_exceptions_total", "Yutulan istisnalar", ["site"])
+metrics.gauge("monitor_db_writer_rows", "Grup-commit yazıcı sayaçları",
+              lambda: {(k,): v for k, v in db_writer.snapshot().items()} if db_writer else {}, ["state"])
+
+def swallowed(site):
+    SWALLOWED.inc(site)
+
 # --- VERİTABANI ---
+# Tüm yazmalar tek bir grup-commit yazıcısından geçer; okuyucular kendi bağlantısını açar.
+db_writer = None
+
+# Ham örnekler bu kadar saat tutulur; daha eski aralıklar rollup tablolarından okunur
+RETENTION_RAW_HOURS = 24
+RETENTION_MINUTE_DAYS = 7
+RETENTION_HOUR_DAYS = 90
+rollups = Rollups()
+
+# Dashboard DB'ye değil, monitörün doldurduğu ring buffer'lara bakar
+events = EventHub()
+live = LiveState(health_size=10, audit_size=5, hub=events)
+dashboard_cache = RenderCache()
+
 def get_db():
     return sqlite3.connect(DB_NAME, check_same_thread=False)
 
+def get_writer():
+    global db_writer
+    if db_writer is None or db_writer.closed:
+        db_writer = BatchWriter(DB_NAME)
+        db_writer.timer = lambda phase, seconds: DB_WRITE.observe(seconds, phase)
+        db_writer.hooks = [rollups, Retention(RETENTION_RAW_HOURS * 3600, RETENTION_MINUTE_DAYS * 86400,
+                                              RETENTION_HOUR_DAYS * 86400), state_snapshot]
+    return db_writer
+
 def init_db():
-    conn = get_db()
-    conn.execute('CREATE TABLE IF NOT EXISTS health_logs (id INTEGER PRIMARY KEY, timestamp TEXT, service TEXT, status TEXT, latency REAL)')
-    conn.execute('CREATE TABLE IF NOT EXISTS audit_logs (id INTEGER PRIMARY KEY, timestamp TEXT, user TEXT, action TEXT, detail TEXT)')
-    conn.close()
+    global db_writer
+    if db_writer is not None and db_writer.db_name != DB_NAME:
+        db_writer.stop(); db_writer = None
+    get_writer().execute_script(
+        'CREATE TABLE IF NOT EXISTS health_logs (id INTEGER PRIMARY KEY, timestamp TEXT, service TEXT, status TEXT, latency REAL);'
+        'CREATE TABLE IF NOT EXISTS audit_logs (id INTEGER PRIMARY KEY, timestamp TEXT, user TEXT, action TEXT, detail TEXT);')
+    get_writer().call(storage.migrate)
 
 # --- GİRİŞ KONTROLÜ ---
 def get_current_username(credentials: HTTPBasicCredentials = Depends(security)):
@@ -76,111 +221,747 @@ def get_current_username(credentials: HTTPBasicCredentials = Depends(security)):
 # --- AUDIT LOG ---
 def log_audit(user, action, detail):
     try:
-        conn = get_db()
-        conn.execute("INSERT INTO audit_logs (timestamp, user, action, detail) VALUES (?, ?, ?, ?)",
-                     (datetime.now().strftime("%H:%M:%S"), user, action, detail))
-        conn.commit(); conn.close()
-    except: pass
+        now = time.time()
+        stamp = datetime.fromtimestamp(now).strftime("%H:%M:%S")
+        live.add_audit(stamp, user, action, detail)
+        get_writer().submit("INSERT INTO audit_logs (timestamp, ts, user, action, detail, worker) VALUES (?, ?, ?, ?, ?, ?)",
+                            (stamp, int(now), user, action, detail, WORKER_ID), block_timeout=1)
+    except: swallowed("log_audit")
 
 # --- MAIL ---
+def get_outbox():
+    global outbox
+    if outbox is None:
+        outbox = Outbox(DB_NAME, SENDER_EMAIL, RECEIVER_EMAIL, host=SMTP_HOST, port=SMTP_PORT, starttls=SMTP_STARTTLS,
+                        password=SENDER_PASSWORD, window=MAIL_DIGEST_WINDOW)
+    return outbox
+
 def send_email_notification(subject, text):
-    if not SENDER_EMAIL or not SENDER_PASSWORD:
+    # Gönderim arka planda yapılır; burada yalnızca outbox'a yazılır
+    if not SENDER_EMAIL or not RECEIVER_EMAIL:
         print("Mail gönderilemedi: Kimlik bilgileri eksik.")
         return
-
     try:
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_EMAIL
-        msg['To'] = RECEIVER_EMAIL
-        msg['Subject'] = f"GÜVENLİK UYARISI: {subject}"
-        msg.attach(MIMEText(text, 'html'))
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.sendmail(SENDER_EMAIL, RECEIVER_EMAIL, msg.as_string())
-        server.quit()
-    except Exception as e: 
+        get_outbox().enqueue(subject, text)
+    except Exception as e:
         print(f"Mail Hatası: {e}")
 
+# --- DURUM MESAJI ---
+def set_status(msg):
+    global system_status_msg
+    system_status_msg = msg
+    events.publish("status", {"version": VERSIONS[current_v_index].upper(), "message": msg})
+
+# --- ÇOKLU WORKER KOORDİNASYONU ---
+# Aynı monitor.db'yi paylaşan worker'lar (uvicorn/gunicorn --workers): failover kararını kirayı
+# tutan lider verir, servisler worker'lar arasında paylaştırılır, sürüm durumu failover_state'tedir.
+MONITOR_CLUSTER = os.getenv("MONITOR_CLUSTER", "1") == "1"
+CLUSTER_LEASE_TTL = 10
+CLUSTER_HEARTBEAT = 3
+WORKER_ID = worker_identity()
+cluster = None
+cluster_stop = threading.Event()
+
+def owns(name):
+    # Servisi bu worker mı yokluyor / konteynerine bu worker mı dokunuyor
+    return cluster is None or cluster.owns(name)
+
+def is_leader():
+    return cluster is None or cluster.leader
+
+def start_cluster():
+    global cluster
+    if cluster is None:
+        cluster = Coordinator(WORKER_ID, ttl=CLUSTER_LEASE_TTL, pinned=[FAILOVER_SERVICE])
+        get_writer().call(lambda conn: cluster.init_state(conn, current_v_index, VERSIONS[current_v_index]))
+        cluster_tick()
+        cluster_stop.clear()
+        threading.Thread(target=cluster_loop, daemon=True, name="cluster").start()
+    return cluster
+
+def cluster_tick():
+    was_leader = cluster.leader
+    changed = get_writer().call(cluster.heartbeat)
+    state = get_writer().call(cluster.load_state)
+    if state is not None: apply_shared_state(state)
+    if cluster.leader != was_leader:
+        log_audit("SİSTEM (AI)", "LİDER", f"{cluster.worker_id} failover liderliğini {'aldı' if cluster.leader else 'bıraktı'}.")
+        if cluster.leader and WARM_STANDBY: submit_standby()
+    if changed and monitor_engine is not None: monitor_engine.notify()
+    # Dashboard her worker'da tüm servisleri göstersin: diğer worker'ların satırları buffer'lara çekilir
+    if len(cluster.members) > 1: sync_live()
+
+def sync_live():
+    conn = get_db()
+    try: return live.sync(conn, WORKER_ID)
+    finally: conn.close()
+
+def cluster_loop():
+    while not cluster_stop.wait(CLUSTER_HEARTBEAT):
+        try: cluster_tick()
+        except Exception: swallowed("cluster")
+
+def apply_shared_state(state):
+    # Diğer worker'ın (liderin) yaptığı geçiş bu worker'ın proxy'sine ve kayıtlarına yansır
+    global current_v_index, last_switch_time
+    if failover_jobs.busy("failover"): return
+    current_v_index = state["current_v_index"]
+    last_switch_time = max(last_switch_time, state["last_switch_time"])
+    active = state["active_version"]
+    if active and CONTAINER_MAP.get(FAILOVER_SERVICE) != container_name(active):
+        route_to(active)
+        set_status(f"BAŞARILI: {active.upper()} Aktif")
+
 # --- AKILLI GEÇİŞ ---
+PHASE_LABELS = {"build": "imaj hazırlanıyor", "run": "konteyner başlatılıyor", "switch": "trafik yönlendiriliyor",
+                "remove": "eski konteynerler kaldırılıyor", "standby": "sıcak yedek hazırlanıyor"}
+
+def container_name(v):
+    return f"my-{v}-container"
+
+def next_version(v):
+    return VERSIONS[(VERSIONS.index(v) + 1) % len(VERSIONS)]
+
 def execute_smart_failover():
-    global current_v_index, last_switch_time, system_status_msg
-    
+    # Docker işleri arka plandaki yürütücüde çalışır; monitör beklemeden probe'lara devam eder
+    global current_v_index
+
+    if not is_leader(): return
     if time.time() - last_switch_time < COOLDOWN: return
+    if failover_jobs.busy("failover"): return
 
     target_index = current_v_index + 1
     if target_index >= len(VERSIONS): target_index = 0
-    
+    # Kira başka worker'a geçtiyse ya da o worker önce davrandıysa bu karar geçersizdir
+    if cluster is not None and not get_writer().call(
+            lambda conn: cluster.claim_failover(conn, current_v_index, target_index, COOLDOWN)):
+        return
+
     current_v_index = target_index
     new_v = VERSIONS[current_v_index]
-    new_port = PORTS[new_v]
-    
-    system_status_msg = f"OTONOM GEÇİŞ: {new_v.upper()}..."
+
+    set_status(f"OTONOM GEÇİŞ: {new_v.upper()}...")
     log_audit("SİSTEM (AI)", "FAILOVER", f"{new_v.upper()} sürümüne otomatik geçiş.")
+    return failover_jobs.submit("failover", lambda job: run_failover(job, new_v),
+                                listener=lambda job, phase: report_phase(new_v, phase))
+
+def report_phase(new_v, phase):
+    # Yönlendirme sonrası temizlik adımları "BAŞARILI" mesajını ezmez
+    if phase in ("build", "run", "switch"):
+        set_status(f"OTONOM GEÇİŞ: {new_v.upper()} ({PHASE_LABELS[phase]})")
+
+def record_job(job):
+    for phase, seconds in job.phases:
+        FAILOVER_PHASE.observe(seconds, phase)
+    if job.kind == "failover":
+        FAILOVERS.inc(job.state)
+
+def route_to(v):
+    traffic.set({v: 100})
+    REGISTERED_SERVICES[FAILOVER_SERVICE] = f"http://localhost:{PORTS[v]}/health"
+    CONTAINER_MAP[FAILOVER_SERVICE] = container_name(v)
 
+def run_failover(job, new_v):
+    global last_switch_time
+    new_port = PORTS[new_v]
     try:
-        client = docker.from_env()
-        client.images.build(path=f"./services/{new_v}", tag=f"service-{new_v}", rm=True)
-        for v in VERSIONS:
-            try: client.containers.get(f"my-{v}-container").remove(force=True)
-            except: pass
+        client = get_docker()
+        name = container_name(new_v)
+        if container_running(client, name):
+            log_audit("SİSTEM (AI)", "SICAK_YEDEK", f"{new_v.upper()} hazırda bekliyordu, build atlandı.")
+        else:
+            job.progress("build")
+            image = image_cache.ensure(client, new_v, f"{SERVICES_DIR}/{new_v}")
+            job.progress("run")
+            start_container(client, image, name, new_port)
+            container_cache.invalidate(name)
 
-        client.containers.run(f"service-{new_v}", detach=True, ports={'80/tcp': new_port}, name=f"my-{new_v}-container")
-        REGISTERED_SERVICES["Ana Servis"] = f"http://localhost:{new_port}/health"
-        CONTAINER_MAP["Ana Servis"] = f"my-{new_v}-container"
+        job.progress("switch")
+        previous = traffic.weights()
+        # Süren bir canary varsa failover kazanır; trafik doğrudan yeni sürüme geçer
+        if canary is not None: canary.abort(f"failover: {new_v.upper()} sürümüne geçiliyor")
+        route_to(new_v)
         last_switch_time = time.time()
-        system_status_msg = f"BAŞARILI: {new_v.upper()} Aktif"
+        if cluster is not None:
+            get_writer().call(lambda conn: cluster.record_switch(conn, new_v, last_switch_time))
+        set_status(f"BAŞARILI: {new_v.upper()} Aktif")
+
+        job.progress("remove")
+        standby_v = next_version(new_v) if WARM_STANDBY else None
+        for v in VERSIONS:
+            if v in (new_v, standby_v): continue
+            # Proxy üzerinden süren istekler bitmeden eski konteyner kaldırılmaz
+            if v in previous: proxy.wait_idle(v, PROXY_DRAIN_TIMEOUT)
+            expect_event(container_name(v))
+            container_cache.invalidate(container_name(v))
+            try: client.containers.get(container_name(v)).remove(force=True)
+            except: swallowed("remove_container")
+        if standby_v and standby_v != new_v:
+            prepare_standby(job, client, standby_v)
         send_email_notification("OTONOM KURTARMA", f"Sistem {new_v} sürümüne başarıyla taşındı.")
     except Exception as e:
-        system_status_msg = f"Hata: {e}"
+        set_status(f"Hata: {e}")
         log_audit("SİSTEM (AI)", "HATA", f"Geçiş başarısız: {str(e)}")
+        raise
+
+def prepare_standby(job, client, v):
+    job.progress("standby")
+    try:
+        if not container_running(client, container_name(v)):
+            start_container(client, image_cache.ensure(client, v, f"{SERVICES_DIR}/{v}"), container_name(v), PORTS[v])
+    except Exception as e:
+        log_audit("SİSTEM (AI)", "HATA", f"Sıcak yedek hazırlanamadı ({v.upper()}): {e}")
+
+# --- CANARY ROLLOUT ---
+# Trafik aktif sürümden hedefe adım adım (varsayılan %25/%50/%100) kayar; her adımda iki sürümün
+# proxy yanıtları (upstream_stats pencereleri) karşılaştırılır. Adımlar ve bekleme süresi
+# CANARY_SPEC ile bir Service YAML'dan (ör. examples/api-canary.yaml) okunabilir.
+CANARY_SPEC = os.getenv("CANARY_SPEC", "")
+CANARY_TICK = 1
+canary = None
+
+def canary_policy():
+    if CANARY_SPEC:
+        from reconciler import load_spec_file
+        return CanaryPolicy.from_spec(load_spec_file(CANARY_SPEC)[0])
+    return CanaryPolicy()
+
+def canary_running():
+    return failover_jobs.busy("canary") or (canary is not None and canary.state == "running")
+
+def run_canary(job, baseline, target):
+    global canary
+    client = get_docker()
+    name = container_name(target)
+    # Hedef zaten çalışıyorsa (ör. sıcak yedek) build ve başlatma atlanır
+    if not container_running(client, name):
+        job.progress("build")
+        image = image_cache.ensure(client, target, f"{SERVICES_DIR}/{target}")
+        job.progress("run")
+        start_container(client, image, name, PORTS[target])
+        container_cache.invalidate(name)
+    job.progress("canary")
+    canary = CanaryRollout(traffic, baseline, target, upstream_stats.get, canary_policy(),
+                           on_decision=lambda action, detail: log_audit("SİSTEM (AI)", action, detail))
+    canary.start()
+    set_status(f"CANARY: {target.upper()} %{canary.percent}")
+    if not finish_canary(canary):
+        threading.Thread(target=canary_loop, args=(canary,), daemon=True, name="canary").start()
+
+def canary_loop(rollout):
+    while rollout.state == "running":
+        time.sleep(CANARY_TICK)
+        step_canary(rollout)
+
+def step_canary(rollout):
+    try:
+        percent = rollout.percent
+        rollout.evaluate()
+        if rollout.state == "running" and rollout.percent != percent:
+            set_status(f"CANARY: {rollout.target.upper()} %{rollout.percent}")
+        finish_canary(rollout)
+    except Exception: swallowed("canary")
+
+def finish_canary(rollout):
+    # Terfi: hedef aktif sürüm olur (probe'lar, kayıt ve çoklu worker durumu dahil)
+    global current_v_index, last_switch_time
+    if rollout.state == "promoted":
+        previous = current_v_index
+        route_to(rollout.target)
+        current_v_index = VERSIONS.index(rollout.target)
+        last_switch_time = time.time()
+        if cluster is not None:
+            get_writer().call(lambda conn: cluster.claim_failover(conn, previous, current_v_index, 0)
+                              and cluster.record_switch(conn, rollout.target, last_switch_time))
+        set_status(f"BAŞARILI: {rollout.target.upper()} Aktif (canary)")
+    elif rollout.state == "rolled_back":
+        set_status(f"CANARY GERİ ALINDI: {rollout.baseline.upper()} Aktif")
+    return rollout.state != "running"
 
 # --- MONITOR ---
+def evaluate_probe(name, is_alive, latency):
+    stats = service_stats.get(name)
+    stats.record(is_alive, latency)
+    reason = stats.verdict()
+    if reason is not None:
+        if reason == "LATENCY_SLO":
+            log_audit("SİSTEM (AI)", "SLO_İHLALİ", f"{name} p95 gecikmesi {stats.policy.latency_slo_ms} ms eşiğini aştı.")
+        if name == FAILOVER_SERVICE:
+            execute_smart_failover()
+        else:
+            log_audit("SİSTEM (AI)", "SERVİS_RESTART", f"{name} eşiği aştı ({reason}), konteyner yeniden başlatılıyor.")
+            request_restart(name)
+        stats.reset()
+    elif not is_alive:
+        request_restart(name)
+
+def request_restart(name):
+    # Probe sonucu (asyncio döngüsü) ve olay thread'i beklemez; restart arka planda yapılır
+    global restart_pool
+    if name not in CONTAINER_MAP: return None
+    with restart_lock:
+        if name in restarting: return None
+        restarting.add(name)
+        if restart_pool is None:
+            restart_pool = ThreadPoolExecutor(RESTART_WORKERS, thread_name_prefix="restart")
+    return restart_pool.submit(_restart_job, name)
+
+def _restart_job(name):
+    try: restart_container(name)
+    finally:
+        with restart_lock: restarting.discard(name)
+
+def restart_container(name):
+    if name not in CONTAINER_MAP: return
+    cname = CONTAINER_MAP[name]
+    try:
+        # Kendi başlattığımız restart'ın "die" olayı tekrar restart tetiklemesin
+        expect_event(cname)
+        container_cache.get(cname).restart()
+        RESTARTS.inc(name)
+    except:
+        container_cache.invalidate(cname)
+        swallowed("restart")
+
+def expect_event(cname):
+    if event_watcher is not None: event_watcher.expect(cname)
+
+def handle_container_event(name, kind, event):
+    # Konteyner öldü / OOM / unhealthy: FAIL_LIMIT kadar başarısız probe beklenmez
+    CONTAINER_EVENTS.inc(kind)
+    if event.get("timeNano"): EVENT_LAG.observe(max(0, time.time_ns() - event["timeNano"]) / 1e9)
+    # Her worker aynı olayı görür; yalnızca servisin sahibi (failover servisinde lider) davranır
+    if not owns(name): return
+    container_cache.invalidate(CONTAINER_MAP.get(name))
+    log_audit("SİSTEM (AI)", "KONTEYNER_OLAYI", f"{name}: {kind}")
+    if name == FAILOVER_SERVICE:
+        execute_smart_failover()
+        service_stats.get(name).reset()
+    else:
+        request_restart(name)
+
+def start_event_watcher(source=None):
+    global event_watcher
+    if event_watcher is None:
+        event_watcher = EventWatcher(source or docker_source(get_docker), lambda: CONTAINER_MAP,
+                                     handle_container_event)
+    return event_watcher.start()
+
 def monitor_loop():
-    global failure_log
-    while True:
+    global monitor_engine
+    writer = get_writer()
+
+    def on_result(name, url, is_alive, msg, latency):
+        PROBE_LATENCY.observe(latency / 1000, name)
+        with MONITOR_TICK.time():
+            handle_result(name, is_alive, latency)
+
+    def handle_result(name, is_alive, latency):
         try:
-            conn = get_db()
-            cursor = conn.cursor()
-            for name, url in list(REGISTERED_SERVICES.items()):
-                start_t = time.time()
-                is_alive, _ = check_service_health(url)
-                latency = round((time.time() - start_t) * 1000, 2)
-                
-                if not is_alive:
-                    failure_log.append(time.time())
-                    failure_log = [t for t in failure_log if t > time.time() - 10]
-                    if len(failure_log) >= FAIL_LIMIT:
-                        execute_smart_failover()
-                        failure_log = []
-                    else:
-                        try: client.containers.get(CONTAINER_MAP[name]).restart()
-                        except: pass
-                
-                cursor.execute("INSERT INTO health_logs (timestamp, service, status, latency) VALUES (?, ?, ?, ?)",
-                               (datetime.now().strftime("%H:%M:%S"), name, "AKTİF" if is_alive else "KAPALI", latency))
-            conn.commit(); conn.close()
+            evaluate_probe(name, is_alive, latency)
+            now = time.time()
+            stamp, status = datetime.fromtimestamp(now).strftime("%H:%M:%S"), "AKTİF" if is_alive else "KAPALI"
+            rollups.add(name, now, is_alive, latency)
+            live.add_health(stamp, name, status, latency)
+            writer.submit("INSERT INTO health_logs (timestamp, ts, service, status, latency, worker) VALUES (?, ?, ?, ?, ?, ?)",
+                          (stamp, int(now), name, status, latency, WORKER_ID))
         except Exception as e:
             log_audit("SİSTEM (AI)", "RESTART_HATA", str(e))
 
-@app.on_event("startup")
+    def on_breaker(name, old, new):
+        log_audit("SİSTEM (AI)", "DEVRE_KESİCİ", f"{name}: {old} -> {new}")
+
+    if DOCKER_EVENTS: start_event_watcher()
+    # Yerleşik kontrol kullanılıyorsa ortak keep-alive havuzu devreye girer,
+    # `monitor` modülünden gelen özel kontrol ise aynen çağrılır.
+    hook = None if check_service_health is _builtin_check else check_service_health
+    monitor_engine = ProbeEngine(lambda: REGISTERED_SERVICES, on_result, probe=hook,
+                                 schedules=SERVICE_SCHEDULES, default_schedule=DEFAULT_SCHEDULE,
+                                 max_concurrency=PROBE_CONCURRENCY, transport=PROBE_TRANSPORT, on_error=lambda e: swallowed("probe_result"),
+                                 adaptive=PROBE_ADAPTIVE, breaker_threshold=PROBE_BREAKER_THRESHOLD,
+                                 breaker_open=PROBE_BREAKER_OPEN, on_breaker=on_breaker, owns=owns,
+                                 breaker_exempt={FAILOVER_SERVICE})
+    asyncio.run(monitor_engine.run())
+
+# --- RECONCILER ---
+# Virgülle ayrılmış Service YAML yolları (ör. examples/api-v1.yaml); boşsa reconciler çalışmaz
+RECONCILE_SPECS = os.getenv("RECONCILE_SPECS", "")
+RECONCILE_TICK = 1
+reconciler = None
+
+def reconcile_loop():
+    global reconciler
+    while True:
+        # Konteyner yaratıp silen tek worker lider olandır; liderlik el değiştirince yeni lider sahiplenir
+        if not is_leader():
+            time.sleep(RECONCILE_TICK)
+            continue
+        try:
+            from reconciler import DockerRuntime, Reconciler, load_spec_file
+            runtime = DockerRuntime(get_docker())
+            reconciler = Reconciler(runtime)
+            # Önceki süreçten kalan konteynerler yeniden yaratılmaz, sahiplenilir
+            runtime.adopt()
+            for path in RECONCILE_SPECS.split(","):
+                for spec in load_spec_file(path.strip()):
+                    reconciler.apply(spec)
+        except Exception as e:
+            # Thread ölmez: Docker ya da spec dosyası düzelince kurulum yeniden denenir
+            log_audit("SİSTEM (AI)", "RECONCILE_HATA", f"Başlatılamadı: {e}")
+            time.sleep(RECONCILE_TICK * 10)
+            continue
+        while is_leader():
+            try:
+                runtime.poll()
+                reconciler.tick()
+            except Exception as e: log_audit("SİSTEM (AI)", "RECONCILE_HATA", str(e))
+            time.sleep(RECONCILE_TICK)
+
+# --- DURUM ANLIK GÖRÜNTÜSÜ ---
+# Yeniden başlatmada monitör v1'e değil, en son aktif sürüme dönük açılır. Çoklu worker'da
+# kaydı yalnızca lider yazar; sürüm bilgisinde failover_state tablosu önceliklidir (start_cluster).
+STATE_SNAPSHOT_INTERVAL = 2
+
+def active_version():
+    return next((v for v in VERSIONS if container_name(v) == CONTAINER_MAP.get(FAILOVER_SERVICE)), VERSIONS[current_v_index])
+
+def collect_state():
+    if not is_leader(): return None
+    return {"current_v_index": current_v_index, "active_version": active_version(), "last_switch_time": last_switch_time,
+            "system_status_msg": system_status_msg, "stats": service_stats.dump()}
+
+def restore_state(state):
+    global current_v_index, last_switch_time, system_status_msg
+    current_v_index = state["current_v_index"] % len(VERSIONS)
+    last_switch_time = state["last_switch_time"]
+    system_status_msg = state["system_status_msg"]
+    route_to(state.get("active_version") or VERSIONS[current_v_index])
+    service_stats.load(state.get("stats") or {})
+
+state_snapshot = StateSnapshot(collect_state, STATE_SNAPSHOT_INTERVAL)
+
 def startup():
     init_db()
+    conn = get_db()
+    try:
+        state = storage.load_snapshot(conn)
+        if state is not None: restore_state(state)
+        live.load(conn)
+    finally: conn.close()
+    get_writer().call(service_registry.load)
+    get_writer().start()
+    if SENDER_EMAIL and RECEIVER_EMAIL: get_outbox().start()
+    # Sıcak yedek lider olunca (cluster_tick) hazırlanır
+    if MONITOR_CLUSTER: start_cluster()
+    elif WARM_STANDBY: submit_standby()
     threading.Thread(target=monitor_loop, daemon=True).start()
+    if RECONCILE_SPECS:
+        threading.Thread(target=reconcile_loop, daemon=True).start()
 
-# --- DASHBOARD ---
-@app.get("/", response_class=HTMLResponse)
-def get_dashboard(username: str = Depends(get_current_username)):
+def submit_standby():
+    standby_v = next_version(VERSIONS[current_v_index])
+    failover_jobs.submit("standby", lambda job: prepare_standby(job, get_docker(), standby_v))
+
+def shutdown():
+    if monitor_engine is not None: monitor_engine.stop()
+    if event_watcher is not None: event_watcher.stop()
+    if restart_pool is not None: restart_pool.shutdown(wait=False)
+    if cluster is not None:
+        cluster_stop.set()
+        try: get_writer().call(cluster.resign)
+        except Exception: swallowed("cluster")
+    # Kuyrukta bekleyen satırlar ve son durum kapanmadan önce diske yazılır
+    if db_writer is not None:
+        try: db_writer.call(state_snapshot.save)
+        except Exception: swallowed("state_snapshot")
+        db_writer.stop()
+    if outbox is not None: outbox.stop()
+
+async def close_proxy():
+    await proxy.aclose()
+
+def create_app():
+    """Uygulamayı kurar. Docker, mail ve DB ilk kullanımda açılır; import ya da
+    kurulum sırasında hiçbiri başlatılmaz."""
+    application = FastAPI(title="Güvenli Otonom Sistem vFinal")
+    application.include_router(router)
+    application.on_event("startup")(startup)
+    application.on_event("shutdown")(shutdown)
+    application.on_event("shutdown")(close_proxy)
+    return application
+
+def __getattr__(name):
+    # `uvicorn main:app` ve `main.app` ilk erişimde tek bir uygulama kurar
+    if name == "app":
+        application = globals()["app"] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@router.get("/stats/db")
+def db_stats(username: str = Depends(get_current_username)):
+    return get_writer().snapshot()
+
+@router.get("/metrics")
+def get_metrics():
+    # Prometheus metin formatı; controller'daki /metrics gibi kimlik doğrulamasız
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/reconciler")
+def reconciler_state(username: str = Depends(get_current_username)):
+    if reconciler is None: return {"enabled": False}
+    return {"enabled": True, "services": reconciler.summary(), "stats": reconciler.stats}
+
+@router.get("/jobs")
+def list_jobs(username: str = Depends(get_current_username)):
+    return {"jobs": failover_jobs.recent(), "images": {"builds": image_cache.builds, "hits": image_cache.hits}}
+
+@router.get("/stats/services")
+def services_stats(username: str = Depends(get_current_username)):
+    return service_stats.snapshot()
+
+@router.get("/stats/probes")
+def probe_stats(username: str = Depends(get_current_username)):
+    # Servis başına devre kesici durumu ve uyarlanan zaman aşımı / hedge eşiği
+    if monitor_engine is None: return {"engine": None, "services": {}}
+    return {"engine": dict(monitor_engine.stats), "services": monitor_engine.snapshot()}
+
+@router.get("/cluster")
+def cluster_state(username: str = Depends(get_current_username)):
+    if cluster is None: return {"enabled": False}
+    return dict(cluster.snapshot(), enabled=True, owned=sorted(n for n in REGISTERED_SERVICES if cluster.owns(n)),
+                state=get_writer().call(cluster.load_state))
+
+@router.get("/stats/docker")
+def docker_stats(username: str = Depends(get_current_username)):
+    return {"events": event_watcher.stats if event_watcher else None,
+            "containers": {"cached": len(container_cache.items), "hits": container_cache.hits,
+                           "misses": container_cache.misses}}
+
+@router.get("/stats/mail")
+def mail_stats(username: str = Depends(get_current_username)):
+    return get_outbox().snapshot()
+
+# --- SERVİS KAYDI ---
+class ServiceIn(BaseModel):
+    url: str
+    container: str | None = None
+    interval: float | None = None
+    timeout: float | None = None
+    jitter: float | None = None
+    fail_limit: int | None = None
+    window: float | None = None
+    latency_slo_ms: float | None = None
+
+class ServiceUpdate(ServiceIn):
+    url: str | None = None
+
+def registry_changed(name):
+    service_stats.forget(name)
+    if monitor_engine is not None: monitor_engine.notify()
+
+@router.get("/services")
+def list_services(username: str = Depends(get_current_username)):
+    return [service_registry.describe(name) for name in list(REGISTERED_SERVICES)]
+
+@router.post("/services/{name}", status_code=201)
+def register_service(name: str, body: ServiceIn, username: str = Depends(get_current_username)):
+    if name in REGISTERED_SERVICES:
+        raise HTTPException(status_code=409, detail="Servis zaten kayıtlı")
+    get_writer().call(lambda conn: service_registry.register(conn, name, body.model_dump()))
+    registry_changed(name)
+    log_audit(username, "SERVİS_EKLE", f"{name} -> {body.url}")
+    return service_registry.describe(name)
+
+@router.put("/services/{name}")
+def update_service(name: str, body: ServiceUpdate, username: str = Depends(get_current_username)):
+    if name not in REGISTERED_SERVICES:
+        raise HTTPException(status_code=404, detail="Servis bulunamadı")
+    get_writer().call(lambda conn: service_registry.update(conn, name, body.model_dump()))
+    registry_changed(name)
+    log_audit(username, "SERVİS_GÜNCELLE", name)
+    return service_registry.describe(name)
+
+@router.delete("/services/{name}")
+def deregister_service(name: str, username: str = Depends(get_current_username)):
+    if name not in REGISTERED_SERVICES:
+        raise HTTPException(status_code=404, detail="Servis bulunamadı")
+    if name == FAILOVER_SERVICE:
+        raise HTTPException(status_code=400, detail="Failover servisi silinemez")
+    get_writer().call(lambda conn: service_registry.deregister(conn, name))
+    registry_changed(name)
+    log_audit(username, "SERVİS_SİL", name)
+    return {"deleted": name}
+
+# --- TRAFİK YÖNLENDİRME ---
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+
+@router.api_route("/proxy/{path:path}", methods=PROXY_METHODS)
+async def proxy_traffic(path: str, request: Request):
+    # Veri düzlemi: servislerin kendisi gibi kimlik doğrulaması istemez
+    return await proxy.handle(request, path)
+
+@router.get("/traffic")
+def get_traffic(username: str = Depends(get_current_username)):
+    return dict(proxy.snapshot(), versions=upstream_stats.snapshot())
+
+@router.put("/traffic")
+def set_traffic(weights: dict[str, int], username: str = Depends(get_current_username)):
+    if canary_running():
+        raise HTTPException(status_code=409, detail="Canary sürerken ağırlıklar elle değiştirilemez")
+    unknown = set(weights) - set(VERSIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Bilinmeyen sürüm: {', '.join(sorted(unknown))}")
+    try: traffic.set(weights)
+    except ValueError as e: raise HTTPException(status_code=400, detail=str(e))
+    log_audit(username, "TRAFİK", ", ".join(f"{v}={w}" for v, w in traffic.weights().items()))
+    return traffic.weights()
+
+@router.post("/canary/{version}", status_code=202)
+def start_canary(version: str, username: str = Depends(get_current_username)):
+    if version not in VERSIONS:
+        raise HTTPException(status_code=400, detail=f"Bilinmeyen sürüm: {version}")
+    baseline = active_version()
+    if version == baseline:
+        raise HTTPException(status_code=400, detail="Hedef sürüm zaten aktif")
+    if not is_leader():
+        raise HTTPException(status_code=409, detail="Rollout'u yalnızca lider worker yürütür")
+    if canary_running() or failover_jobs.busy("failover"):
+        raise HTTPException(status_code=409, detail="Süren bir rollout ya da failover var")
+    job = failover_jobs.submit("canary", lambda job: run_canary(job, baseline, version))
+    log_audit(username, "CANARY", f"{baseline.upper()} -> {version.upper()} rollout başlatıldı.")
+    return {"job": job.id if job else None, "baseline": baseline, "target": version}
+
+@router.get("/canary")
+def canary_state(username: str = Depends(get_current_username)):
+    if canary is None: return {"state": None}
+    return dict(canary.snapshot(), versions={v: upstream_stats.get(v).snapshot() for v in (canary.baseline, canary.target)})
+
+@router.delete("/canary")
+def abort_canary(username: str = Depends(get_current_username)):
+    if canary is None or canary.state != "running":
+        raise HTTPException(status_code=404, detail="Süren bir canary yok")
+    canary.rollback(f"{username} tarafından elle geri alındı")
+    finish_canary(canary)
+    return canary.snapshot()
+
+# --- ROLLUP SORGUSU ---
+@router.get("/api/rollups")
+def get_rollups(service: str = "Ana Servis", hours: float = 24, username: str = Depends(get_current_username)):
+    until = int(time.time())
     conn = get_db()
-    logs = conn.execute("SELECT * FROM health_logs ORDER BY id DESC LIMIT 10").fetchall()
-    audit = conn.execute("SELECT * FROM audit_logs ORDER BY id DESC LIMIT 5").fetchall()
-    conn.close()
-    
-    labels_json = json.dumps([l[1] for l in reversed(logs)])
-    data_json = json.dumps([l[4] for l in reversed(logs)])
+    try: return storage.query_rollups(conn, service, until - int(hours * 3600), until)
+    finally: conn.close()
+
+# --- GRAFİK VERİSİ ---
+# Tarayıcıya ham örnekler değil, şekli koruyan birkaç yüz nokta gönderilir
+CHART_POINTS = 300
+CHART_POINTS_MAX = 2000
+chart_cache = ChartCache()
+
+@router.get("/api/chart")
+def chart_data(service: str = FAILOVER_SERVICE, hours: float = 1, since: float | None = None, until: float | None = None,
+               points: int = CHART_POINTS, method: str = "lttb", username: str = Depends(get_current_username)):
+    if method not in chart.METHODS:
+        raise HTTPException(status_code=400, detail="Yöntem: lttb | minmax")
+    now = time.time()
+    until = now if until is None else until
+    since = until - hours * 3600 if since is None else since
+    if since >= until:
+        raise HTTPException(status_code=400, detail="Geçersiz zaman aralığı")
+    points = max(3, min(points, CHART_POINTS_MAX))
+    since, until, step = chart.quantize(since, until, points)
+    source = chart.pick_source(since, now, RETENTION_RAW_HOURS * 3600, RETENTION_MINUTE_DAYS * 86400)
+
+    def compute():
+        conn = get_db()
+        try: return chart.downsample(chart.read_points(conn, source, service, since, until, method), points, since, until, method)
+        finally: conn.close()
+
+    # Aralık kova genişliğine hizalı olduğundan en fazla bir kova süresince aynı sonuç döner
+    series, cached = chart_cache.get((service, since, until, points, method), step, compute)
+    return {"service": service, "since": since, "until": until, "step": step, "source": source, "method": method,
+            "cached": cached, "points": series}
+
+# --- DIŞA AKTARMA ---
+# health_logs / audit_logs: servis ve zaman aralığı (epoch sn) filtresiyle akış halinde
+EXPORT_BATCH = 1000
+PAGE_LIMIT_MAX = 1000
+
+def check_kind(kind):
+    if kind not in export.TABLES:
+        raise HTTPException(status_code=404, detail="Tablo: health | audit")
+
+@router.get("/export/{kind}")
+def export_logs(kind: str, format: str = "ndjson", service: str | None = None, since: float | None = None,
+                until: float | None = None, gzip: bool = False, username: str = Depends(get_current_username)):
+    check_kind(kind)
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="Biçim: ndjson | csv")
+    filename = f"{kind}_logs.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else export.FORMATS[format]
+    log_audit(username, "DIŞA_AKTAR", f"{filename} service={service or '*'} since={since} until={until}")
+    # Senkron üreteç thread havuzunda ilerletilir; bağlantı akış bitince üreteç içinde kapanır
+    return StreamingResponse(export.export_stream(get_db(), kind, format, service, since, until, gzip, EXPORT_BATCH),
+                             media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@router.get("/api/logs/{kind}")
+def query_logs(kind: str, service: str | None = None, since: float | None = None, until: float | None = None,
+               cursor: str | None = None, limit: int = 100, username: str = Depends(get_current_username)):
+    check_kind(kind)
+    conn = get_db()
+    try: return export.query_page(conn, kind, service, since, until, cursor, max(1, min(limit, PAGE_LIMIT_MAX)))
+    except ValueError: raise HTTPException(status_code=400, detail="Geçersiz cursor")
+    finally: conn.close()
+
+# --- DASHBOARD ---
+@router.get("/", response_class=HTMLResponse)
+def get_dashboard(request: Request, username: str = Depends(get_current_username)):
+    # Değişiklik yoksa önbellekteki sayfa döner; tarayıcı aynı ETag'i gönderirse 304
+    key = (live.version, current_v_index, system_status_msg, tuple(REGISTERED_SERVICES))
+    body, etag, last_modified = dashboard_cache.get(key, timed_render)
+    headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+    if not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+# --- CANLI GÜNCELLEMELER (SSE) ---
+SSE_HEARTBEAT = 15
+
+@router.get("/events")
+async def stream_events(request: Request, username: str = Depends(get_current_username)):
+    q = events.subscribe()
+
+    async def stream():
+        try:
+            # Bağlanan istemci önce güncel sürüm/durum bilgisini alır, sonra yalnızca farkları
+            yield format_sse("status", {"version": VERSIONS[current_v_index].upper(), "message": system_status_msg})
+            while not await request.is_disconnected():
+                try: yield await asyncio.wait_for(q.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError: yield ": ping\n\n"
+        finally:
+            events.unsubscribe(q)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def timed_render():
+    with DASHBOARD_RENDER.time():
+        return render_dashboard()
+
+def script_json(value):
+    # Satır içi <script> için JSON: kayıtlı bir servis adındaki "</script>" betikten kaçamaz
+    return json.dumps(value).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+def render_dashboard():
+    logs = live.recent_health()
+    audit = live.recent_audit()
+    esc = lambda v: html.escape(str(v))
+
+    labels_json = script_json([l[1] for l in reversed(logs)])
+    data_json = script_json([l[4] for l in reversed(logs)])
     
-    rows = "".join([f"<tr style='border-bottom:1px solid #334155;'><td>{l[1]}</td><td><b style='color:{'#4ade80' if l[3]=='AKTİF' else '#f87171'}'>{l[3]}</b></td><td>{l[4]} ms</td></tr>" for l in logs])
-    audit_rows = "".join([f"<tr style='border-bottom:1px solid #334155; font-size:0.9em;'><td style='color:#94a3b8'>{a[1]}</td><td style='color:#60a5fa'>{a[2]}</td><td style='color:#facc15'>{a[3]}</td><td>{a[4]}</td></tr>" for a in audit])
+    rows = "".join([f"<tr style='border-bottom:1px solid #334155;'><td>{esc(l[1])}</td><td><b style='color:{'#4ade80' if l[3]=='AKTİF' else '#f87171'}'>{esc(l[3])}</b></td><td>{esc(l[4])} ms</td></tr>" for l in logs])
+    audit_rows = "".join([f"<tr style='border-bottom:1px solid #334155; font-size:0.9em;'><td style='color:#94a3b8'>{esc(a[1])}</td><td style='color:#60a5fa'>{esc(a[2])}</td><td style='color:#facc15'>{esc(a[3])}</td><td>{esc(a[4])}</td></tr>" for a in audit])
     ver = VERSIONS[current_v_index].upper()
     
     return f"""
@@ -207,18 +988,29 @@ def get_dashboard(username: str = Depends(get_current_username)):
         <div class="container">
             <div class="d-flex justify-content-between align-items-center mb-4">
                 <h2>🛡️ GÜVENLİ OTONOM SİSTEM <span class="badge bg-secondary fs-6">v9.0</span></h2>
-                <div><span class="badge bg-primary">SÜRÜM: {ver}</span> <span class="badge bg-info">{system_status_msg}</span></div>
+                <div><span id="ver" class="badge bg-primary">SÜRÜM: {ver}</span> <span id="status" class="badge bg-info">{esc(system_status_msg)}</span></div>
             </div>
 
             <div class="row">
                 <div class="col-md-8">
                     <div class="card-dark">
-                        <h5>📈 Gecikme Analizi (ms)</h5>
+                        <div class="d-flex justify-content-between align-items-center">
+                            <h5>📈 Gecikme Analizi (ms)</h5>
+                            <div class="d-flex gap-2 mb-2">
+                                <select id="chartService" class="form-select form-select-sm bg-dark text-light"></select>
+                                <div class="btn-group btn-group-sm" id="ranges">
+                                    <button class="btn btn-outline-info active" data-hours="0">Canlı</button>
+                                    <button class="btn btn-outline-info" data-hours="1">1 sa</button>
+                                    <button class="btn btn-outline-info" data-hours="24">24 sa</button>
+                                    <button class="btn btn-outline-info" data-hours="168">7 gün</button>
+                                </div>
+                            </div>
+                        </div>
                         <canvas id="myChart" height="100"></canvas>
                     </div>
                     <div class="card-dark">
                         <h5 style="color:#facc15">🔒 Denetim Günlüğü (Audit Log)</h5>
-                        <table><thead><tr><th>Saat</th><th>Kullanıcı</th><th>İşlem</th><th>Detay</th></tr></thead><tbody>{audit_rows}</tbody></table>
+                        <table><thead><tr><th>Saat</th><th>Kullanıcı</th><th>İşlem</th><th>Detay</th></tr></thead><tbody id="audit">{audit_rows}</tbody></table>
                     </div>
                 </div>
 
@@ -234,55 +1026,124 @@ def get_dashboard(username: str = Depends(get_current_username)):
                     </div>
                     <div class="card-dark">
                         <h5>📋 Sağlık Durumu</h5>
-                        <table><thead><tr><th>Saat</th><th>Durum</th><th>ms</th></tr></thead><tbody>{rows}</tbody></table>
+                        <table><thead><tr><th>Saat</th><th>Durum</th><th>ms</th></tr></thead><tbody id="health">{rows}</tbody></table>
                     </div>
                 </div>
             </div>
         </div>
         <script>
-            new Chart(document.getElementById('myChart'), {{
+            const chart = new Chart(document.getElementById('myChart'), {{
                 type: 'line',
                 data: {{ labels: {labels_json}, datasets: [{{ label: 'Gecikme', data: {data_json}, borderColor: '#22d3ee', borderWidth: 2, tension: 0.3 }}] }},
                 options: {{ animation: false, scales: {{ y: {{ beginAtZero: true, grid: {{ color: '#334155' }} }}, x: {{ display: false }} }} }}
             }});
-            setTimeout(() => {{ window.location.reload(); }}, 3000);
+            // Aralık seçilince sunucudan örneği azaltılmış seri çekilir; "Canlı" modda SSE noktaları eklenir
+            let liveMode = true;
+            const liveData = {{ labels: [...chart.data.labels], data: [...chart.data.datasets[0].data] }};
+            const serviceSelect = document.getElementById('chartService');
+            for (const name of {script_json(list(REGISTERED_SERVICES))}) {{
+                const opt = document.createElement('option');
+                opt.value = opt.textContent = name;
+                serviceSelect.appendChild(opt);
+            }}
+            function setSeries(labels, data) {{
+                chart.data.labels = labels; chart.data.datasets[0].data = data;
+                chart.update('none');
+            }}
+            async function loadRange(hours) {{
+                liveMode = hours === 0;
+                if (liveMode) return setSeries([...liveData.labels], [...liveData.data]);
+                const q = new URLSearchParams({{ service: serviceSelect.value, hours: hours, points: {CHART_POINTS} }});
+                const r = await fetch('/api/chart?' + q);
+                if (!r.ok) return;
+                const body = await r.json();
+                const fmt = hours > 24 ? (t) => new Date(t * 1000).toLocaleString() : (t) => new Date(t * 1000).toLocaleTimeString();
+                setSeries(body.points.map((p) => fmt(p[0])), body.points.map((p) => p[1]));
+            }}
+            let activeHours = 0;
+            for (const btn of document.querySelectorAll('#ranges button')) {{
+                btn.addEventListener('click', () => {{
+                    document.querySelectorAll('#ranges button').forEach((b) => b.classList.remove('active'));
+                    btn.classList.add('active');
+                    activeHours = Number(btn.dataset.hours);
+                    loadRange(activeHours);
+                }});
+            }}
+            serviceSelect.addEventListener('change', () => loadRange(activeHours));
+            // Tam sayfa yenileme yerine sunucunun gönderdiği farklar uygulanır
+            function addRow(tbody, cells, limit, style) {{
+                const tr = document.createElement('tr');
+                tr.style.cssText = style;
+                for (const [text, css, bold] of cells) {{
+                    const td = document.createElement('td');
+                    const el = bold ? td.appendChild(document.createElement('b')) : td;
+                    el.textContent = text;
+                    if (css) el.style.cssText = css;
+                    tr.appendChild(td);
+                }}
+                tbody.prepend(tr);
+                while (tbody.rows.length > limit) tbody.deleteRow(-1);
+            }}
+            if (window.EventSource) {{
+                const es = new EventSource('/events');
+                es.addEventListener('health', (e) => {{
+                    const h = JSON.parse(e.data);
+                    liveData.labels.push(h.timestamp); liveData.data.push(h.latency);
+                    if (liveData.data.length > {live.health_size}) {{ liveData.labels.shift(); liveData.data.shift(); }}
+                    if (liveMode) setSeries([...liveData.labels], [...liveData.data]);
+                    addRow(document.getElementById('health'), [[h.timestamp], [h.status, 'color:' + (h.status === 'AKTİF' ? '#4ade80' : '#f87171'), true], [h.latency + ' ms']],
+                           {live.health_size}, 'border-bottom:1px solid #334155;');
+                }});
+                es.addEventListener('audit', (e) => {{
+                    const a = JSON.parse(e.data);
+                    addRow(document.getElementById('audit'), [[a.timestamp, 'color:#94a3b8'], [a.user, 'color:#60a5fa'], [a.action, 'color:#facc15'], [a.detail]],
+                           {live.audit_size}, 'border-bottom:1px solid #334155; font-size:0.9em;');
+                }});
+                es.addEventListener('status', (e) => {{
+                    const st = JSON.parse(e.data);
+                    document.getElementById('ver').textContent = 'SÜRÜM: ' + st.version;
+                    document.getElementById('status').textContent = st.message;
+                }});
+            }} else {{
+                setTimeout(() => {{ window.location.reload(); }}, 3000);
+            }}
         </script>
     </body>
     </html>
     """
 
 # --- KAOS ENDPOINTLERİ ---
-@app.get("/chaos/cpu")
+@router.get("/chaos/cpu")
 def chaos_cpu(username: str = Depends(get_current_username)):
     log_audit(username, "KAOS", "CPU yüklemesi başlatıldı.")
     import requests
     try: requests.post(REGISTERED_SERVICES["Ana Servis"].replace("/health", "") + "/simulate/cpu/100", timeout=1)
-    except: pass
+    except: swallowed("chaos_cpu")
     return HTMLResponse("<h1>🐌 YÜK BİNDİRİLDİ!</h1><script>setTimeout(()=>window.location.href='/', 1000);</script>")
 
-@app.get("/chaos/corruption")
+@router.get("/chaos/corruption")
 def chaos_corr(username: str = Depends(get_current_username)):
     log_audit(username, "KAOS", "Veri bozulması simüle edildi.")
     import requests
     try: requests.post(REGISTERED_SERVICES["Ana Servis"].replace("/health", "") + "/simulate/corruption", timeout=1)
-    except: pass
+    except: swallowed("chaos_corruption")
     return HTMLResponse("<h1>💀 VERİ BOZULDU!</h1><script>setTimeout(()=>window.location.href='/', 1000);</script>")
 
-@app.get("/chaos/reset")
+@router.get("/chaos/reset")
 def chaos_reset(username: str = Depends(get_current_username)):
     log_audit(username, "RESET", "Simülasyon sıfırlandı.")
     import requests
     try: requests.post(REGISTERED_SERVICES["Ana Servis"].replace("/health", "") + "/simulate/reset", timeout=1)
-    except: pass
+    except: swallowed("chaos_reset")
     return HTMLResponse("<h1>♻️ SIFIRLANDI!</h1><script>setTimeout(()=>window.location.href='/', 1000);</script>")
 
-@app.get("/crash")
+@router.get("/crash")
 def crash_sim(username: str = Depends(get_current_username)):
     log_audit(username, "SABOTAJ", "Manuel çökertme yapıldı.")
     try:
-        client = docker.from_env()
-        global failure_log
-        for _ in range(6): failure_log.append(time.time())
+        client = get_docker()
+        stats = service_stats.get("Ana Servis")
+        for _ in range(stats.policy.fail_limit + 1): stats.record(False, 0)
         for c in client.containers.list():
             if "my-v" in c.name: c.stop()
         return HTMLResponse("<h1 style='color:red;text-align:center;margin-top:20%'>🔥 SİSTEM ÇÖKERTİLDİ!</h1><script>setTimeout(()=>window.location.href='/', 2000);</script>")
@@ -0,0 +1,164 @@
+import threading
+import time
+from datetime import datetime
+
+import storage
+
+
+# --- BİLDİRİM KUTUSU (OUTBOX) ---
+class Outbox:
+    """Bildirimleri önce `mail_outbox` tablosuna yazar, arka plandaki gönderici
+    bunları tek ve açık tutulan bir SMTP oturumu üzerinden yollar.
+
+    `window` saniye içinde biriken olaylar tek bir özet maile birleştirilir.
+    Başarısız gönderimler üstel geri çekilmeyle (backoff) yeniden denenir;
+    `max_attempts` sonrası satır `failed` olarak işaretlenir. Satırlar diskte
+    durduğu için yeniden başlatmada bekleyen bildirimler kaybolmaz.
+
+    smtplib ve email MIME modülleri ilk gönderimde yüklenir; mail hiç
+    kullanılmıyorsa açılış süresine eklenmez.
+    """
+
+    def __init__(self, db_name, sender, receiver, host="smtp.gmail.com", port=587, starttls=True, password=None,
+                 window=10, max_attempts=5, backoff=2, max_backoff=300, idle_timeout=60, smtp_factory=None):
+        self.conn = storage.connect(db_name)
+        self.lock = threading.Lock()
+        self.sender, self.receiver, self.password = sender, receiver, password
+        self.host, self.port, self.starttls = host, port, starttls
+        self.window = window
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.smtp_factory = smtp_factory
+        self.smtp = None
+        self.last_used = 0
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+        self.stats = {"queued": 0, "mails": 0, "events_sent": 0, "retries": 0, "failed": 0, "connects": 0}
+
+    def enqueue(self, subject, text, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.conn.execute("INSERT INTO mail_outbox (created_ts, subject, body, state, attempts, next_attempt_ts) "
+                              "VALUES (?, ?, ?, 'pending', 0, ?)", (now, subject, text, now))
+            self.conn.commit()
+        self.stats["queued"] += 1
+        self.wake.set()
+
+    # --- SMTP OTURUMU ---
+    def _session(self, now):
+        if self.smtp is not None and now - self.last_used > self.idle_timeout:
+            self._close()
+        if self.smtp is None:
+            if self.smtp_factory is None:
+                import smtplib
+                self.smtp_factory = smtplib.SMTP
+            smtp = self.smtp_factory(self.host, self.port, timeout=10)
+            if self.starttls:
+                smtp.starttls()
+            if self.password:
+                smtp.login(self.sender, self.password)
+            self.smtp = smtp
+            self.stats["connects"] += 1
+        return self.smtp
+
+    def _close(self):
+        if self.smtp is not None:
+            try: self.smtp.quit()
+            except Exception: pass
+            self.smtp = None
+
+    def _send(self, msg, now):
+        import smtplib
+        try:
+            self._session(now).sendmail(self.sender, self.receiver, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # Sunucu boştaki oturumu kapatmış olabilir: bir kez yeniden bağlan
+            self._close()
+            self._session(now).sendmail(self.sender, self.receiver, msg.as_string())
+        self.last_used = now
+
+    def build_message(self, rows):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = self.receiver
+        if len(rows) == 1:
+            msg['Subject'] = f"GÜVENLİK UYARISI: {rows[0][2]}"
+            body = rows[0][3]
+        else:
+            msg['Subject'] = f"GÜVENLİK UYARISI: {len(rows)} olay ({rows[0][2]})"
+            body = "".join(f"<p><b>{datetime.fromtimestamp(r[1]).strftime('%H:%M:%S')} - {r[2]}</b><br>{r[3]}</p>"
+                           for r in rows)
+        msg.attach(MIMEText(body, 'html'))
+        return msg
+
+    # --- GÖNDERİM ---
+    def pump(self, now=None):
+        """Gönderime hazır olayları tek özet mail olarak yollar. Bir sonraki
+        uyanma zamanını (ya da bekleyen yoksa None) döndürür."""
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.conn.execute("SELECT id, created_ts, subject, body, attempts FROM mail_outbox "
+                                     "WHERE state = 'pending' AND next_attempt_ts <= ? ORDER BY id", (now,)).fetchall()
+        if not rows:
+            return self._next_due()
+        # Pencere dolmadan gönderme: aynı fırtınadaki olaylar tek maile girsin
+        if rows[0][4] == 0 and now - rows[0][1] < self.window:
+            return rows[0][1] + self.window
+        ids = [r[0] for r in rows]
+        marks = ",".join("?" * len(ids))
+        try:
+            self._send(self.build_message(rows), now)
+            with self.lock:
+                self.conn.execute(f"UPDATE mail_outbox SET state = 'sent', sent_ts = ? WHERE id IN ({marks})", [now] + ids)
+                self.conn.commit()
+            self.stats["mails"] += 1
+            self.stats["events_sent"] += len(rows)
+        except Exception as e:
+            self._close()
+            attempts = max(r[4] for r in rows) + 1
+            delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+            state = "failed" if attempts >= self.max_attempts else "pending"
+            with self.lock:
+                self.conn.execute(f"UPDATE mail_outbox SET attempts = ?, next_attempt_ts = ?, state = ?, last_error = ? "
+                                  f"WHERE id IN ({marks})", [attempts, now + delay, state, str(e)] + ids)
+                self.conn.commit()
+            self.stats["failed" if state == "failed" else "retries"] += 1
+        return self._next_due()
+
+    def _next_due(self):
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(next_attempt_ts), MIN(CASE WHEN attempts = 0 THEN created_ts END) "
+                                    "FROM mail_outbox WHERE state = 'pending'").fetchone()
+        if row[0] is None: return None
+        return max(row[0], row[1] + self.window) if row[1] is not None else row[0]
+
+    def _run(self):
+        while self.running:
+            due = self.pump()
+            timeout = self.idle_timeout if due is None else max(0.05, due - time.time())
+            if self.wake.wait(timeout):
+                self.wake.clear()
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="mail-outbox")
+        self.thread.start()
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self.wake.set()
+            self.thread.join()
+        self._close()
+        self.conn.close()
+
+    def snapshot(self):
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM mail_outbox GROUP BY state").fetchall())
+        return dict(self.stats, **counts)
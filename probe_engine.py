@@ -0,0 +1,360 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import random
+import time
+
+import httpx
+
+from stats import SlidingWindow
+
+
+# --- PROBE TAKVİMİ ---
+class ProbeSchedule:
+    def __init__(self, interval=2.0, timeout=1.0, jitter=0.2):
+        self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+
+    def next_delay(self, elapsed):
+        # Jitter, aynı anda kaydedilen servislerin hep aynı anda vurmasını engeller
+        spread = random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.interval - elapsed + spread)
+
+
+# --- UYARLANIR ZAMAN AŞIMI ---
+class AdaptivePolicy:
+    """Zaman aşımı = gözlenen p99 x `multiplier`; takvimdeki zaman aşımının (ve
+    `min_timeout`'un) altına inmez, `max_timeout`'u geçmez. Yani yavaşlayan servise
+    daha uzun süre tanınır ama hızlı bir servis, yavaşladığı an ölü sayılmaz.
+    Zaman aşımına uğrayan probe'lar da pencereye girer ki süre yeniden büyüyebilsin.
+    İlk probe `hedge_quantile` (p95) süresini geçerse aynı adrese ikinci probe gönderilir.
+    `min_samples` örnek birikene kadar takvimdeki sabit zaman aşımı kullanılır."""
+
+    def __init__(self, multiplier=3.0, min_timeout=0.05, max_timeout=10.0, min_samples=10,
+                 hedge_quantile=0.95, min_hedge=0.01, window=60.0):
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge = min_hedge
+        self.window = window
+
+
+# --- DEVRE KESİCİ ---
+class CircuitBreaker:
+    """closed -> (üst üste `failure_threshold` hata) -> open -> (`open_seconds` sonra)
+    half_open -> tek deneme başarılıysa closed, değilse süre ikiye katlanarak tekrar open.
+
+    Açıkken servis yoklanmaz; böylece ölü adresler probe kapasitesi harcamaz.
+    `on_transition(eski, yeni)` her durum değişikliğinde çağrılır."""
+
+    def __init__(self, failure_threshold=5, open_seconds=10.0, max_open_seconds=120.0, on_transition=None):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.on_transition = on_transition
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.current_open = open_seconds
+        self.trial = False
+
+    def _move(self, state):
+        old, self.state = self.state, state
+        if old != state and self.on_transition is not None:
+            self.on_transition(old, state)
+
+    def retry_at(self):
+        return self.opened_at + self.current_open
+
+    def allow(self, now):
+        if self.state == "closed": return True
+        if self.state == "open" and now >= self.retry_at():
+            self._move("half_open")
+        if self.state == "half_open" and not self.trial:
+            self.trial = True
+            return True
+        return False
+
+    def record(self, ok, now):
+        if self.state == "half_open":
+            self.trial = False
+            if ok:
+                self.failures, self.current_open = 0, self.open_seconds
+                self._move("closed")
+            else:
+                self.opened_at = now
+                self.current_open = min(self.current_open * 2, self.max_open_seconds)
+                self._move("open")
+            return
+        if ok:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == "closed" and self.failures >= self.failure_threshold:
+            self.opened_at, self.current_open = now, self.open_seconds
+            self._move("open")
+
+    def reset(self):
+        self.failures, self.trial, self.current_open = 0, False, self.open_seconds
+        self._move("closed")
+
+
+class ServiceProbeState:
+    # Servis başına: son url, gecikme penceresi (başarılı ve zaman aşımına uğrayan probe'lar) ve devre kesici
+    def __init__(self, url, window, breaker):
+        self.url = url
+        self.window = SlidingWindow(window)
+        self.breaker = breaker
+
+    def quantile(self, q, now):
+        self.window.advance(now)
+        return self.window.hist.quantile(q)
+
+
+async def http_probe(client, url, timeout):
+    try:
+        r = await client.get(url, timeout=timeout)
+        return (r.status_code == 200), "OK"
+    except Exception:
+        return False, "BAĞLANTI YOK"
+
+
+# --- ASYNC PROBE MOTORU ---
+class ProbeEngine:
+    """Servisleri tek bir min-heap takvimiyle, ortak keep-alive havuzu üzerinden yoklar.
+
+    Heap'te (vade, sıra, isim) tutulur; döngü yalnızca en yakın vade geldiğinde
+    uyanır, o an vadesi dolanları başlatır ve her probe bittiğinde servisi kendi
+    aralığı + jitter ile yeniden takvime koyar. Böylece 10k servis için 10k bekleyen
+    görev değil, tek bir heap ve en fazla `max_concurrency` uçuştaki probe vardır.
+
+    `services` çağrıldığında güncel {isim: url} sözlüğünü döndürür; failover URL'yi
+    değiştirdiğinde bir sonraki probe yeni adrese gider. Kaydı silinen servis
+    heap'ten çıktığında sessizce düşer. `probe` verilirse (ör.
+    `check_service_health`) havuz yerine o kullanılır: coroutine ise beklenir,
+    değilse thread havuzunda çalıştırılır. `on_result` içinde yakalanmayan istisnalar
+    motoru durdurmaz; `on_error(exc)` verilmişse ona bildirilir.
+
+    `adaptive` verilirse zaman aşımı ve hedge eşiği servisin gözlenen gecikme
+    dağılımından hesaplanır. `breaker_threshold` > 0 ise servis başına devre kesici
+    çalışır; açıkken servis yoklanmaz ve `on_breaker(isim, eski, yeni)` çağrılır.
+    `breaker_exempt` içindeki servisler (failover servisi) hiç kesilmez: hata
+    kararı üst üste gelen probe'lara dayandığı için bu servis yoklanmaya devam etmeli.
+
+    `owns(isim)` verilirse yalnızca True dönen servisler yoklanır (çoklu worker'da
+    paylaştırma); sahiplik değişince `notify` ile takvim tazelenir.
+    """
+
+    def __init__(self, services, on_result, probe=None, schedules=None, default_schedule=None,
+                 max_concurrency=100, refresh_interval=5.0, transport=None, on_error=None,
+                 adaptive=None, breaker_threshold=0, breaker_open=10.0, on_breaker=None, owns=None,
+                 breaker_exempt=()):
+        self.services = services
+        self.on_result = on_result
+        self.probe = probe
+        self.schedules = schedules if schedules is not None else {}
+        self.default_schedule = default_schedule or ProbeSchedule()
+        self.max_concurrency = max_concurrency
+        self.refresh_interval = refresh_interval
+        self.transport = transport
+        self.on_error = on_error
+        self.adaptive = adaptive
+        self.breaker_threshold = breaker_threshold
+        self.breaker_open = breaker_open
+        self.on_breaker = on_breaker
+        self.breaker_exempt = set(breaker_exempt)
+        self.owns = owns
+        self.states = {}
+        self.client = None
+        self.heap = []
+        self.scheduled = set()
+        self.seq = itertools.count()
+        self.stats = {"probes": 0, "max_lag": 0.0, "late": 0, "hedged": 0, "hedge_wins": 0, "skipped": 0}
+        self._inflight = set()
+        self._sem = None
+        self._stop = None
+        self._wake = None
+        self._loop = None
+
+    def schedule_for(self, name):
+        return self.schedules.get(name, self.default_schedule)
+
+    def _make_client(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        return httpx.AsyncClient(limits=limits, transport=self.transport)
+
+    async def probe_once(self, url, timeout):
+        if self.probe is None:
+            return await http_probe(self.client, url, timeout)
+        if inspect.iscoroutinefunction(self.probe):
+            return await self.probe(url)
+        return await asyncio.to_thread(self.probe, url)
+
+    async def _safe_probe(self, url, timeout):
+        try:
+            return await self.probe_once(url, timeout)
+        except Exception as e:
+            return False, str(e)
+
+    def state_for(self, name, url):
+        st = self.states.get(name)
+        if st is None or st.url != url:
+            # Adres değişti (ör. failover): eski gecikmeler ve açık devre yeni hedefe taşınmaz
+            window = self.adaptive.window if self.adaptive else 60.0
+            breaker = CircuitBreaker(self.breaker_threshold, self.breaker_open, on_transition=(
+                lambda old, new: self.on_breaker(name, old, new)) if self.on_breaker else None)
+            if st is not None and st.breaker.state != "closed": st.breaker.reset()
+            st = self.states[name] = ServiceProbeState(url, window, breaker)
+        return st
+
+    def timeouts(self, st, sched, now):
+        """(zaman aşımı, hedge eşiği) saniye cinsinden; hedge yoksa eşik None."""
+        a = self.adaptive
+        if a is None or st.window.total < a.min_samples:
+            return sched.timeout, None
+        p99 = st.quantile(0.99, now) / 1000
+        timeout = min(max(p99 * a.multiplier, sched.timeout, a.min_timeout), a.max_timeout)
+        hedge = max(st.quantile(a.hedge_quantile, now) / 1000, a.min_hedge)
+        return timeout, (hedge if hedge < timeout else None)
+
+    async def _hedged(self, url, timeout, hedge_after):
+        first = asyncio.ensure_future(self._safe_probe(url, timeout))
+        if hedge_after is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if done:
+            return first.result()
+        # İlk probe beklenen p95'i geçti: aynı adrese ikinci bir probe, hangisi önce başarılı olursa
+        self.stats["hedged"] += 1
+        second = asyncio.ensure_future(self._safe_probe(url, timeout))
+        pending, result = {first, second}, None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result[0]:
+                    for other in pending: other.cancel()
+                    if task is second: self.stats["hedge_wins"] += 1
+                    return result
+        return result
+
+    def _push(self, due, name):
+        heapq.heappush(self.heap, (due, next(self.seq), name))
+        if self.heap[0][2] == name and self._wake is not None:
+            self._wake.set()
+
+    def _sync(self, now):
+        # Yeni kaydedilen servisleri jitter kadar dağıtarak takvime ekle
+        for name in self.services().keys() - self.scheduled:
+            if not self._owned(name): continue
+            self.scheduled.add(name)
+            self._push(now + random.uniform(0, self.schedule_for(name).jitter), name)
+
+    def _breaker_on(self, name):
+        return self.breaker_threshold and name not in self.breaker_exempt
+
+    def _owned(self, name):
+        return self.owns is None or self.owns(name)
+
+    async def _probe(self, name, due):
+        start_t = time.monotonic()
+        lag = start_t - due
+        if lag > self.stats["max_lag"]: self.stats["max_lag"] = lag
+        url = self.services().get(name)
+        try:
+            if url is None:
+                self.scheduled.discard(name)
+                return
+            sched = self.schedule_for(name)
+            st = self.state_for(name, url)
+            breaker_on = self._breaker_on(name)
+            if breaker_on and not st.breaker.allow(start_t):
+                # Devre açık: ağa çıkılmaz; takip sürer ki adres değişirse (failover) hemen fark edilsin
+                self.stats["skipped"] += 1
+                self._push(start_t + sched.interval, name)
+                return
+            timeout, hedge_after = self.timeouts(st, sched, start_t)
+            is_alive, msg = await self._hedged(url, timeout, hedge_after)
+            latency = round((time.monotonic() - start_t) * 1000, 2)
+            # Bağlantı reddi gibi hızlı hatalar gecikme dağılımını bozmasın; zaman aşımları girer
+            if is_alive or latency >= timeout * 1000: st.window.add(is_alive, latency, start_t)
+            if breaker_on: st.breaker.record(is_alive, time.monotonic())
+            self.stats["probes"] += 1
+            try:
+                self.on_result(name, url, is_alive, msg, latency)
+            except Exception as e:
+                if self.on_error is not None: self.on_error(e)
+            now = time.monotonic()
+            self._push(now + sched.next_delay(now - start_t), name)
+        finally:
+            self._sem.release()
+
+    def _spawn(self, name, due):
+        task = asyncio.create_task(self._probe(name, due))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        async with self._make_client() as client:
+            self.client = client
+            try:
+                next_sync = 0.0
+                while not self._stop.is_set():
+                    now = time.monotonic()
+                    if now >= next_sync:
+                        self._sync(now)
+                        next_sync = now + self.refresh_interval
+                    while self.heap and self.heap[0][0] <= now and not self._stop.is_set():
+                        due, _, name = heapq.heappop(self.heap)
+                        if name not in self.services() or not self._owned(name):
+                            self.scheduled.discard(name)
+                            continue
+                        # Havuz doluysa yeni probe başlatmak yerine bekle (backpressure)
+                        await self._sem.acquire()
+                        if time.monotonic() - due > 0.1: self.stats["late"] += 1
+                        self._spawn(name, due)
+                        now = time.monotonic()
+                    timeout = next_sync - now
+                    if self.heap: timeout = min(timeout, self.heap[0][0] - now)
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), max(timeout, 0))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                for task in list(self._inflight):
+                    task.cancel()
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def snapshot(self):
+        now = time.monotonic()
+        out = {}
+        for name, st in list(self.states.items()):
+            timeout, hedge = self.timeouts(st, self.schedule_for(name), now)
+            out[name] = {"breaker": st.breaker.state, "timeout_ms": round(timeout * 1000, 1),
+                         "hedge_ms": round(hedge * 1000, 1) if hedge else None, "samples": st.window.total}
+        return out
+
+    def notify(self):
+        # Kayıt değiştiğinde (başka thread'den) takvimi hemen tazele
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._resync)
+
+    def _resync(self):
+        self._sync(time.monotonic())
+        self._wake.set()
+
+    def stop(self):
+        # Başka bir thread'den (ör. shutdown) çağrılabilir
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._loop.call_soon_threadsafe(self._wake.set)
@@ -0,0 +1,176 @@
+import bisect
+import random
+import threading
+import time
+
+import httpx
+from starlette.responses import Response, StreamingResponse
+
+# RFC 7230 6.1: yalnızca tek bağlantıya ait başlıklar upstream'e / istemciye aktarılmaz
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+              "trailers", "transfer-encoding", "upgrade", "host"}
+
+
+def _forward_headers(pairs):
+    return [(k, v) for k, v in pairs if k.lower() not in HOP_BY_HOP]
+
+
+class _UpstreamResponse(StreamingResponse):
+    # Gövde hiç okunmadan istemci koparsa (generator başlamadığı için `finally`
+    # çalışmaz) da upstream yanıtı kapatılır ve sayaç düşer
+    def __init__(self, content, status_code, release):
+        super().__init__(content, status_code=status_code)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.release()
+
+
+# --- AĞIRLIKLI TRAFİK DAĞILIMI ---
+class TrafficSplit:
+    """Sürüm ağırlıkları (ör. {"v1": 90, "v2": 10}).
+
+    Tablo tek bir tuple'dır ve `set` onu tek atamayla değiştirir; okuyucular kilit
+    almadan ya eski ya yeni dağılımı görür, yarım güncellenmiş bir tablo göremez.
+    Failover ve canary adımları bu yüzden konteyner yeniden başlatmak yerine
+    yalnızca bir ağırlık değişikliğidir.
+    """
+
+    def __init__(self, weights, rng=random.random):
+        self.rng = rng
+        self.table = None
+        self.set(weights)
+
+    def set(self, weights):
+        weights = {v: w for v, w in weights.items() if w > 0}
+        if not weights:
+            raise ValueError("En az bir sürümün ağırlığı pozitif olmalı")
+        versions, cumulative, total = [], [], 0
+        for v, w in weights.items():
+            total += w
+            versions.append(v)
+            cumulative.append(total)
+        self.table = (tuple(versions), tuple(cumulative), total, dict(weights))
+
+    def weights(self):
+        return dict(self.table[3])
+
+    def pick(self):
+        versions, cumulative, total, _ = self.table
+        if len(versions) == 1: return versions[0]
+        return versions[bisect.bisect_right(cumulative, self.rng() * total)]
+
+
+# --- TERS VEKİL ---
+class ReverseProxy:
+    """İstekleri `split`'in seçtiği sürüme, sürüm başına kalıcı (keep-alive) bir
+    httpx havuzu üzerinden iletir. İstek ve yanıt gövdeleri belleğe alınmadan
+    parça parça aktarılır.
+
+    `upstream(v)` sürümün taban adresini döndürür; `transports` verilirse (ör.
+    in-process ASGI uygulamaları) o sürüm için ağ yerine o kullanılır.
+    `on_response(version, ok, latency_ms)` her yanıtın başlıkları geldiğinde çağrılır.
+    """
+
+    def __init__(self, upstream, split, transports=None, timeout=10.0, max_connections=100, on_response=None):
+        self.upstream = upstream
+        self.split = split
+        self.transports = transports or {}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.on_response = on_response
+        self.clients = {}
+        self.inflight = {}
+        self.stats = {"requests": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    def client_for(self, version):
+        client = self.clients.get(version)
+        if client is None:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            client = self.clients[version] = httpx.AsyncClient(
+                base_url=self.upstream(version), transport=self.transports.get(version),
+                limits=limits, timeout=self.timeout)
+        return client
+
+    def _enter(self, version):
+        with self.lock:
+            self.inflight[version] = self.inflight.get(version, 0) + 1
+            self.stats["requests"] += 1
+
+    def _leave(self, version):
+        with self.lock:
+            self.inflight[version] -= 1
+
+    def _report(self, version, ok, start):
+        if self.on_response is not None:
+            try: self.on_response(version, ok, (time.perf_counter() - start) * 1000)
+            except Exception: pass
+
+    async def handle(self, request, path):
+        version = self.split.pick()
+        client = self.client_for(version)
+        headers = _forward_headers(request.headers.items())
+        if request.client is not None:
+            headers.append(("x-forwarded-for", request.client.host))
+        headers.append(("x-forwarded-proto", request.url.scheme))
+        # Gövde yoksa (GET vb.) chunked bir boş gövde göndermemek için akış eklenmez
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+        upstream_req = client.build_request(request.method, "/" + path, params=request.url.query.encode(),
+                                            headers=headers, content=request.stream() if has_body else None)
+        start = time.perf_counter()
+        self._enter(version)
+        try:
+            resp = await client.send(upstream_req, stream=True)
+        except httpx.HTTPError as e:
+            self._leave(version)
+            with self.lock: self.stats["errors"] += 1
+            self._report(version, False, start)
+            return Response(f"Upstream {version} erişilemedi: {e.__class__.__name__}", status_code=502,
+                            headers={"x-upstream-version": version})
+        if resp.status_code >= 500:
+            with self.lock: self.stats["errors"] += 1
+        self._report(version, resp.status_code < 500, start)
+
+        released = False
+
+        async def release():
+            nonlocal released
+            if released: return
+            released = True
+            try: await resp.aclose()
+            finally: self._leave(version)
+
+        async def body():
+            try:
+                async for chunk in resp.aiter_raw():
+                    yield chunk
+            finally:
+                await release()
+
+        out = _forward_headers(resp.headers.multi_items())
+        out.append(("x-upstream-version", version))
+        response = _UpstreamResponse(body(), resp.status_code, release)
+        response.raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in out]
+        return response
+
+    def wait_idle(self, version, timeout=10.0):
+        # Failover thread'i eski sürümü kaldırmadan önce süren isteklerin bitmesini bekler
+        deadline = time.monotonic() + timeout
+        while self.inflight.get(version, 0) > 0:
+            if time.monotonic() > deadline: return False
+            time.sleep(0.05)
+        return True
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, weights=self.split.weights(), inflight=dict(self.inflight))
+
+    async def aclose(self):
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
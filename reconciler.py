@@ -0,0 +1,410 @@
+import heapq
+import math
+import time
+import urllib.request
+
+import yaml
+
+
+# --- SPEC ---
+class Probe:
+    def __init__(self, path, initial_delay=0, period=10, failure_threshold=3):
+        self.path = path
+        self.initial_delay = initial_delay
+        self.period = period
+        self.failure_threshold = failure_threshold
+
+    @classmethod
+    def parse(cls, raw):
+        if not raw: return None
+        return cls(raw.get("httpGet", {}).get("path", "/health"), raw.get("initialDelaySeconds", 0),
+                   raw.get("periodSeconds", 10), raw.get("failureThreshold", 3))
+
+
+class ServiceSpec:
+    def __init__(self, name, image, replicas=1, env=None, readiness=None, liveness=None,
+                 grace=30, strategy="BlueGreen", steps=None, pause=0):
+        self.name = name
+        self.image = image
+        self.replicas = replicas
+        self.env = env or {}
+        self.readiness = readiness
+        self.liveness = liveness
+        self.grace = grace
+        self.strategy = strategy
+        self.steps = steps or [100]
+        self.pause = pause
+
+    @classmethod
+    def parse(cls, doc):
+        if doc.get("kind") != "Service":
+            raise ValueError(f"Desteklenmeyen tür: {doc.get('kind')}")
+        spec = doc.get("spec") or {}
+        rollout = spec.get("rollout") or {}
+        return cls(doc["metadata"]["name"], spec["image"], int(spec.get("replicas", 1)),
+                   {e["name"]: str(e["value"]) for e in spec.get("env") or []},
+                   Probe.parse(spec.get("readinessProbe")), Probe.parse(spec.get("livenessProbe")),
+                   spec.get("terminationGracePeriodSeconds", 30), rollout.get("strategy", "BlueGreen"),
+                   [int(s["percent"]) for s in rollout.get("steps") or []], rollout.get("pauseSeconds", 0))
+
+
+def load_specs(text):
+    return [ServiceSpec.parse(doc) for doc in yaml.safe_load_all(text) if doc]
+
+
+def load_spec_file(path):
+    with open(path) as f:
+        return load_specs(f.read())
+
+
+# --- GÖZLENEN DURUM ---
+class Pod:
+    __slots__ = ("id", "service", "image", "ready", "started")
+
+    def __init__(self, pod_id, service, image, started):
+        self.id = pod_id
+        self.service = service
+        self.image = image
+        self.ready = False
+        self.started = started
+
+
+class ServiceState:
+    def __init__(self):
+        # image -> {pod_id: Pod}; hazır sayısı ayrıca tutulur, sayım için pod'lar gezilmez
+        self.by_image = {}
+        self.ready = {}
+        self.stable = None
+        self.step = 0
+        self.step_started = 0.0
+
+    def count(self, image):
+        return len(self.by_image.get(image, ()))
+
+
+class Reconciler:
+    """İstenen (spec) ve gözlenen (pod) durumu servis/imaj bazında indeksler.
+
+    Her `tick` yalnızca değişen ("kirli") servisleri ve vakti gelmiş canary
+    zamanlayıcılarını işler; değişmeyen binlerce pod için hiçbir iş yapılmaz.
+    Değişiklikler `runtime.spawn/kill` ile uygulanır; pod olayları (`pod_ready`,
+    `pod_exited`) ilgili servisi tekrar kirletir. Reconcile'ı hata veren servis
+    kirli kalır ve sonraki `tick`'te yeniden denenir.
+    """
+
+    def __init__(self, runtime, clock=time.time):
+        self.runtime = runtime
+        runtime.reconciler = self
+        self.clock = clock
+        self.desired = {}
+        self.observed = {}
+        self.pods = {}
+        self.dirty = set()
+        self.timers = []
+        # Servis başına tek bekleyen zamanlayıcı; heap'te kalan eski girdiler atlanır
+        self.timer_due = {}
+        self.last_id = 0
+        self.stats = {"ticks": 0, "spawned": 0, "killed": 0, "reconciled": 0, "errors": 0}
+
+    # --- GİRDİLER ---
+    def apply(self, spec):
+        old = self.desired.get(spec.name)
+        self.desired[spec.name] = spec
+        st = self.observed.setdefault(spec.name, ServiceState())
+        if st.stable is None and not st.by_image:
+            st.stable = spec.image
+        if old is None or old.image != spec.image:
+            st.step, st.step_started = 0, self.clock()
+        self.dirty.add(spec.name)
+
+    def delete(self, name):
+        self.desired.pop(name, None)
+        self.dirty.add(name)
+
+    def pod_ready(self, pod_id, ready=True):
+        pod = self.pods.get(pod_id)
+        if pod is None or pod.ready == ready: return
+        pod.ready = ready
+        st = self.observed[pod.service]
+        st.ready[pod.image] = st.ready.get(pod.image, 0) + (1 if ready else -1)
+        self.dirty.add(pod.service)
+
+    def adopt(self, pod_id, service, image, started):
+        """Önceki süreçten kalan (çalışan) bir pod'u gözlenen duruma ekler; hazır
+        sayılması için yine readiness probe'unu geçmesi gerekir."""
+        if pod_id in self.pods: return
+        st = self.observed.setdefault(service, ServiceState())
+        if st.stable is None: st.stable = image
+        pod = self.pods[pod_id] = Pod(pod_id, service, image, started)
+        st.by_image.setdefault(image, {})[pod_id] = pod
+        suffix = pod_id.rsplit("-", 1)[-1]
+        if suffix.isdigit(): self.last_id = max(self.last_id, int(suffix))
+        self.dirty.add(service)
+
+    def pod_exited(self, pod_id):
+        pod = self.pods.pop(pod_id, None)
+        if pod is None: return
+        self._forget(pod)
+        self.dirty.add(pod.service)
+
+    # --- UYGULAMA ---
+    def _forget(self, pod):
+        st = self.observed[pod.service]
+        group = st.by_image.get(pod.image)
+        if group is not None:
+            group.pop(pod.id, None)
+            if not group: del st.by_image[pod.image]
+        if pod.ready:
+            st.ready[pod.image] -= 1
+
+    def _spawn(self, spec, image, now):
+        self.last_id += 1
+        pod = Pod(f"{spec.name}-{self.last_id}", spec.name, image, now)
+        self.pods[pod.id] = pod
+        self.observed[spec.name].by_image.setdefault(image, {})[pod.id] = pod
+        try:
+            self.runtime.spawn(pod.id, spec, image)
+        except Exception:
+            # Çalışmayan pod gözlenen durumda kalmasın; yoksa sayılır ve bir daha yaratılmaz
+            self.pods.pop(pod.id, None)
+            self._forget(pod)
+            raise
+        self.stats["spawned"] += 1
+
+    def _kill(self, pod, grace):
+        self.runtime.kill(pod.id, grace)
+        self.pods.pop(pod.id, None)
+        self._forget(pod)
+        self.stats["killed"] += 1
+
+    def _scale(self, spec, st, image, want, now, grace):
+        have = st.count(image)
+        for _ in range(want - have):
+            self._spawn(spec, image, now)
+        if have > want:
+            # Önce hazır olmayanlar, sonra en yeniler kapatılır
+            group = st.by_image[image]
+            victims = list(group.values()) if want == 0 else \
+                heapq.nsmallest(have - want, group.values(), key=lambda p: (p.ready, -p.started))
+            for pod in victims:
+                self._kill(pod, grace)
+
+    def plan(self, spec, st, now):
+        """Servis için {imaj: istenen pod sayısı} döndürür ve rollout adımını ilerletir."""
+        target, old = spec.image, st.stable
+        if old is None or old == target:
+            st.stable = target
+            return {target: spec.replicas}
+        new_ready = st.ready.get(target, 0)
+        if spec.strategy == "Canary":
+            steps = spec.steps
+            while st.step < len(steps):
+                want = math.ceil(spec.replicas * steps[st.step] / 100)
+                if new_ready < want or now < st.step_started + spec.pause:
+                    break
+                st.step, st.step_started = st.step + 1, now
+            if st.step >= len(steps):
+                st.stable = target
+                return {target: spec.replicas}
+            want = math.ceil(spec.replicas * steps[st.step] / 100)
+            if new_ready >= want:
+                # Bu adım hazır; duraklama bitince tekrar bakılmak üzere zamanlayıcı kur
+                self._arm(spec.name, st.step_started + spec.pause)
+            return {target: want, old: spec.replicas - want}
+        # BlueGreen: yeni sürümün tamamı hazır olana kadar eski sürüm tam kapasite kalır
+        if new_ready >= spec.replicas:
+            st.stable = target
+            return {target: spec.replicas}
+        return {target: spec.replicas, old: spec.replicas}
+
+    def _arm(self, name, due):
+        if self.timer_due.get(name) == due: return
+        self.timer_due[name] = due
+        heapq.heappush(self.timers, (due, name))
+
+    def reconcile(self, name, now):
+        spec = self.desired.get(name)
+        st = self.observed.get(name)
+        if st is None: return
+        if spec is None:
+            for pod in [p for group in st.by_image.values() for p in group.values()]:
+                self._kill(pod, 30)
+            del self.observed[name]
+            return
+        plan = self.plan(spec, st, now)
+        for image in list(st.by_image):
+            if image not in plan:
+                plan[image] = 0
+        for image, want in plan.items():
+            self._scale(spec, st, image, max(want, 0), now, spec.grace)
+        self.stats["reconciled"] += 1
+
+    def tick(self, now=None):
+        now = self.clock() if now is None else now
+        while self.timers and self.timers[0][0] <= now:
+            due, name = heapq.heappop(self.timers)
+            if self.timer_due.get(name) == due:
+                del self.timer_due[name]
+                self.dirty.add(name)
+        dirty, self.dirty = self.dirty, set()
+        error = None
+        for name in dirty:
+            try:
+                self.reconcile(name, now)
+            except Exception as e:
+                self.dirty.add(name)
+                self.stats["errors"] += 1
+                error = error or e
+        self.stats["ticks"] += 1
+        # Diğer servisler işlendikten sonra ilk hata çağırana bildirilir
+        if error is not None: raise error
+        return len(dirty)
+
+    def summary(self):
+        return {name: {"desired": spec.replicas, "image": spec.image, "stable": self.observed[name].stable,
+                       "pods": {img: len(g) for img, g in self.observed[name].by_image.items()},
+                       "ready": {img: n for img, n in self.observed[name].ready.items() if n}}
+                for name, spec in self.desired.items()}
+
+
+# --- ÇALIŞMA ORTAMLARI ---
+class FakeRuntime:
+    """Testler ve benchmark için: pod'ları yalnızca kaydeder, istenirse anında hazır işaretler."""
+
+    def __init__(self, auto_ready=True):
+        self.auto_ready = auto_ready
+        self.reconciler = None
+        self.running = {}
+        self.calls = {"spawn": 0, "kill": 0}
+
+    def spawn(self, pod_id, spec, image):
+        self.running[pod_id] = image
+        self.calls["spawn"] += 1
+        if self.auto_ready and self.reconciler is not None:
+            self.reconciler.pod_ready(pod_id)
+
+    def kill(self, pod_id, grace):
+        self.running.pop(pod_id, None)
+        self.calls["kill"] += 1
+
+
+def docker_image(ref):
+    # "local://demo@v2" -> "demo:v2"
+    ref = ref.split("://", 1)[-1]
+    return ref.replace("@", ":", 1)
+
+
+def http_ok(url, timeout=1.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return 200 <= r.status < 400
+    except Exception:
+        return False
+
+
+class DockerRuntime:
+    """Pod'ları Docker konteyneri olarak çalıştırır.
+
+    Pod, spec'teki readinessProbe yolu (konteyner IP'si + `port`) başarılı
+    olana kadar hazır sayılmaz; livenessProbe `failureThreshold` kez üst üste
+    başarısız olursa konteyner kapatılır. Kontroller bir vade heap'iyle
+    yalnızca `periodSeconds` dolduğunda yapılır; her `poll` tüm pod'ları gezmez.
+    Başlangıçta `reconciler.service` etiketli konteynerler `adopt` ile sahiplenilir.
+    """
+
+    def __init__(self, client, port=80, http_get=http_ok, clock=time.time, exit_check=10):
+        self.client = client
+        self.port = port
+        self.http_get = http_get
+        self.clock = clock
+        self.exit_check = exit_check
+        self.reconciler = None
+        self.containers = {}
+        self.checks = []
+        self.failures = {}
+
+    def adopt(self):
+        found = self.client.containers.list(all=True, filters={"label": "reconciler.service"})
+        # Yarıda kalmış bir rollout'ta çoğunluktaki imaj kararlı sürüm sayılır
+        counts = {}
+        for c in found:
+            key = (c.labels.get("reconciler.service"), c.labels.get("reconciler.image"))
+            counts[key] = counts.get(key, 0) + 1
+        now = self.clock()
+        for c in sorted(found, key=lambda c: -counts[(c.labels.get("reconciler.service"),
+                                                      c.labels.get("reconciler.image"))]):
+            if c.status != "running":
+                try: c.remove(force=True)
+                except Exception: pass
+                continue
+            self.containers[c.name] = c
+            self.reconciler.adopt(c.name, c.labels["reconciler.service"], c.labels["reconciler.image"], now)
+            self._schedule(c.name, now)
+        return len(self.containers)
+
+    def spawn(self, pod_id, spec, image):
+        self.containers[pod_id] = self.client.containers.run(
+            docker_image(image), detach=True, name=pod_id, environment=spec.env,
+            labels={"reconciler.service": spec.name, "reconciler.image": image})
+        probe = spec.readiness
+        self._schedule(pod_id, self.clock() + (probe.initial_delay if probe else 0))
+
+    def _schedule(self, pod_id, due):
+        heapq.heappush(self.checks, (due, pod_id))
+
+    def _url(self, c, path):
+        ip = (c.attrs.get("NetworkSettings") or {}).get("IPAddress") or c.name
+        return f"http://{ip}:{self.port}{path}"
+
+    def poll(self, now=None):
+        """Vadesi gelen pod'ların durumunu ve probe'larını kontrol eder."""
+        now = self.clock() if now is None else now
+        rec = self.reconciler
+        while self.checks and self.checks[0][0] <= now:
+            _, pod_id = heapq.heappop(self.checks)
+            c, pod = self.containers.get(pod_id), rec.pods.get(pod_id)
+            if c is None or pod is None: continue
+            spec = rec.desired.get(pod.service)
+            try: c.reload()
+            except Exception: pass
+            if c.status in ("exited", "dead") or spec is None:
+                if c.status in ("exited", "dead"): self.exited(pod_id)
+                continue
+            ready, live = spec.readiness, spec.liveness
+            if ready is None or self.http_get(self._url(c, ready.path)):
+                self.failures.pop((pod_id, "ready"), None)
+                rec.pod_ready(pod_id)
+            elif pod.ready and self._failed(pod_id, "ready", ready.failure_threshold):
+                rec.pod_ready(pod_id, False)
+            if live is not None and not self.http_get(self._url(c, live.path)):
+                if self._failed(pod_id, "live", live.failure_threshold):
+                    self.exited(pod_id)
+                    continue
+            else:
+                self.failures.pop((pod_id, "live"), None)
+            period = min(p.period for p in (ready, live) if p) if (ready or live) else self.exit_check
+            self._schedule(pod_id, now + period)
+
+    def _failed(self, pod_id, kind, threshold):
+        n = self.failures[(pod_id, kind)] = self.failures.get((pod_id, kind), 0) + 1
+        return n >= threshold
+
+    def exited(self, pod_id):
+        # Konteyner kendiliğinden durdu ya da liveness başarısız: kaldır ve reconciler'a bildir
+        c = self.containers.pop(pod_id, None)
+        self.failures.pop((pod_id, "ready"), None)
+        self.failures.pop((pod_id, "live"), None)
+        if c is not None:
+            try: c.remove(force=True)
+            except Exception: pass
+        if self.reconciler is not None:
+            self.reconciler.pod_exited(pod_id)
+
+    def kill(self, pod_id, grace):
+        c = self.containers.pop(pod_id, None)
+        if c is None: return
+        try:
+            c.stop(timeout=grace)
+            c.remove(force=True)
+        except Exception:
+            pass
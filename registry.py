@@ -0,0 +1,82 @@
+import time
+
+from probe_engine import ProbeSchedule
+from stats import FailoverPolicy
+
+FIELDS = ("url", "container", "interval", "timeout", "jitter", "fail_limit", "window", "latency_slo_ms")
+
+
+# --- SERVİS KAYDI ---
+class ServiceRegistry:
+    """Çalışma anında kaydedilen servisleri SQLite'ta (`services` tablosu) saklar ve
+    monitörün kullandığı sözlüklere yansıtır: url -> `services`, konteyner ->
+    `containers`, takvim -> `schedules`, eşikler -> `policies`.
+
+    Boş bırakılan alanlar varsayılan takvim/politikadan alınır. `managed` içindeki
+    servislerin (ör. failover'ın sürüm değiştirdiği "Ana Servis") url ve konteyneri
+    kayıttan değil, çalışan sözlüklerden gelir; yalnızca takvim ve eşikleri ayarlanabilir.
+    """
+
+    def __init__(self, services, containers, schedules, policies, default_schedule, default_policy, managed=()):
+        self.services = services
+        self.containers = containers
+        self.schedules = schedules
+        self.policies = policies
+        self.default_schedule = default_schedule
+        self.default_policy = default_policy
+        self.managed = set(managed)
+        self.rows = {}
+
+    def _live(self, name, row):
+        # Failover'ın yönettiği servislerde url/konteyner hep güncel değerdir, kayıttaki değil
+        if name in self.managed and name in self.services:
+            row = dict(row, url=self.services[name], container=self.containers.get(name))
+        return row
+
+    def _apply(self, name, row):
+        row = self._live(name, row)
+        d, p = self.default_schedule, self.default_policy
+        self.rows[name] = row
+        self.schedules[name] = ProbeSchedule(row.get("interval") or d.interval, row.get("timeout") or d.timeout,
+                                             d.jitter if row.get("jitter") is None else row["jitter"])
+        self.policies[name] = FailoverPolicy(row.get("fail_limit") or p.fail_limit, row.get("window") or p.window,
+                                             p.latency_slo_ms if row.get("latency_slo_ms") is None else row["latency_slo_ms"],
+                                             p.slo_quantile, p.min_samples)
+        if row.get("container"): self.containers[name] = row["container"]
+        else: self.containers.pop(name, None)
+        # url en son atanır: monitör servisi gördüğünde takvimi de hazır olsun
+        self.services[name] = row["url"]
+
+    def load(self, conn):
+        cols = ", ".join(FIELDS)
+        for r in conn.execute(f"SELECT name, {cols} FROM services"):
+            self._apply(r[0], dict(zip(FIELDS, r[1:])))
+        return len(self.rows)
+
+    def register(self, conn, name, row):
+        row = self._live(name, {k: row.get(k) for k in FIELDS})
+        conn.execute(f"INSERT OR REPLACE INTO services (name, {', '.join(FIELDS)}, updated_ts) "
+                     f"VALUES (?, {', '.join('?' * len(FIELDS))}, ?)", (name, *[row[k] for k in FIELDS], time.time()))
+        self._apply(name, row)
+        return row
+
+    def update(self, conn, name, changes):
+        row = dict(self.rows.get(name) or {}, url=self.services[name], container=self.containers.get(name))
+        row.update({k: v for k, v in changes.items() if k in FIELDS and v is not None})
+        return self.register(conn, name, row)
+
+    def deregister(self, conn, name):
+        conn.execute("DELETE FROM services WHERE name = ?", (name,))
+        self.rows.pop(name, None)
+        self.services.pop(name, None)
+        self.containers.pop(name, None)
+        self.schedules.pop(name, None)
+        self.policies.pop(name, None)
+
+    def describe(self, name):
+        sched = self.schedules.get(name, self.default_schedule)
+        policy = self.policies.get(name, self.default_policy)
+        return {"name": name, "url": self.services.get(name), "container": self.containers.get(name),
+                "interval": sched.interval, "timeout": sched.timeout, "jitter": sched.jitter,
+                "fail_limit": policy.fail_limit, "window": policy.window, "latency_slo_ms": policy.latency_slo_ms,
+                "persisted": name in self.rows}
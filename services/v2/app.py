@@ -1,34 +1,98 @@
 from fastapi import FastAPI, HTTPException
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import os
+import random
 import time
 
 app = FastAPI()
 
-APP_STATE = {"version": "v2", "cpu_load": 0, "is_corrupted": False}
+APP_STATE = {"version": "v2", "cpu_load": 0, "is_corrupted": False,
+             "latency": {"mode": "off", "ms": 0.0, "stddev_ms": 0.0, "tail_ratio": 0.0, "tail_ms": 0.0},
+             "memory_mb": 0, "response_kb": 0}
+
+# Ağır işler event loop'u değil süreç havuzunu meşgul eder; /health bu yüzden aç kalmaz
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+_pool = None
+_ballast = []
+
+def burn(seconds):
+    # Gerçek CPU tüketimi: süre dolana kadar boş döngü
+    end, n = time.perf_counter() + seconds, 0
+    while time.perf_counter() < end: n += 1
+    return n
+
+async def burn_cpu(seconds):
+    global _pool
+    if _pool is None: _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    return await asyncio.get_running_loop().run_in_executor(_pool, burn, seconds)
+
+def sample_latency(cfg, rng=random):
+    # fixed: sabit; normal: N(ms, stddev); longtail: çoğunlukla ms, tail_ratio olasılıkla tail_ms
+    mode = cfg["mode"]
+    if mode == "fixed": return cfg["ms"]
+    if mode == "normal": return max(0.0, rng.gauss(cfg["ms"], cfg["stddev_ms"]))
+    if mode == "longtail":
+        if rng.random() < cfg["tail_ratio"]: return cfg["tail_ms"] * (1 + rng.expovariate(1.0))
+        return cfg["ms"]
+    return 0.0
 
 @app.get("/")
-def read_root():
-    if APP_STATE["cpu_load"] > 0: time.sleep(APP_STATE["cpu_load"] / 20.0)
+async def read_root():
+    delay = sample_latency(APP_STATE["latency"])
+    if delay: await asyncio.sleep(delay / 1000)
+    if APP_STATE["cpu_load"] > 0: await burn_cpu(APP_STATE["cpu_load"] / 20.0)
     if APP_STATE["is_corrupted"]: raise HTTPException(status_code=500, detail="DATA_ERR")
-    return {"version": "v2", "message": "Servis V2 Aktif", "load": f"%{APP_STATE['cpu_load']}"}
+    body = {"version": "v2", "message": "Servis V2 Aktif", "load": f"%{APP_STATE['cpu_load']}"}
+    if APP_STATE["response_kb"]: body["payload"] = "x" * (APP_STATE["response_kb"] * 1024)
+    return body
 
 @app.get("/health")
-def health_check():
+async def health_check():
     if APP_STATE["is_corrupted"]: raise HTTPException(status_code=503, detail="Corrupted")
-    if APP_STATE["cpu_load"] > 50: time.sleep(2)
+    # Yüksek yükte sağlık kontrolü yavaşlar, ama event loop bloklanmaz
+    if APP_STATE["cpu_load"] > 50: await asyncio.sleep(2)
     return {"status": "healthy", "version": "v2"}
 
 @app.post("/simulate/cpu/{level}")
-def set_cpu(level: int):
+async def set_cpu(level: int):
     APP_STATE["cpu_load"] = level
     return {"msg": "V2 CPU Yuku Arttirildi."}
 
 @app.post("/simulate/corruption")
-def corrupt():
+async def corrupt():
     APP_STATE["is_corrupted"] = True
     return {"msg": "V2 Verisi Bozuldu."}
 
+@app.post("/simulate/latency/{mode}")
+async def set_latency(mode: str, ms: float = 0, stddev_ms: float = 0, tail_ratio: float = 0, tail_ms: float = 0):
+    if mode not in ("off", "fixed", "normal", "longtail"):
+        raise HTTPException(status_code=400, detail="mode: off | fixed | normal | longtail")
+    APP_STATE["latency"] = {"mode": mode, "ms": ms, "stddev_ms": stddev_ms, "tail_ratio": tail_ratio, "tail_ms": tail_ms}
+    return {"msg": f"V2 Gecikme Profili: {mode}", "latency": APP_STATE["latency"]}
+
+@app.post("/simulate/memory/{mb}")
+async def set_memory(mb: int):
+    # Sayfalara dokunulur ki bellek gerçekten RSS'e yansısın
+    _ballast.clear()
+    if mb > 0:
+        buf = bytearray(mb << 20)
+        buf[::4096] = b"\x01" * len(range(0, len(buf), 4096))
+        _ballast.append(buf)
+    APP_STATE["memory_mb"] = max(mb, 0)
+    return {"msg": f"V2 Bellek Baskisi: {APP_STATE['memory_mb']} MB"}
+
+@app.post("/simulate/size/{kb}")
+async def set_size(kb: int):
+    APP_STATE["response_kb"] = max(kb, 0)
+    return {"msg": f"V2 Yanit Boyutu: {APP_STATE['response_kb']} KB"}
+
 @app.post("/simulate/reset")
-def reset():
+async def reset():
     APP_STATE["cpu_load"] = 0
     APP_STATE["is_corrupted"] = False
-    return {"msg": "V2 Normale Dondu."}
\ No newline at end of file
+    APP_STATE["latency"] = {"mode": "off", "ms": 0.0, "stddev_ms": 0.0, "tail_ratio": 0.0, "tail_ms": 0.0}
+    APP_STATE["response_kb"] = 0
+    _ballast.clear()
+    APP_STATE["memory_mb"] = 0
+    return {"msg": "V2 Normale Dondu."}
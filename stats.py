@@ -0,0 +1,274 @@
+import math
+import threading
+import time
+
+
+# --- KANTİL TAHMİNCİSİ ---
+class LogHistogram:
+    """Log ölçekli kovalara dayalı birleştirilebilir kantil taslağı (DDSketch benzeri).
+
+    Her kova bir öncekinden `1 + 2 * accuracy` kat geniştir; dönen kantil
+    gerçeğine en fazla `accuracy` oranında uzaktır. Kova sayısı değer aralığına
+    bağlıdır, örnek sayısına değil.
+    """
+
+    def __init__(self, accuracy=0.02):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.count = 0
+
+    def key(self, value):
+        return int(math.ceil(math.log(max(value, 1e-3)) / self.log_gamma))
+
+    def value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value, n=1):
+        k = self.key(value)
+        self.bins[k] = self.bins.get(k, 0) + n
+        self.count += n
+
+    def merge(self, other, sign=1):
+        for k, n in other.bins.items():
+            left = self.bins.get(k, 0) + sign * n
+            if left: self.bins[k] = left
+            else: self.bins.pop(k, None)
+        self.count += sign * other.count
+
+    def quantile(self, q):
+        if self.count <= 0: return None
+        rank, seen = q * (self.count - 1), 0
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            if seen > rank:
+                return self.value(k)
+        return self.value(max(self.bins))
+
+
+class HdrHistogram:
+    """HDR tarzı log-lineer histogram: her ikinin kuvveti aralığı `2**sub_bits`
+    eşit alt kovaya bölünür. Değerler tamsayı birime (varsayılan µs) yuvarlanır;
+    göreli hata `2**(1 - sub_bits)`'i geçmez. Sabit boyutlu dizi, kayıt O(1)."""
+
+    def __init__(self, max_value=60_000_000, sub_bits=7, unit=1e-6):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.unit = unit
+        self.max_value = max_value
+        self.counts = [0] * self.index(max_value) + [0]
+        self.count = 0
+        self.max = 0
+        self.total = 0
+
+    def index(self, v):
+        if v < self.sub_count: return v
+        half = self.sub_count // 2
+        shift = v.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * half + (v >> shift) - half
+
+    def lowest(self, i):
+        # index()'in tersi: kovanın alt sınırı
+        if i < self.sub_count: return i
+        half = self.sub_count // 2
+        j = i - self.sub_count
+        return (j % half + half) << (j // half + 1)
+
+    def record(self, seconds):
+        v = min(round(seconds / self.unit), self.max_value)
+        self.counts[self.index(v)] += 1
+        self.count += 1
+        self.total += v
+        if v > self.max: self.max = v
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            if n: self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """`q` (0-100) yüzdelik değerini saniye cinsinden döndürür."""
+        if not self.count: return None
+        if q >= 100: return self.max * self.unit
+        rank, seen = max(1, math.ceil(q / 100 * self.count)), 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.lowest(i), self.max) * self.unit
+        return self.max * self.unit
+
+    def mean(self):
+        return self.total / self.count * self.unit if self.count else None
+
+
+# --- KAYAN PENCERE ---
+class SlidingWindow:
+    """`window` saniyelik pencereyi `slots` dilime böler. Her dilim kendi sayaçlarını
+    ve histogramını tutar; süresi dolan dilim toplamdan çıkarılır. Kayıt ve sorgu
+    maliyeti örnek hızından bağımsızdır (amortize O(1))."""
+
+    def __init__(self, window=10.0, slots=20, accuracy=0.02):
+        self.window = window
+        self.slots = slots
+        self.width = window / slots
+        self.accuracy = accuracy
+        self.ring = [None] * slots
+        self.total = 0
+        self.failures = 0
+        self.hist = LogHistogram(accuracy)
+
+    def _slot(self, now):
+        epoch = int(now // self.width)
+        i = epoch % self.slots
+        slot = self.ring[i]
+        if slot is None or slot[0] != epoch:
+            if slot is not None: self._expire(slot)
+            slot = self.ring[i] = [epoch, 0, 0, LogHistogram(self.accuracy)]
+        return slot
+
+    def _expire(self, slot):
+        self.total -= slot[1]
+        self.failures -= slot[2]
+        self.hist.merge(slot[3], sign=-1)
+
+    def advance(self, now):
+        oldest = int(now // self.width) - self.slots + 1
+        for i, slot in enumerate(self.ring):
+            if slot is not None and slot[0] < oldest:
+                self._expire(slot)
+                self.ring[i] = None
+
+    def add(self, ok, latency, now):
+        self.advance(now)
+        slot = self._slot(now)
+        slot[1] += 1
+        self.total += 1
+        if not ok:
+            slot[2] += 1
+            self.failures += 1
+        slot[3].add(latency)
+        self.hist.add(latency)
+
+    def clear(self):
+        self.ring = [None] * self.slots
+        self.total = self.failures = 0
+        self.hist = LogHistogram(self.accuracy)
+
+    def dump(self, now):
+        # Yalnızca süresi dolmamış dilimler: [epoch, toplam, hata, {kova: adet}]
+        self.advance(now)
+        return [[s[0], s[1], s[2], s[3].bins] for s in self.ring if s is not None]
+
+    def load(self, slots, now):
+        self.clear()
+        for epoch, total, failures, bins in slots:
+            hist = LogHistogram(self.accuracy)
+            for k, n in bins.items(): hist.add(hist.value(int(k)), n)
+            slot = [epoch, total, failures, hist]
+            self.ring[epoch % self.slots] = slot
+            self.total += total
+            self.failures += failures
+            self.hist.merge(hist)
+        self.advance(now)
+
+
+# --- SERVİS İSTATİSTİKLERİ ---
+class FailoverPolicy:
+    def __init__(self, fail_limit=5, window=10.0, latency_slo_ms=None, slo_quantile=0.95, min_samples=5):
+        self.fail_limit = fail_limit
+        self.window = window
+        self.latency_slo_ms = latency_slo_ms
+        self.slo_quantile = slo_quantile
+        self.min_samples = min_samples
+
+
+class ServiceStats:
+    def __init__(self, policy, alpha=0.2):
+        self.policy = policy
+        self.alpha = alpha
+        self.window = SlidingWindow(policy.window)
+        self.ewma = None
+        self.samples = 0
+        self.lock = threading.Lock()
+
+    def record(self, ok, latency, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.window.add(ok, latency, now)
+            self.ewma = latency if self.ewma is None else self.alpha * latency + (1 - self.alpha) * self.ewma
+            self.samples += 1
+
+    def verdict(self, now=None):
+        """Failover gerekiyorsa nedenini ("FAIL_LIMIT" / "LATENCY_SLO"), yoksa None döndürür."""
+        now = time.time() if now is None else now
+        p = self.policy
+        with self.lock:
+            self.window.advance(now)
+            if self.window.failures >= p.fail_limit:
+                return "FAIL_LIMIT"
+            if p.latency_slo_ms is not None and self.window.total >= p.min_samples:
+                if self.window.hist.quantile(p.slo_quantile) > p.latency_slo_ms:
+                    return "LATENCY_SLO"
+        return None
+
+    def reset(self):
+        with self.lock:
+            self.window.clear()
+
+    def dump(self, now):
+        with self.lock:
+            return {"window": self.window.dump(now), "ewma": self.ewma, "samples": self.samples}
+
+    def load(self, state, now):
+        with self.lock:
+            self.window.load(state.get("window", []), now)
+            self.ewma = state.get("ewma")
+            self.samples = state.get("samples", 0)
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.window.advance(now)
+            w = self.window
+            q = {f"p{int(x * 100)}": (round(w.hist.quantile(x), 2) if w.total else None) for x in (0.5, 0.95, 0.99)}
+            return dict(q, count=w.total, failures=w.failures,
+                        failure_rate=round(w.failures / w.total, 4) if w.total else 0.0,
+                        ewma_ms=round(self.ewma, 2) if self.ewma is not None else None)
+
+
+class StatsRegistry:
+    def __init__(self, default_policy, policies=None):
+        self.default_policy = default_policy
+        self.policies = policies if policies is not None else {}
+        self.services = {}
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        stats = self.services.get(name)
+        if stats is None:
+            with self.lock:
+                stats = self.services.get(name)
+                if stats is None:
+                    stats = self.services[name] = ServiceStats(self.policies.get(name, self.default_policy))
+        return stats
+
+    def forget(self, name):
+        # Politika değiştiğinde ya da servis silindiğinde pencere sıfırdan başlar
+        with self.lock:
+            self.services.pop(name, None)
+
+    def snapshot(self):
+        return {name: s.snapshot() for name, s in list(self.services.items())}
+
+    def dump(self, now=None):
+        now = time.time() if now is None else now
+        return {name: s.dump(now) for name, s in list(self.services.items())}
+
+    def load(self, states, now=None):
+        # Yeniden başlatmada pencereler kaldığı yerden sürer; süresi dolan dilimler atılır
+        now = time.time() if now is None else now
+        for name, state in states.items():
+            self.get(name).load(state, now)
@@ -0,0 +1,391 @@
+import json
+import math
+import queue
+import sqlite3
+import threading
+import time
+
+
+def connect(db_name):
+    conn = sqlite3.connect(db_name, check_same_thread=False)
+    # WAL: dashboard okuyucuları yazıcıyı, yazıcı da okuyucuları bekletmez
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+# --- GRUP COMMIT YAZICISI ---
+class BatchWriter:
+    """Satırları sınırlı bir kuyruktan alıp tek, uzun ömürlü WAL bağlantısı üzerinden
+    `executemany` ile toplu yazar. Bir parti ya `batch_size` satıra ya da
+    `flush_interval` saniyeye ulaşınca commit edilir.
+
+    Kuyruk doluysa `submit` en fazla `block_timeout` kadar bekler (backpressure),
+    sonra satırı düşürüp `dropped` sayacını artırır. Thread başlatılmadıysa
+    (ör. testlerde) satırlar anında yazılır.
+    """
+
+    def __init__(self, db_name, max_queue=10000, batch_size=500, flush_interval=0.2, block_timeout=0.05):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.conn = connect(db_name)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.closed = False
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0, "max_batch": 0}
+        # hook(conn) her partide, commit'ten hemen önce aynı transaction içinde çağrılır
+        self.hooks = []
+        # timer(aşama, saniye): "insert" / "commit" sürelerini ölçüm sistemine bildirir
+        self.timer = None
+
+    def execute_script(self, sql):
+        with self.lock:
+            self.conn.executescript(sql)
+            self.conn.commit()
+
+    def call(self, fn):
+        # Yazıcı bağlantısında tek seferlik iş (ör. migration) çalıştırır
+        with self.lock:
+            result = fn(self.conn)
+            self.conn.commit()
+            return result
+
+    def submit(self, sql, params, block_timeout=None):
+        self.stats["submitted"] += 1
+        if self.closed:
+            self.stats["dropped"] += 1
+            return False
+        if not self.running:
+            self._write([(sql, params)])
+            return True
+        try:
+            self.queue.put((sql, params), timeout=self.block_timeout if block_timeout is None else block_timeout)
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def _write(self, batch):
+        grouped = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        with self.lock:
+            try:
+                t0 = time.perf_counter()
+                for sql, rows in grouped.items():
+                    self.conn.executemany(sql, rows)
+                for hook in self.hooks:
+                    hook(self.conn)
+                t1 = time.perf_counter()
+                self.conn.commit()
+                if self.timer is not None and batch:
+                    self.timer("insert", t1 - t0)
+                    self.timer("commit", time.perf_counter() - t1)
+                if batch:
+                    self.stats["written"] += len(batch)
+                    self.stats["batches"] += 1
+                    self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            except Exception:
+                # Hook'lardaki hatalar da (ör. durum toplayıcı) yalnızca bu partiyi düşürür, thread'i değil
+                self.conn.rollback()
+                self.stats["errors"] += 1
+
+    def _drain(self, first, deadline):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self.running or not self.queue.empty():
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Boşta da hook'lar (rollup, retention) çalışmaya devam eder
+                if self.hooks:
+                    try: self._write([])
+                    except Exception: self.stats["errors"] += 1
+                continue
+            batch = self._drain(first, time.monotonic() + self.flush_interval)
+            try:
+                self._write(batch)
+            except Exception:
+                self.stats["errors"] += 1
+            finally:
+                # flush() kuyruğun join'ini bekler; hata olsa da her satır tamamlandı sayılmalı
+                for _ in batch:
+                    self.queue.task_done()
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="db-writer")
+        self.thread.start()
+
+    def flush(self):
+        # Kuyruktaki her şey diske yazılana kadar bekler
+        if self.running:
+            self.queue.join()
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self.thread.join()
+        self.closed = True
+        self.conn.close()
+
+    def snapshot(self):
+        return dict(self.stats, queued=self.queue.qsize())
+
+
+# --- ŞEMA MIGRATION ---
+# PRAGMA user_version ile sürümlenir; her adım yalnızca bir kez çalışır.
+def _migrate_epoch(conn):
+    # Eski satırlarda tarih yok: saat bilgisi migration gününe oturtulur (yaklaşık değer)
+    conn.execute("ALTER TABLE health_logs ADD COLUMN ts INTEGER")
+    conn.execute("ALTER TABLE audit_logs ADD COLUMN ts INTEGER")
+    for table in ("health_logs", "audit_logs"):
+        conn.execute(f"UPDATE {table} SET ts = CAST(strftime('%s', date('now', 'localtime') || ' ' || timestamp, 'utc') AS INTEGER) "
+                     "WHERE ts IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_health_service_ts ON health_logs (service, ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_logs (ts)")
+
+
+def _create_rollups(conn):
+    for table, _ in ROLLUP_LEVELS:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (service TEXT, bucket INTEGER, count INTEGER, failures INTEGER, "
+                     "lat_min REAL, lat_sum REAL, lat_max REAL, lat_p95 REAL, hist TEXT, PRIMARY KEY (service, bucket))")
+    # Mevcut ham satırlar da özetlere girer; yoksa Retention onları silince bu geçmiş tamamen kaybolur.
+    # Bu adımdan sonraki satırlar canlı olarak (Rollups hook'u) eklendiği için çift sayım olmaz.
+    rollups = Rollups()
+    cur = conn.execute("SELECT service, ts, status, latency FROM health_logs WHERE ts IS NOT NULL ORDER BY id")
+    while True:
+        rows = cur.fetchmany(5000)
+        if not rows: break
+        for service, ts, status, latency in rows:
+            rollups.add(service, ts, status == "AKTİF", latency or 0.0)
+        rollups.write(conn)
+
+
+def _create_outbox(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS mail_outbox (id INTEGER PRIMARY KEY, created_ts REAL, subject TEXT, body TEXT, "
+                 "state TEXT, attempts INTEGER, next_attempt_ts REAL, sent_ts REAL, last_error TEXT)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_state ON mail_outbox (state, next_attempt_ts)")
+
+
+def _create_services(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS services (name TEXT PRIMARY KEY, url TEXT NOT NULL, container TEXT, "
+                 "interval REAL, timeout REAL, jitter REAL, fail_limit INTEGER, window REAL, latency_slo_ms REAL, updated_ts REAL)")
+
+
+def _create_cluster(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, heartbeat_ts REAL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT, expires_ts REAL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS failover_state (id INTEGER PRIMARY KEY CHECK (id = 1), current_v_index INTEGER, "
+                 "active_version TEXT, last_switch_time REAL, updated_ts REAL)")
+
+
+def _create_state(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS monitor_state (id INTEGER PRIMARY KEY CHECK (id = 1), state TEXT, saved_ts REAL)")
+
+
+def _tag_worker(conn):
+    # Satırı yazan worker; diğer worker'ların dashboard'ları yalnızca başkalarının satırlarını çeker
+    conn.execute("ALTER TABLE health_logs ADD COLUMN worker TEXT")
+    conn.execute("ALTER TABLE audit_logs ADD COLUMN worker TEXT")
+
+
+MIGRATIONS = [_migrate_epoch, _create_rollups, _create_outbox, _create_services, _create_cluster, _create_state,
+              _tag_worker]
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for i, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        step(conn)
+        conn.execute(f"PRAGMA user_version = {i}")
+    return len(MIGRATIONS)
+
+
+# --- ROLLUP ---
+ROLLUP_LEVELS = (("health_rollup_1m", 60), ("health_rollup_1h", 3600))
+_HIST_BASE = math.log(1.05)
+
+
+def _hist_index(latency):
+    # Log ölçekli kovalar: her kova bir öncekinden %5 geniş, p95 hatası ~%5
+    return int(math.log1p(max(latency, 0.0)) / _HIST_BASE)
+
+
+def _hist_value(index):
+    return round(math.expm1((index + 0.5) * _HIST_BASE), 2)
+
+
+def hist_quantile(hist, q, lo=None, hi=None):
+    total = sum(hist.values())
+    if not total: return None
+    rank, seen = q * total, 0
+    for index in sorted(hist, key=int):
+        seen += hist[index]
+        if seen >= rank:
+            value = _hist_value(int(index))
+            if lo is not None: value = max(value, lo)
+            if hi is not None: value = min(value, hi)
+            return value
+
+
+class _Agg:
+    __slots__ = ("count", "failures", "lat_min", "lat_sum", "lat_max", "hist")
+
+    def __init__(self):
+        self.count = self.failures = 0
+        self.lat_min = self.lat_max = None
+        self.lat_sum = 0.0
+        self.hist = {}
+
+    def add(self, ok, latency):
+        self.count += 1
+        if not ok: self.failures += 1
+        self.lat_sum += latency
+        self.lat_min = latency if self.lat_min is None else min(self.lat_min, latency)
+        self.lat_max = latency if self.lat_max is None else max(self.lat_max, latency)
+        key = str(_hist_index(latency))
+        self.hist[key] = self.hist.get(key, 0) + 1
+
+
+class Rollups:
+    """1 dakikalık ve 1 saatlik özetleri örnekler geldikçe günceller.
+
+    `add` yalnızca bellekteki farkları biriktirir; yazıcı hook'u olarak çağrılan
+    `write` bu farkları mevcut satırla birleştirip aynı transaction içinde yazar.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def add(self, service, ts, ok, latency):
+        with self.lock:
+            for table, width in ROLLUP_LEVELS:
+                key = (table, service, int(ts) // width * width)
+                agg = self.pending.get(key)
+                if agg is None:
+                    agg = self.pending[key] = _Agg()
+                agg.add(ok, latency)
+
+    def write(self, conn):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for (table, service, bucket), d in pending.items():
+            row = conn.execute(f"SELECT count, failures, lat_min, lat_sum, lat_max, hist FROM {table} WHERE service = ? AND bucket = ?",
+                               (service, bucket)).fetchone()
+            if row:
+                d.count += row[0]; d.failures += row[1]; d.lat_sum += row[3]
+                d.lat_min = min(d.lat_min, row[2]); d.lat_max = max(d.lat_max, row[4])
+                for k, v in json.loads(row[5]).items():
+                    d.hist[k] = d.hist.get(k, 0) + v
+            conn.execute(f"INSERT OR REPLACE INTO {table} (service, bucket, count, failures, lat_min, lat_sum, lat_max, lat_p95, hist) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (service, bucket, d.count, d.failures, d.lat_min, d.lat_sum, d.lat_max,
+                          hist_quantile(d.hist, 0.95, d.lat_min, d.lat_max), json.dumps(d.hist)))
+
+    __call__ = write
+
+
+def query_rollups(conn, service, since, until, max_points=500):
+    # Aralığa göre en ince çözünürlüğü seç; uzun aralıklar saatlik tablodan okunur
+    for table, width in ROLLUP_LEVELS:
+        if (until - since) / width <= max_points:
+            break
+    rows = conn.execute(f"SELECT bucket, count, failures, lat_min, lat_sum, lat_max, lat_p95 FROM {table} "
+                        "WHERE service = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+                        (service, since // width * width, until)).fetchall()
+    return {"resolution": width, "points": [
+        {"ts": b, "count": c, "failure_ratio": round(f / c, 4), "min": mn, "avg": round(s / c, 2), "p95": p95, "max": mx}
+        for b, c, f, mn, s, mx, p95 in rows]}
+
+
+# --- RETENTION ---
+class Retention:
+    """Ham örnekleri ve eski rollup'ları periyodik olarak budar.
+
+    id sırası zaman sırasıyla aynı olduğundan sınır satırı tablonun başından kısa
+    bir taramayla bulunur; silme parçalar halinde, id aralığı üzerinden yapılır.
+    """
+
+    def __init__(self, raw_seconds=86400, minute_seconds=7 * 86400, hour_seconds=90 * 86400,
+                 interval=60, chunk=5000):
+        self.keep = {"health_logs": raw_seconds, "health_rollup_1m": minute_seconds, "health_rollup_1h": hour_seconds}
+        self.interval = interval
+        self.chunk = chunk
+        self.last_run = 0
+        self.pruned = 0
+
+    def run(self, conn, now=None):
+        now = time.time() if now is None else now
+        cutoff = int(now - self.keep["health_logs"])
+        first = conn.execute("SELECT MIN(id) FROM health_logs").fetchone()[0]
+        edge = conn.execute("SELECT id FROM health_logs WHERE id >= ? AND ts >= ? ORDER BY id LIMIT 1",
+                            (first or 0, cutoff)).fetchone()
+        if first is not None:
+            end = edge[0] if edge else conn.execute("SELECT MAX(id) + 1 FROM health_logs").fetchone()[0]
+            while first < end:
+                first = min(end, first + self.chunk)
+                self.pruned += conn.execute("DELETE FROM health_logs WHERE id < ?", (first,)).rowcount
+        for table in ("health_rollup_1m", "health_rollup_1h"):
+            conn.execute(f"DELETE FROM {table} WHERE bucket < ?", (int(now - self.keep[table]),))
+
+    def __call__(self, conn):
+        now = time.time()
+        if now - self.last_run >= self.interval:
+            self.last_run = now
+            self.run(conn, now)
+
+
+# --- DURUM ANLIK GÖRÜNTÜSÜ ---
+class StateSnapshot:
+    """Monitör durumunu (`collect()` sözlüğü) tek satırlık JSON olarak saklar.
+
+    Yazıcı hook'u olarak `interval` saniyede bir çalışır ve yalnızca durum
+    değiştiyse yazar; kapanışta `save` doğrudan çağrılır. `collect()` None
+    dönerse (ör. lider olmayan worker) hiçbir şey yazılmaz.
+    """
+
+    def __init__(self, collect, interval=2.0):
+        self.collect = collect
+        self.interval = interval
+        self.last_run = 0
+        self.last_text = None
+        self.saves = 0
+
+    def save(self, conn, now=None):
+        now = time.time() if now is None else now
+        state = self.collect()
+        if state is None: return False
+        text = json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+        if text == self.last_text: return False
+        conn.execute("INSERT OR REPLACE INTO monitor_state (id, state, saved_ts) VALUES (1, ?, ?)", (text, now))
+        self.last_text = text
+        self.saves += 1
+        return True
+
+    def __call__(self, conn):
+        now = time.time()
+        if now - self.last_run >= self.interval:
+            self.last_run = now
+            self.save(conn, now)
+
+
+def load_snapshot(conn):
+    row = conn.execute("SELECT state, saved_ts FROM monitor_state WHERE id = 1").fetchone()
+    if row is None: return None
+    return dict(json.loads(row[0]), saved_ts=row[1])
@@ -2,6 +2,77 @@ import sys
 import types
 import pytest
 
+
+class _DummyContainer:
+    def __init__(self, client, name, image, ports, labels=None):
+        self.client = client
+        self.name = name
+        self.image = image
+        self.ports = ports
+        self.labels = labels or {}
+        self.attrs = {"NetworkSettings": {"IPAddress": f"10.0.0.{len(client.containers.by_name) + 1}"}}
+        self.status = "running"
+        self.restarts = 0
+
+    def reload(self):
+        pass
+
+    def restart(self):
+        self.restarts += 1
+        self.status = "running"
+
+    def stop(self, timeout=None):
+        self.status = "exited"
+
+    def remove(self, force=False):
+        self.client.containers.by_name.pop(self.name, None)
+
+
+class _DummyImages:
+    def __init__(self):
+        self.tags = set()
+        self.builds = []
+
+    def build(self, *args, **kwargs):
+        # Mimic docker-py return shape: (image, logs)
+        self.builds.append(kwargs.get("tag"))
+        self.tags.add(kwargs.get("tag"))
+        return object(), []
+
+    def get(self, tag):
+        if tag not in self.tags:
+            raise Exception(f"image {tag} not found")
+        return object()
+
+
+class _DummyContainers:
+    def __init__(self, client):
+        self.client = client
+        self.by_name = {}
+
+    def get(self, name, *args, **kwargs):
+        if name not in self.by_name:
+            raise Exception("containers.get not available in tests")
+        return self.by_name[name]
+
+    def run(self, image, detach=True, ports=None, name=None, labels=None, **kwargs):
+        if name in self.by_name:
+            raise Exception(f"Conflict: container name {name} is already in use")
+        c = self.by_name[name] = _DummyContainer(self.client, name, image, ports, labels)
+        return c
+
+    def list(self, all=False, filters=None, **kwargs):
+        found = [c for c in self.by_name.values() if all or c.status == "running"]
+        label = (filters or {}).get("label")
+        return [c for c in found if label is None or label in c.labels]
+
+
+class _DummyClient:
+    def __init__(self):
+        self.images = _DummyImages()
+        self.containers = _DummyContainers(self)
+
+
 @pytest.fixture(scope="session", autouse=True)
 def docker_stub():
     """Provide a minimal 'docker' module stub so importing main.py works even without docker-py installed."""
@@ -10,19 +81,6 @@ def docker_stub():
 
     docker = types.ModuleType("docker")
 
-    class _DummyImages:
-        def build(self, *args, **kwargs):
-            # Mimic docker-py return shape: (image, logs)
-            return object(), []
-
-    class _DummyContainers:
-        def get(self, *args, **kwargs):
-            raise Exception("containers.get not available in tests")
-
-    class _DummyClient:
-        images = _DummyImages()
-        containers = _DummyContainers()
-
     def from_env():
         return _DummyClient()
 
@@ -30,6 +88,12 @@ def docker_stub():
     sys.modules["docker"] = docker
 
 
+@pytest.fixture
+def docker_client():
+    """A fresh in-memory Docker client (images/containers) for failover and watcher tests."""
+    return _DummyClient()
+
+
 # Ensure project root is importable (so `import services...` works reliably across environments)
 import os as _os
 _project_root = _os.path.dirname(_os.path.dirname(__file__))
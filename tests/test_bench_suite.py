@@ -0,0 +1,20 @@
+from benchmarks.suite import compare
+
+
+def _results(**metrics):
+    return {"results": {"bench": metrics}}
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = _results(probes_per_sec=1000, p50_ms=10.0, rows=5)
+    current = _results(probes_per_sec=700, p50_ms=11.0, rows=9)
+
+    regressions, report = compare(current, baseline, tolerance=0.2)
+
+    assert [r["metric"] for r in regressions] == ["probes_per_sec"]
+    assert {r["metric"] for r in report} == {"probes_per_sec", "p50_ms"}
+
+
+def test_compare_ignores_metrics_missing_from_baseline():
+    regressions, report = compare(_results(new_ms=5.0), _results(), tolerance=0.1)
+    assert regressions == [] and report == []
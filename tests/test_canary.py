@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import types
+
+from canary import CanaryPolicy, CanaryRollout, compare
+from proxy import TrafficSplit
+from stats import FailoverPolicy, StatsRegistry
+
+from test_main_py import _import_main_module
+
+
+class _Clock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def _rollout(policy=None):
+    clock = _Clock()
+    split = TrafficSplit({"v1": 100})
+    stats = StatsRegistry(FailoverPolicy(fail_limit=100, window=30))
+    decisions = []
+    rollout = CanaryRollout(split, "v1", "v2", stats.get, policy or CanaryPolicy(pause=5, min_samples=10),
+                            on_decision=lambda action, detail: decisions.append(action), clock=clock)
+    return rollout, split, stats, clock, decisions
+
+
+def _feed(stats, clock, version, n, latency, ok=True):
+    for i in range(n):
+        stats.get(version).record(ok, latency, now=clock.t + i * 0.01)
+
+
+def test_policy_always_ends_with_full_promotion():
+    assert CanaryPolicy(steps=(50, 10)).steps == [10, 50, 100]
+    spec = types.SimpleNamespace(steps=[25, 50, 100], pause=5)
+    assert CanaryPolicy.from_spec(spec, min_samples=3).steps == [25, 50, 100]
+
+    policy = CanaryPolicy(latency_ratio=1.5, latency_slack_ms=5)
+    base = {"failure_rate": 0.0, "p50": 10.0, "p95": 20.0, "p99": 30.0}
+    assert compare(base, dict(base, p99=50.0), policy) is None
+    assert compare(base, dict(base, p95=40.0), policy).startswith("p95")
+    assert "hata" in compare(base, dict(base, failure_rate=0.05), policy)
+
+
+def test_healthy_canary_is_promoted_step_by_step():
+    rollout, split, stats, clock, decisions = _rollout()
+    rollout.start()
+    assert split.weights() == {"v1": 75, "v2": 25}
+
+    for expected in ({"v1": 50, "v2": 50}, {"v2": 100}):
+        # Nothing is decided before the pause is over
+        assert rollout.evaluate() == "running"
+        _feed(stats, clock, "v1", 20, 10.0)
+        _feed(stats, clock, "v2", 20, 11.0)
+        clock.t += 5
+        rollout.evaluate()
+        assert split.weights() == expected
+
+    assert rollout.state == "promoted"
+    assert decisions == ["CANARY_BAŞLAT", "CANARY_ADIM", "CANARY_TERFİ"]
+
+
+def test_latency_regression_rolls_back_to_baseline():
+    rollout, split, stats, clock, decisions = _rollout()
+    rollout.start()
+    _feed(stats, clock, "v1", 20, 10.0)
+    _feed(stats, clock, "v2", 20, 80.0)
+    clock.t += 5
+
+    assert rollout.evaluate() == "rolled_back"
+    assert split.weights() == {"v1": 100}
+    assert rollout.reason.startswith("p50")
+    assert decisions[-1] == "CANARY_GERİ_AL"
+
+
+def test_rollback_when_canary_never_gets_enough_traffic():
+    rollout, split, stats, clock, decisions = _rollout(CanaryPolicy(pause=5, min_samples=10, max_wait=30))
+    rollout.start()
+    _feed(stats, clock, "v1", 20, 10.0)
+    clock.t += 10
+    assert rollout.evaluate() == "running"
+
+    clock.t += 25
+    assert rollout.evaluate() == "rolled_back"
+    assert "yeterli örnek yok" in rollout.reason
+    assert split.weights() == {"v1": 100}
+
+
+def test_canary_job_promotes_and_audits(tmp_path, docker_client):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "canary.db")
+    main.init_db()
+    main.docker = types.SimpleNamespace(from_env=lambda: docker_client)
+    main.canary_policy = lambda: CanaryPolicy(steps=(50,), pause=0, min_samples=5)
+    # The test drives the steps itself
+    main.CANARY_TICK = 3600
+
+    main.failover_jobs.submit("canary", lambda job: main.run_canary(job, "v1", "v2"))
+    assert main.failover_jobs.wait(10)
+    assert main.traffic.weights() == {"v1": 50, "v2": 50}
+    assert docker_client.containers.get("my-v2-container")
+    assert main.canary_running()
+
+    for v in ("v1", "v2"):
+        for _ in range(5):
+            main.upstream_stats.get(v).record(True, 10.0)
+    main.step_canary(main.canary)
+
+    assert main.canary.state == "promoted"
+    assert main.traffic.weights() == {"v2": 100}
+    assert main.current_v_index == 1
+    assert main.CONTAINER_MAP[main.FAILOVER_SERVICE] == "my-v2-container"
+    main.get_writer().flush()
+    conn = sqlite3.connect(main.DB_NAME)
+    actions = [r[0] for r in conn.execute("SELECT action FROM audit_logs WHERE action LIKE 'CANARY%' ORDER BY id")]
+    conn.close()
+    assert actions == ["CANARY_BAŞLAT", "CANARY_TERFİ"]
@@ -0,0 +1,85 @@
+import asyncio
+import time
+import types
+
+import httpx
+
+from benchmarks.chaos import Event, Injector, MonitorWatcher, ScenarioRunner
+from services.v1.app import app as v1_app, APP_STATE as v1_state
+from services.v2.app import app as v2_app
+from stats import HdrHistogram
+
+
+def test_hdr_histogram_percentiles_within_bucket_precision():
+    hist = HdrHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+    assert abs(hist.percentile(50) - 0.5) / 0.5 < 0.02
+    assert abs(hist.percentile(99) - 0.99) / 0.99 < 0.02
+    assert hist.percentile(100) == 1.0
+    assert hist.count == 1000
+
+
+def _cluster():
+    """An in-process "proxy" that serves whichever version is active, plus a fake monitor /jobs."""
+    state = {"active": "v1", "jobs": []}
+    apps = {"v1": v1_app, "v2": v2_app}
+
+    async def dispatch(scope, receive, send):
+        host = dict(scope.get("headers") or []).get(b"host", b"").decode()
+        if host == "monitor":
+            body = ('{"jobs": %s}' % str(state["jobs"]).replace("'", '"')).encode()
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        await apps[state["active"] if host == "front" else host](scope, receive, send)
+
+    def stop_container(name):
+        # Stopping the active container makes the "monitor" fail over to v2
+        now = time.time()
+        state["jobs"].append({"id": 1, "kind": "failover", "created": now + 0.05, "finished": now + 0.1})
+        state["active"] = "v2"
+
+    docker = types.SimpleNamespace(containers=types.SimpleNamespace(
+        get=lambda name: types.SimpleNamespace(stop=lambda: stop_container(name))))
+    return state, httpx.ASGITransport(app=dispatch), lambda: docker
+
+
+def _run(events, watcher=False, duration=0.9):
+    state, transport, docker_factory = _cluster()
+
+    async def main():
+        async with httpx.AsyncClient(transport=transport) as client:
+            runner = ScenarioRunner(client, "http://front/", 100, duration, events,
+                                    Injector(client, {"v1": "http://v1", "v2": "http://v2"}, docker_factory),
+                                    watcher=MonitorWatcher(client, "http://monitor", None, 0.05) if watcher else None)
+            return await runner.run()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        v1_state.update(cpu_load=0, is_corrupted=False)
+
+
+def test_faults_are_attributed_to_their_phase():
+    report = _run([Event.parse("0.3:corruption"), Event.parse("0.6:reset")])
+    baseline, corrupt, reset = report["phases"]
+
+    assert report["requests"] == 90
+    assert baseline["errors"] == 0 and baseline["count"] > 0
+    assert corrupt["phase"] == "0.3s corruption" and corrupt["errors"] > 0
+    # A request sent while the reset call is still in flight may still see the fault
+    assert reset["errors"] <= 1
+    assert report["first_error_after_fault_s"] is not None
+    assert report["error_budget"]["burned"] > 1
+    assert report["overall"]["p50_ms"] is not None
+
+
+def test_container_stop_reports_detect_and_failover_times():
+    report = _run([Event(0.3, "stop")], watcher=True)
+
+    assert (report["initial_version"], report["final_version"]) == ("v1", "v2")
+    assert 0 <= report["client_failover_s"] < 0.2
+    assert abs(report["time_to_detect_s"] - 0.05) < 0.02
+    assert abs(report["time_to_failover_s"] - 0.1) < 0.02
@@ -0,0 +1,75 @@
+import math
+import os
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+import chart
+from chart import ChartCache
+from test_main_py import _basic_auth, _import_main_module
+
+
+def _wave(n, spike_at=None):
+    for i in range(n):
+        v = 50 + 10 * math.sin(i / 50)
+        yield float(i), 900.0 if i == spike_at else v
+
+
+def test_lttb_bounds_points_and_keeps_spikes_and_endpoints():
+    out = chart.downsample(_wave(100_000, spike_at=61_234), 300, 0, 100_000)
+    assert len(out) <= 300
+    assert out[0] == (0.0, 50.0) and out[-1][0] == 99_999.0
+    assert (61_234.0, 900.0) in out
+    assert [p[0] for p in out] == sorted(p[0] for p in out)
+
+
+def test_minmax_keeps_extremes_per_bucket():
+    out = chart.downsample(_wave(10_000, spike_at=4_321), 100, 0, 10_000, method="minmax")
+    assert len(out) <= 100
+    assert (4_321.0, 900.0) in out
+    assert min(v for _, v in out) == min(v for _, v in _wave(10_000))
+
+
+def test_small_inputs_pass_through():
+    assert chart.downsample([], 300, 0, 10) == []
+    assert chart.downsample([(1, 5.0), (2, 6.0)], 300, 0, 10) == [(1, 5.0), (2, 6.0)]
+
+
+def test_quantize_is_stable_within_a_step_and_cache_expires():
+    a = chart.quantize(1_000_000 - 3600, 1_000_000, 300)
+    b = chart.quantize(1_000_000 - 3600 + 5, 1_000_000 + 5, 300)
+    assert a == b and a[2] == 12
+
+    now = [0.0]
+    cache, calls = ChartCache(size=2, clock=lambda: now[0]), []
+    compute = lambda: calls.append(1) or [(1, 2.0)]
+    assert cache.get("k", 10, compute) == ([(1, 2.0)], False)
+    assert cache.get("k", 10, compute)[1] is True
+    now[0] = 11
+    assert cache.get("k", 10, compute)[1] is False
+    cache.get("x", 10, compute); cache.get("y", 10, compute)
+    assert "k" not in cache.items and len(calls) == 4
+
+
+def test_chart_endpoint_downsamples_raw_rows_and_caches(tmp_path):
+    main = _import_main_module(os.path.dirname(os.path.dirname(__file__)))
+    main.DB_NAME = str(tmp_path / "chart.db")
+    main.monitor_loop = lambda: None
+    auth = _basic_auth(main.ADMIN_USER, main.ADMIN_PASS)
+
+    with TestClient(main.app) as client:
+        now = int(time.time())
+        conn = sqlite3.connect(main.DB_NAME)
+        conn.executemany("INSERT INTO health_logs (timestamp, ts, service, status, latency) VALUES ('', ?, 'Ana Servis', 'AKTİF', ?)",
+                         [(now - 3600 + i // 2, 10.0 + (i % 7)) for i in range(7200)])
+        conn.commit(); conn.close()
+
+        assert client.get("/api/chart").status_code == 401
+        assert client.get("/api/chart?method=avg", headers=auth).status_code == 400
+        r = client.get("/api/chart?hours=1&points=200", headers=auth).json()
+        assert r["source"] == "health_logs" and not r["cached"]
+        assert 100 < len(r["points"]) <= 200
+        assert client.get("/api/chart?hours=1&points=200", headers=auth).json()["cached"]
+
+        assert "id=\"ranges\"" in client.get("/", headers=auth).text
@@ -0,0 +1,81 @@
+import sqlite3
+
+from cluster import Coordinator
+import storage
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _db(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "cluster.db"), isolation_level=None)
+    storage._create_cluster(conn)
+    return conn
+
+
+def test_single_leader_and_lease_takeover(tmp_path):
+    conn, clock = _db(tmp_path), _Clock()
+    a = Coordinator("a", ttl=10, clock=clock)
+    b = Coordinator("b", ttl=10, clock=clock)
+    a.heartbeat(conn)
+    b.heartbeat(conn)
+    assert a.heartbeat(conn)
+    assert (a.leader, b.leader) == (True, False)
+    assert a.members == b.members == ("a", "b")
+
+    # "a" stops renewing: its lease expires and "b" takes over, "a" drops out of the membership
+    clock.now += 11
+    assert b.heartbeat(conn)
+    assert b.leader and b.members == ("b",)
+
+    # Resigning hands the lease over without waiting for the ttl
+    b.resign(conn)
+    a.heartbeat(conn)
+    assert a.leader
+
+
+def test_sharding_is_deterministic_disjoint_and_pins_failover_service(tmp_path):
+    conn, clock = _db(tmp_path), _Clock()
+    workers = [Coordinator(w, clock=clock, pinned=["Ana Servis"]) for w in ("w1", "w2", "w3")]
+    for w in workers: w.heartbeat(conn)
+    for w in workers: w.heartbeat(conn)
+
+    names = [f"svc-{i}" for i in range(300)]
+    owned = [{n for n in names if w.owns(n)} for w in workers]
+    assert sum(len(o) for o in owned) == len(names)
+    assert set().union(*owned) == set(names)
+    assert all(len(o) > 50 for o in owned)
+    assert [w.owns("Ana Servis") for w in workers] == [w.leader for w in workers] == [True, False, False]
+
+    # A worker leaving only moves its own share
+    clock.now += 11
+    for w in workers[1:]: w.heartbeat(conn)
+    assert {n for n in names if workers[1].owns(n)} >= owned[1]
+    assert {n for n in names if workers[2].owns(n)} >= owned[2]
+
+
+def test_failover_claim_is_compare_and_set(tmp_path):
+    conn, clock = _db(tmp_path), _Clock()
+    leader, follower = Coordinator("a", clock=clock), Coordinator("b", clock=clock)
+    leader.heartbeat(conn)
+    follower.heartbeat(conn)
+    leader.init_state(conn, 0, "v1")
+    follower.init_state(conn, 0, "v1")
+
+    assert not follower.claim_failover(conn, 0, 1, cooldown=15)
+    assert leader.claim_failover(conn, 0, 1, cooldown=15)
+    # A second decision from the same stale index loses
+    assert not leader.claim_failover(conn, 0, 1, cooldown=15)
+
+    leader.record_switch(conn, "v2", clock.now)
+    assert follower.load_state(conn) == {"current_v_index": 1, "active_version": "v2", "last_switch_time": clock.now}
+    # Cooldown is enforced against the shared switch time
+    assert not leader.claim_failover(conn, 1, 2, cooldown=15)
+    clock.now += 16
+    leader.heartbeat(conn)
+    assert leader.claim_failover(conn, 1, 2, cooldown=15)
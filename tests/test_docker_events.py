@@ -0,0 +1,84 @@
+import os
+import time
+import types
+
+from docker_events import ContainerCache, EventWatcher, FakeEventSource
+from test_main_py import _import_main_module
+
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline: return False
+        time.sleep(0.005)
+    return True
+
+
+def test_watcher_reports_only_mapped_containers_and_reconnects():
+    seen = []
+    source = FakeEventSource()
+    watcher = EventWatcher(source, lambda: {"api": "api-1"}, lambda svc, kind, ev: seen.append((svc, kind)),
+                           max_backoff=0.01)
+    watcher.start()
+    try:
+        source.emit("other", "die")
+        source.emit("api-1", "health_status: healthy")
+        source.emit("api-1", "health_status: unhealthy")
+        source.emit("api-1", "oom")
+        assert _wait_for(lambda: len(seen) == 2)
+        assert seen == [("api", "unhealthy"), ("api", "oom")]
+
+        # Our own restart must not be reported back to us
+        watcher.expect("api-1")
+        source.emit("api-1", "die")
+        source.close()
+        assert _wait_for(lambda: source.opened >= 2)
+        source.emit("api-1", "die")
+        assert _wait_for(lambda: watcher.stats["events"] == 6)
+        assert seen == [("api", "unhealthy"), ("api", "oom")]
+    finally:
+        watcher.stop()
+        source.close()
+
+
+def test_container_cache_reuses_objects(docker_client):
+    docker_client.containers.run("img", name="api-1")
+    cache = ContainerCache(lambda: docker_client)
+    assert cache.get("api-1") is cache.get("api-1")
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.invalidate("api-1")
+    cache.get("api-1")
+    assert cache.misses == 2
+
+
+def test_container_death_triggers_failover_without_probes(tmp_path, docker_client):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "events.db")
+    main.init_db()
+    main.docker = types.SimpleNamespace(from_env=lambda: docker_client)
+    main.SERVICES_DIR = os.path.join(project_root, "services")
+    main.send_email_notification = lambda *a: None
+    billing = docker_client.containers.run("billing", name="billing-1")
+    main.REGISTERED_SERVICES["billing"] = "http://billing/health"
+    main.CONTAINER_MAP["billing"] = "billing-1"
+
+    source = FakeEventSource()
+    main.start_event_watcher(source)
+    try:
+        start = time.monotonic()
+        source.emit("my-v1-container", "die", exitCode="137")
+        assert _wait_for(lambda: main.CONTAINER_MAP["Ana Servis"] == "my-v2-container")
+        assert main.failover_jobs.wait(5)
+        assert time.monotonic() - start < 1.0
+
+        source.emit("billing-1", "oom")
+        assert _wait_for(lambda: billing.restarts == 1)
+        # The restart's own die event is suppressed
+        source.emit("billing-1", "die")
+        assert _wait_for(lambda: main.event_watcher.stats["ignored"] == 1)
+        assert billing.restarts == 1
+        assert main.CONTAINER_EVENTS.values() == {("die",): 1, ("oom",): 1}
+    finally:
+        main.event_watcher.stop()
+        source.close()
@@ -0,0 +1,86 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+import export
+from test_main_py import _basic_auth, _import_main_module
+
+
+def _seed(conn, n=2500):
+    conn.execute("CREATE TABLE health_logs (id INTEGER PRIMARY KEY, timestamp TEXT, ts INTEGER, service TEXT, status TEXT, latency REAL)")
+    conn.execute("CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, timestamp TEXT, ts INTEGER, user TEXT, action TEXT, detail TEXT)")
+    conn.executemany("INSERT INTO health_logs (timestamp, ts, service, status, latency) VALUES (?, ?, ?, ?, ?)",
+                     [("00:00:00", 1000 + i // 3, "api" if i % 2 else "db", "AKTİF", float(i)) for i in range(n)])
+    conn.executemany("INSERT INTO audit_logs (timestamp, ts, user, action, detail) VALUES (?, ?, ?, ?, ?)",
+                     [("00:00:00", 1000 + i, "SİSTEM (AI)", "SERVİS_RESTART", f"{'api' if i % 2 else 'db'} eşiği aştı")
+                      for i in range(20)])
+    conn.commit()
+
+
+def test_keyset_pages_cover_filtered_range_once(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "x.db"))
+    _seed(conn)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = export.query_page(conn, "health", service="api", since=1100, until=1500, cursor=cursor, limit=97)
+        seen.extend(r["id"] for r in page["rows"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None: break
+
+    expected = [r[0] for r in conn.execute("SELECT id FROM health_logs WHERE service = 'api' AND ts >= 1100 AND ts < 1500 ORDER BY id")]
+    assert seen == expected
+    assert pages == len(expected) // 97 + 1
+
+    audit = export.query_page(conn, "audit", service="api", limit=100)
+    assert len(audit["rows"]) == 10 and audit["next_cursor"] is None
+
+
+def test_export_streams_in_bounded_batches_and_formats(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "x.db"))
+    _seed(conn)
+
+    assert max(len(b) for b in export.iter_batches(conn, "health", batch=100)) == 100
+
+    ndjson = b"".join(export.encode("health", export.iter_batches(conn, "health", service="db", batch=64), "ndjson"))
+    lines = [json.loads(l) for l in ndjson.decode().splitlines()]
+    assert len(lines) == 1250 and {l["service"] for l in lines} == {"db"}
+
+    chunks = list(export.encode("health", export.iter_batches(conn, "health", batch=1000), "csv"))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "ts", "timestamp", "service", "status", "latency"] and len(rows) == 2501
+
+    gz = b"".join(export.export_stream(sqlite3.connect(str(tmp_path / "x.db")), "audit", "csv", gzip=True))
+    assert gzip.decompress(gz).decode().count("\n") == 21
+
+
+def test_export_endpoints_require_auth_and_stream(tmp_path):
+    main = _import_main_module(os.path.dirname(os.path.dirname(__file__)))
+    main.DB_NAME = str(tmp_path / "export.db")
+    main.monitor_loop = lambda: None
+    auth = _basic_auth(main.ADMIN_USER, main.ADMIN_PASS)
+
+    with TestClient(main.app) as client:
+        for i in range(5):
+            main.log_audit("tester", "UNIT_TEST", f"satır {i}")
+        main.get_writer().flush()
+
+        assert client.get("/export/audit").status_code == 401
+        assert client.get("/export/nope", headers=auth).status_code == 404
+        assert client.get("/export/audit?format=xml", headers=auth).status_code == 400
+
+        r = client.get("/export/audit?format=ndjson", headers=auth)
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        details = [json.loads(l)["detail"] for l in r.text.splitlines()]
+        assert [d for d in details if d.startswith("satır")] == [f"satır {i}" for i in range(5)]
+
+        page = client.get("/api/logs/audit?limit=2", headers=auth).json()
+        assert len(page["rows"]) == 2 and page["next_cursor"]
+        assert client.get("/api/logs/audit?cursor=bad", headers=auth).status_code == 400
@@ -0,0 +1,80 @@
+import os
+import types
+
+from failover import ImageCache, JobExecutor, dir_hash
+from test_main_py import _import_main_module
+
+
+def _main(tmp_path, docker_client):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "failover.db")
+    main.init_db()
+    main.docker = types.SimpleNamespace(from_env=lambda: docker_client)
+    main.SERVICES_DIR = os.path.join(project_root, "services")
+    main.send_email_notification = lambda *a: None
+    return main
+
+
+def test_image_cache_rebuilds_only_when_source_changes(tmp_path, docker_client):
+    src = tmp_path / "svc"
+    src.mkdir()
+    (src / "app.py").write_text("print('v1')")
+    cache = ImageCache()
+
+    tag = cache.ensure(docker_client, "v1", str(src))
+    assert cache.ensure(docker_client, "v1", str(src)) == tag
+    # A fresh process still finds the image by its content tag
+    assert ImageCache().ensure(docker_client, "v1", str(src)) == tag
+    assert docker_client.images.builds == [tag]
+
+    (src / "app.py").write_text("print('v1.1')")
+    assert dir_hash(str(src)) not in tag
+    cache.ensure(docker_client, "v1", str(src))
+    assert len(docker_client.images.builds) == 2
+
+
+def test_executor_dedups_jobs_of_the_same_kind():
+    executor = JobExecutor()
+    import threading
+    gate = threading.Event()
+    first = executor.submit("failover", lambda job: gate.wait(1))
+    assert executor.submit("failover", lambda job: None) is None
+    gate.set()
+    assert executor.wait(2)
+    assert first.state == "done"
+
+
+def test_failover_runs_in_background_and_reports_phases(tmp_path, docker_client):
+    main = _main(tmp_path, docker_client)
+
+    job = main.execute_smart_failover()
+    assert job is not None
+    assert main.failover_jobs.wait(5)
+
+    assert job.state == "done"
+    assert [p for p, _ in job.phases] == ["build", "run", "switch", "remove"]
+    assert main.REGISTERED_SERVICES["Ana Servis"].endswith(":8002/health")
+    assert main.CONTAINER_MAP["Ana Servis"] == "my-v2-container"
+    assert "my-v2-container" in docker_client.containers.by_name
+    assert main.system_status_msg == "BAŞARILI: V2 Aktif"
+
+
+def test_failover_to_warm_standby_skips_build(tmp_path, docker_client):
+    main = _main(tmp_path, docker_client)
+    main.WARM_STANDBY = True
+    main.COOLDOWN = 0
+
+    main.execute_smart_failover()
+    assert main.failover_jobs.wait(5)
+    # v2 is active and v3 is already running as the standby
+    assert set(docker_client.containers.by_name) == {"my-v2-container", "my-v3-container"}
+    builds = len(docker_client.images.builds)
+
+    job = main.execute_smart_failover()
+    assert main.failover_jobs.wait(5)
+    assert [p for p, _ in job.phases] == ["switch", "remove", "standby"]
+    assert main.CONTAINER_MAP["Ana Servis"] == "my-v3-container"
+    # The new standby (v1) was built, but the switch itself needed no build
+    assert len(docker_client.images.builds) == builds + 1
+    assert set(docker_client.containers.by_name) == {"my-v3-container", "my-v1-container"}
@@ -0,0 +1,41 @@
+import asyncio
+
+from live import EventHub, LiveState
+
+
+def test_hub_fans_out_one_payload_to_every_subscriber():
+    hub = EventHub(max_queue=2)
+    live = LiveState(health_size=3, hub=hub)
+
+    async def _main():
+        a, b = hub.subscribe(), hub.subscribe()
+        live.add_health("10:00:00", "svc", "AKTİF", 1.5)
+        live.add_audit("10:00:01", "tester", "KAOS", "x")
+        live.add_health("10:00:02", "svc", "KAPALI", 9.0)
+        await asyncio.sleep(0)
+        got_a = [a.get_nowait() for _ in range(a.qsize())]
+        got_b = [b.get_nowait() for _ in range(b.qsize())]
+        hub.unsubscribe(a)
+        hub.unsubscribe(b)
+        return got_a, got_b
+
+    got_a, got_b = asyncio.run(_main())
+
+    assert got_a == got_b
+    assert got_a[0].startswith("event: health\n")
+    assert '"latency": 1.5' in got_a[0]
+    assert got_a[1].startswith("event: audit\n")
+    # The third event overflowed the bounded queues instead of blocking the publisher
+    assert len(got_a) == 2
+    assert hub.dropped == 2
+    assert hub.count() == 0
+
+
+def test_recent_health_merges_services_newest_first():
+    live = LiveState(health_size=2)
+    live.add_health("t1", "a", "AKTİF", 1)
+    live.add_health("t2", "b", "AKTİF", 2)
+    live.add_health("t3", "a", "AKTİF", 3)
+    live.add_health("t4", "a", "AKTİF", 4)
+
+    assert [r[1] for r in live.recent_health(3)] == ["t4", "t3", "t2"]
@@ -2,6 +2,8 @@ import base64
 import importlib.util
 import os
 import sqlite3
+import time
+import types
 
 import pytest
 from fastapi.testclient import TestClient
@@ -16,6 +18,14 @@ def _import_main_module(project_root):
     return mod
 
 
+def _wait_restarts(main, timeout=5.0):
+    """Restarts run on a background pool; wait until none is in flight."""
+    deadline = time.monotonic() + timeout
+    while main.restarting and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert not main.restarting
+
+
 def _basic_auth(user: str, password: str) -> dict:
     token = base64.b64encode(f"{user}:{password}".encode()).decode()
     return {"Authorization": f"Basic {token}"}
@@ -89,3 +99,216 @@ def test_check_service_health_ok_and_down(monkeypatch, tmp_path):
     ok, msg = main.check_service_health("http://example")
     assert ok is False
     assert msg == "BAĞLANTI YOK"
+
+
+def test_dashboard_served_from_cache_with_conditional_get(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "cache.db")
+    main.monitor_loop = lambda: None
+    auth = _basic_auth(main.ADMIN_USER, main.ADMIN_PASS)
+
+    with TestClient(main.app) as client:
+        main.live.add_health("10:00:00", "Ana Servis", "AKTİF", 12.5)
+
+        # After startup the dashboard must not touch sqlite at all
+        def _no_db():
+            raise AssertionError("dashboard hit the database")
+        main.get_db = _no_db
+
+        r = client.get("/", headers=auth)
+        assert r.status_code == 200
+        assert "12.5 ms" in r.text
+        etag = r.headers["etag"]
+
+        r = client.get("/", headers={**auth, "If-None-Match": etag})
+        assert r.status_code == 304
+        assert main.dashboard_cache.renders == 1
+
+        main.log_audit("tester", "UNIT_TEST", "changed")
+        r = client.get("/", headers={**auth, "If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["etag"] != etag
+        assert "UNIT_TEST" in r.text
+
+
+def test_dashboard_escapes_service_names_and_log_cells(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "escape.db")
+    main.init_db()
+    evil = "</script><script>alert(1)</script>"
+    main.REGISTERED_SERVICES[evil] = "http://evil/health"
+    main.log_audit("tester", "<b>X</b>", "<img src=x onerror=alert(1)>")
+
+    page = main.render_dashboard()
+    assert evil not in page
+    assert "\\u003c/script\\u003e" in page
+    assert "<img src=x" not in page and "&lt;img src=x onerror=alert(1)&gt;" in page
+    assert "&lt;b&gt;X&lt;/b&gt;" in page
+
+
+def test_service_registry_endpoints_persist(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "registry.db")
+    main.monitor_loop = lambda: None
+    auth = _basic_auth(main.ADMIN_USER, main.ADMIN_PASS)
+
+    with TestClient(main.app) as client:
+        assert client.post("/services/api", json={"url": "http://api/health"}).status_code == 401
+        r = client.post("/services/api", json={"url": "http://api/health", "interval": 5}, headers=auth)
+        assert r.status_code == 201
+        assert r.json()["interval"] == 5
+        assert client.post("/services/api", json={"url": "http://x"}, headers=auth).status_code == 409
+
+        r = client.put("/services/api", json={"fail_limit": 2}, headers=auth)
+        assert r.json()["fail_limit"] == 2
+        assert r.json()["url"] == "http://api/health"
+        assert client.delete("/services/missing", headers=auth).status_code == 404
+
+    # A fresh process restores the registered service from sqlite
+    again = _import_main_module(project_root)
+    again.DB_NAME = main.DB_NAME
+    again.monitor_loop = lambda: None
+    again.MONITOR_CLUSTER = False
+    with TestClient(again.app) as client:
+        names = [s["name"] for s in client.get("/services", headers=auth).json()]
+        assert "api" in names
+        assert client.delete("/services/api", headers=auth).status_code == 200
+        assert "api" not in again.REGISTERED_SERVICES
+
+
+def test_only_failover_service_rotates_versions(tmp_path, docker_client):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "rotate.db")
+    main.init_db()
+    main.docker = types.SimpleNamespace(from_env=lambda: docker_client)
+    billing = docker_client.containers.run("billing", name="billing-1")
+    main.REGISTERED_SERVICES["billing"] = "http://billing/health"
+    main.CONTAINER_MAP["billing"] = "billing-1"
+    failovers = []
+    main.execute_smart_failover = lambda: failovers.append(1)
+
+    for _ in range(main.FAIL_LIMIT):
+        main.evaluate_probe("billing", False, 0)
+        _wait_restarts(main)
+
+    assert failovers == []
+    assert billing.restarts == main.FAIL_LIMIT
+    assert main.current_v_index == 0
+
+
+def test_restart_does_not_block_probe_results(tmp_path, docker_client):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "restart.db")
+    main.init_db()
+    main.docker = types.SimpleNamespace(from_env=lambda: docker_client)
+    billing = docker_client.containers.run("billing", name="billing-1")
+    billing.restart = lambda: time.sleep(0.5)
+    main.REGISTERED_SERVICES["billing"] = "http://billing/health"
+    main.CONTAINER_MAP["billing"] = "billing-1"
+
+    start = time.monotonic()
+    for _ in range(3):
+        main.evaluate_probe("billing", False, 0)
+    # The probe loop never waits for Docker, and only one restart is in flight
+    assert time.monotonic() - start < 0.2
+    assert main.restarting == {"billing"}
+    _wait_restarts(main)
+    assert main.RESTARTS.values() == {("billing",): 1}
+
+
+def test_follower_applies_leader_failover_and_does_not_decide(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "cluster.db")
+    main.init_db()
+
+    from cluster import Coordinator
+    leader = Coordinator("other-worker", ttl=60)
+    main.get_writer().call(leader.heartbeat)
+    main.start_cluster()
+    main.cluster_stop.set()
+    assert not main.is_leader()
+    assert not main.owns(main.FAILOVER_SERVICE)
+
+    main.execute_smart_failover()
+    assert main.current_v_index == 0
+    assert main.failover_jobs.recent() == []
+
+    # The leader's switch shows up in this worker's routing on the next heartbeat
+    main.get_writer().call(lambda conn: leader.claim_failover(conn, 0, 1, cooldown=0))
+    main.get_writer().call(lambda conn: leader.record_switch(conn, "v2", 1.0))
+    main.cluster_tick()
+    assert main.current_v_index == 1
+    assert main.traffic.weights() == {"v2": 100}
+    assert main.CONTAINER_MAP[main.FAILOVER_SERVICE] == "my-v2-container"
+
+
+def test_follower_dashboard_shows_other_workers_rows(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "follower.db")
+    main.init_db()
+    main.live.load(main.get_db())
+
+    from cluster import Coordinator
+    leader = Coordinator("other-worker", ttl=60)
+    main.get_writer().call(leader.heartbeat)
+    main.start_cluster()
+    main.cluster_stop.set()
+    main.get_writer().call(leader.heartbeat)
+
+    def leader_writes(conn):
+        now = int(time.time())
+        conn.execute("INSERT INTO health_logs (timestamp, ts, service, status, latency, worker) "
+                     "VALUES ('12:00:01', ?, ?, 'AKTİF', 12.5, 'other-worker')", (now, main.FAILOVER_SERVICE))
+        conn.execute("INSERT INTO audit_logs (timestamp, ts, user, action, detail, worker) "
+                     "VALUES ('12:00:02', ?, 'SİSTEM (AI)', 'FAILOVER', 'leader-row', 'other-worker')", (now,))
+
+    main.get_writer().call(leader_writes)
+    main.log_audit("tester", "LOCAL", "follower-row")
+    main.get_writer().flush()
+    main.cluster_tick()
+    # A second tick picks up nothing new
+    assert main.sync_live() == 0
+
+    health = main.live.recent_health()
+    assert [(r[2], r[4]) for r in health] == [(main.FAILOVER_SERVICE, 12.5)]
+    details = [r[4] for r in main.live.recent_audit()]
+    assert "leader-row" in details
+    # The follower's own row is in the buffer once, not again from the DB
+    assert details.count("follower-row") == 1
+    assert "leader-row" in main.render_dashboard()
+
+
+def test_restart_resumes_active_version_and_state(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(__file__))
+    main = _import_main_module(project_root)
+    main.DB_NAME = str(tmp_path / "state.db")
+    main.monitor_loop = lambda: None
+    # Single-process mode: the snapshot alone carries the active version
+    main.MONITOR_CLUSTER = False
+
+    with TestClient(main.app):
+        main.current_v_index = 2
+        main.route_to("v3")
+        main.last_switch_time = 1234.5
+        main.set_status("BAŞARILI: V3 Aktif")
+        main.service_stats.get(main.FAILOVER_SERVICE).record(False, 40.0)
+
+    again = _import_main_module(project_root)
+    again.DB_NAME = main.DB_NAME
+    again.monitor_loop = lambda: None
+    again.MONITOR_CLUSTER = False
+    assert again.create_app() is not again.app
+    with TestClient(again.app) as client:
+        assert again.REGISTERED_SERVICES[again.FAILOVER_SERVICE] == "http://localhost:8003/health"
+        assert again.traffic.weights() == {"v3": 100}
+        assert (again.current_v_index, again.last_switch_time) == (2, 1234.5)
+        assert again.system_status_msg == "BAŞARILI: V3 Aktif"
+        assert again.service_stats.get(again.FAILOVER_SERVICE).snapshot()["failures"] == 1
+        assert "SÜRÜM: V3" in client.get("/", headers=_basic_auth(again.ADMIN_USER, again.ADMIN_PASS)).text
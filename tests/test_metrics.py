@@ -0,0 +1,85 @@
+import asyncio
+import os
+import threading
+import types
+
+from fastapi.testclient import TestClient
+
+from metrics import Registry
+from probe_engine import ProbeEngine, ProbeSchedule
+from test_main_py import _basic_auth, _import_main_module, _wait_restarts
+
+
+def test_per_thread_shards_are_merged_on_render():
+    reg = Registry()
+    hits = reg.counter("hits_total", "Hits", ["site"])
+    lat = reg.histogram("lat_seconds", "Latency", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            hits.inc("a")
+            lat.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    lat.observe(0.05)
+    lat.observe(5)
+
+    text = reg.render()
+    assert 'hits_total{site="a"} 4000' in text
+    assert 'lat_seconds_bucket{le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{le="1.0"} 4001' in text
+    assert 'lat_seconds_bucket{le="+Inf"} 4002' in text
+    assert "lat_seconds_count 4002" in text
+    assert "# TYPE lat_seconds histogram" in text
+
+
+def test_metrics_endpoint_exposes_monitor_series(tmp_path):
+    main = _import_main_module(os.path.dirname(os.path.dirname(__file__)))
+    main.DB_NAME = str(tmp_path / "metrics.db")
+    main.monitor_loop = lambda: None
+
+    with TestClient(main.app) as client:
+        main.PROBE_LATENCY.observe(0.012, "Ana Servis")
+        main.swallowed("restart")
+        client.get("/", headers=_basic_auth(main.ADMIN_USER, main.ADMIN_PASS))
+        text = client.get("/metrics").text
+
+    assert 'monitor_probe_latency_seconds_count{service="Ana Servis"} 1' in text
+    assert 'monitor_swallowed_exceptions_total{site="restart"} 1' in text
+    assert "monitor_dashboard_render_seconds_count 1" in text
+    assert 'monitor_db_writer_rows{state="dropped"} 0' in text
+
+
+def test_restart_counter_counts_real_restarts(docker_client):
+    main = _import_main_module(os.path.dirname(os.path.dirname(__file__)))
+    main.docker = types.SimpleNamespace(from_env=lambda: docker_client)
+    container = docker_client.containers.run("service-v1", name="my-v1-container")
+
+    main.evaluate_probe("Ana Servis", False, 0)
+    _wait_restarts(main)
+    assert container.restarts == 1
+    assert main.RESTARTS.values() == {("Ana Servis",): 1}
+
+
+def test_probe_engine_reports_on_result_errors():
+    errors = []
+
+    async def probe(url):
+        return True, "OK"
+
+    def on_result(*args):
+        raise RuntimeError("boom")
+
+    engine = ProbeEngine(lambda: {"a": "http://a"}, on_result, probe=probe, on_error=errors.append,
+                         default_schedule=ProbeSchedule(interval=10, timeout=1, jitter=0), refresh_interval=0.01)
+
+    async def _main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0.1)
+        engine.stop()
+        await task
+
+    asyncio.run(_main())
+    assert [str(e) for e in errors] == ["boom"]
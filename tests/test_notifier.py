@@ -0,0 +1,100 @@
+import email
+import smtplib
+from email.header import decode_header, make_header
+
+import storage
+from notifier import Outbox
+
+
+class FakeSMTP:
+    instances = []
+    fail_next = 0
+
+    def __init__(self, host, port, timeout=None):
+        self.host, self.port = host, port
+        self.sent = []
+        self.tls = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        self.tls = True
+
+    def login(self, user, password):
+        self.user = user
+
+    def sendmail(self, sender, receiver, msg):
+        if FakeSMTP.fail_next:
+            FakeSMTP.fail_next -= 1
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+def _outbox(tmp_path, **kw):
+    db = str(tmp_path / "outbox.db")
+    conn = storage.connect(db)
+    conn.executescript("CREATE TABLE health_logs (id INTEGER PRIMARY KEY, timestamp TEXT, service TEXT, status TEXT, latency REAL);"
+                       "CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, timestamp TEXT, user TEXT, action TEXT, detail TEXT);")
+    storage.migrate(conn)
+    conn.commit()
+    conn.close()
+    FakeSMTP.instances = []
+    FakeSMTP.fail_next = 0
+    return Outbox(db, "from@x", "to@x", host="127.0.0.1", port=2525, starttls=False, smtp_factory=FakeSMTP, **kw)
+
+
+def test_events_in_window_are_coalesced_into_one_digest(tmp_path):
+    box = _outbox(tmp_path, window=10)
+    box.enqueue("FAILOVER", "v2", now=100)
+    box.enqueue("FAILOVER", "v3", now=103)
+
+    # Window not over yet: nothing sent, wake up when it ends
+    assert box.pump(now=105) == 110
+    assert FakeSMTP.instances == []
+
+    assert box.pump(now=110) is None
+    smtp = FakeSMTP.instances[0]
+    assert (smtp.host, smtp.port) == ("127.0.0.1", 2525)
+    assert len(smtp.sent) == 1
+    subject = str(make_header(decode_header(email.message_from_string(smtp.sent[0])["Subject"])))
+    assert subject == "GÜVENLİK UYARISI: 2 olay (FAILOVER)"
+
+    # The same authenticated session is reused for the next mail
+    box.enqueue("RECOVERED", "ok", now=140)
+    box.pump(now=150)
+    assert len(FakeSMTP.instances) == 1
+    assert len(smtp.sent) == 2
+    assert box.snapshot()["sent"] == 3
+    box.stop()
+
+
+def test_failed_send_is_retried_with_backoff_then_given_up(tmp_path):
+    box = _outbox(tmp_path, window=0, backoff=2, max_attempts=3)
+    box.enqueue("FAILOVER", "v2", now=100)
+
+    # Disconnect on the send and on the immediate reconnect retry
+    FakeSMTP.fail_next = 2
+    assert box.pump(now=100) == 102
+    assert box.snapshot()["retries"] == 1
+
+    FakeSMTP.fail_next = 2
+    assert box.pump(now=101) == 102  # still backing off, nothing attempted
+    assert box.pump(now=102) == 106
+    FakeSMTP.fail_next = 2
+    box.pump(now=106)
+    snap = box.snapshot()
+    assert snap["failed"] == 1 and snap.get("pending", 0) == 0
+    box.stop()
+
+
+def test_pending_mail_survives_restart(tmp_path):
+    box = _outbox(tmp_path, window=0)
+    box.enqueue("FAILOVER", "v2", now=100)
+    box.stop()
+
+    again = Outbox(str(tmp_path / "outbox.db"), "from@x", "to@x", starttls=False, smtp_factory=FakeSMTP, window=0)
+    again.pump(now=101)
+    assert again.snapshot()["sent"] == 1
+    again.stop()
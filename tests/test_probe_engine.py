@@ -0,0 +1,208 @@
+import asyncio
+
+import httpx
+
+from probe_engine import AdaptivePolicy, CircuitBreaker, ProbeEngine, ProbeSchedule
+from services.v1.app import app as v1_app, APP_STATE as v1_state
+
+
+def _run_for(engine, seconds):
+    async def _main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(seconds)
+        engine.stop()
+        await task
+
+    asyncio.run(_main())
+
+
+def test_slow_service_does_not_stall_others():
+    results = []
+
+    async def probe(url):
+        if "slow" in url:
+            await asyncio.sleep(0.5)
+        return True, "OK"
+
+    services = {"fast": "http://fast/health", "slow": "http://slow/health"}
+    engine = ProbeEngine(lambda: services, lambda name, url, ok, msg, lat: results.append(name),
+                         probe=probe, default_schedule=ProbeSchedule(interval=0.05, timeout=1, jitter=0),
+                         refresh_interval=0.01)
+    _run_for(engine, 0.4)
+
+    # The slow probe has not even finished once, while the fast one keeps its schedule
+    assert results.count("fast") >= 4
+    assert results.count("slow") == 0
+
+
+def test_per_service_interval_and_sync_hook():
+    results = []
+    services = {"a": "http://a/health", "b": "http://b/health"}
+    schedules = {"b": ProbeSchedule(interval=10, timeout=1, jitter=0)}
+    engine = ProbeEngine(lambda: services, lambda name, url, ok, msg, lat: results.append((name, ok)),
+                         probe=lambda url: (url.startswith("http://a"), "OK"), schedules=schedules,
+                         default_schedule=ProbeSchedule(interval=0.05, timeout=1, jitter=0),
+                         refresh_interval=0.01)
+    _run_for(engine, 0.3)
+
+    assert results.count(("a", True)) >= 3
+    assert results.count(("b", False)) == 1
+
+
+def test_builtin_http_probe_uses_pooled_client():
+    v1_state.update(cpu_load=0, is_corrupted=True)
+    results = []
+    services = {"v1": "http://v1/health"}
+    engine = ProbeEngine(lambda: services, lambda name, url, ok, msg, lat: results.append(ok),
+                         default_schedule=ProbeSchedule(interval=10, timeout=1, jitter=0),
+                         transport=httpx.ASGITransport(app=v1_app), refresh_interval=0.01)
+    try:
+        _run_for(engine, 0.2)
+    finally:
+        v1_state.update(cpu_load=0, is_corrupted=False)
+
+    assert results == [False]
+
+
+def test_heap_scheduler_handles_many_services_and_registry_changes():
+    results = []
+    services = {f"svc-{i}": f"http://svc-{i}/health" for i in range(2000)}
+
+    async def probe(url):
+        return True, "OK"
+
+    engine = ProbeEngine(lambda: services, lambda name, url, ok, msg, lat: results.append(name), probe=probe,
+                         default_schedule=ProbeSchedule(interval=10, timeout=1, jitter=0.05),
+                         refresh_interval=60)
+
+    async def _main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0.3)
+        # Registry changes are picked up without waiting for refresh_interval
+        services["new"] = "http://new/health"
+        del services["svc-0"]
+        engine.notify()
+        await asyncio.sleep(0.2)
+        engine.stop()
+        await task
+
+    asyncio.run(_main())
+
+    assert len(results) == 2001
+    assert results.count("new") == 1
+    assert engine.stats["probes"] == 2001
+    assert results.count("svc-0") == 1
+
+
+def test_circuit_breaker_half_open_and_backoff():
+    moves = []
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=10, on_transition=lambda a, b: moves.append(b))
+    for t in range(3):
+        assert breaker.allow(t)
+        breaker.record(False, t)
+    assert breaker.state == "open" and not breaker.allow(5)
+
+    # One trial at a time once the open period is over; a failed trial doubles the wait
+    assert breaker.allow(12) and not breaker.allow(12)
+    breaker.record(False, 12)
+    assert breaker.state == "open" and breaker.retry_at() == 32
+    assert breaker.allow(32)
+    breaker.record(True, 32)
+    assert moves == ["open", "half_open", "open", "half_open", "closed"]
+    assert breaker.allow(33)
+
+
+def test_open_breaker_stops_probing_and_reports_transitions():
+    calls, transitions = [], []
+
+    async def probe(url):
+        calls.append(url)
+        return False, "down"
+
+    services = {"dead": "http://dead/health"}
+    engine = ProbeEngine(lambda: services, lambda *a: None, probe=probe,
+                         default_schedule=ProbeSchedule(interval=0.01, timeout=1, jitter=0), refresh_interval=0.01,
+                         breaker_threshold=3, breaker_open=60, on_breaker=lambda *t: transitions.append(t))
+    _run_for(engine, 0.3)
+
+    assert len(calls) == 3
+    assert transitions == [("dead", "closed", "open")]
+    assert engine.stats["skipped"] >= 1
+    assert engine.snapshot()["dead"]["breaker"] == "open"
+
+    # A new URL (e.g. after failover) starts with a closed breaker
+    services["dead"] = "http://new/health"
+    _run_for(engine, 0.05)
+    assert calls[-1] == "http://new/health"
+    assert transitions[1] == ("dead", "open", "closed")
+
+
+def test_adaptive_timeout_and_hedged_probe():
+    attempts = []
+
+    async def probe(url):
+        attempts.append(url)
+        # After warm-up, every other probe stalls; the hedge answers at normal speed
+        if len(attempts) > 20 and len(attempts) % 2:
+            await asyncio.sleep(0.5)
+        else:
+            await asyncio.sleep(0.005)
+        return True, "OK"
+
+    services = {"svc": "http://svc/health"}
+    results = []
+    engine = ProbeEngine(lambda: services, lambda name, url, ok, msg, lat: results.append(lat), probe=probe,
+                         default_schedule=ProbeSchedule(interval=0.02, timeout=0.2, jitter=0), refresh_interval=0.01,
+                         adaptive=AdaptivePolicy(min_samples=10, min_timeout=0.05))
+    _run_for(engine, 1.0)
+
+    info = engine.snapshot()["svc"]
+    # A fast service keeps the scheduled timeout as its floor
+    assert info["timeout_ms"] == 200
+    assert info["hedge_ms"] is not None and info["hedge_ms"] < info["timeout_ms"]
+    assert engine.stats["hedged"] >= 1
+    # The last hedge may still be in flight when the engine stops
+    assert engine.stats["hedge_wins"] >= engine.stats["hedged"] - 1
+    assert max(results[20:]) < 300
+
+
+def test_adaptive_timeout_never_shrinks_below_schedule_and_grows_with_timeouts():
+    sched = ProbeSchedule(interval=1, timeout=1.0, jitter=0)
+    engine = ProbeEngine(lambda: {}, lambda *a: None, default_schedule=sched,
+                         adaptive=AdaptivePolicy(min_samples=10, min_timeout=0.05, max_timeout=10.0))
+    st = engine.state_for("svc", "http://svc/health")
+    for i in range(30):
+        st.window.add(True, 5.0, 100 + i * 0.1)
+    # p99 x 3 is 15 ms, but a fast service still gets the full scheduled timeout
+    assert engine.timeouts(st, sched, 103)[0] == 1.0
+
+    # Probes that hit the timeout count too, so the timeout can grow again
+    for i in range(30):
+        st.window.add(False, 1000.0, 103 + i * 0.1)
+    assert engine.timeouts(st, sched, 106)[0] > 1.0
+
+
+def test_failover_service_is_exempt_from_breaker_and_keeps_failing_over():
+    async def probe(url):
+        return False, "down"
+
+    services = {"api": "http://v1/health", "billing": "http://billing/health"}
+    versions, failures = ["http://v2/health", "http://v3/health"], []
+
+    def on_result(name, url, ok, msg, latency):
+        if name != "api": return
+        failures.append(url)
+        # Stand-in for the failover policy: three failures in a row move to the next version
+        if versions and failures[-3:] == [url] * 3:
+            services["api"] = versions.pop(0)
+
+    engine = ProbeEngine(lambda: services, on_result, probe=probe,
+                         default_schedule=ProbeSchedule(interval=0.01, timeout=1, jitter=0), refresh_interval=0.01,
+                         breaker_threshold=2, breaker_open=60, breaker_exempt={"api"})
+    _run_for(engine, 0.3)
+
+    # Both failovers happen even though every version is dead
+    assert versions == []
+    assert services["api"] == "http://v3/health"
+    assert engine.snapshot()["api"]["breaker"] == "closed"
+    assert engine.snapshot()["billing"]["breaker"] == "open"
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from proxy import ReverseProxy, TrafficSplit
+from services.v1.app import app as v1_app
+from services.v2.app import app as v2_app
+
+
+def _front(proxy):
+    front = FastAPI()
+
+    @front.api_route("/proxy/{path:path}", methods=["GET", "POST"])
+    async def route(path: str, request: Request):
+        return await proxy.handle(request, path)
+
+    return front
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_traffic_split_follows_weights():
+    seq = itertools.cycle([i / 100 for i in range(100)])
+    split = TrafficSplit({"v1": 90, "v2": 10}, rng=lambda: next(seq))
+    picks = [split.pick() for _ in range(1000)]
+    assert picks.count("v2") == 100
+
+    split.set({"v2": 100, "v1": 0})
+    assert split.weights() == {"v2": 100}
+    assert {split.pick() for _ in range(10)} == {"v2"}
+
+
+def test_proxy_routes_by_weight_and_switches_atomically():
+    seq = itertools.cycle([0.05, 0.5, 0.95])
+    split = TrafficSplit({"v1": 90, "v2": 10}, rng=lambda: next(seq))
+    seen = []
+    proxy = ReverseProxy(lambda v: f"http://{v}", split,
+                         transports={"v1": httpx.ASGITransport(app=v1_app), "v2": httpx.ASGITransport(app=v2_app)},
+                         on_response=lambda v, ok, lat: seen.append((v, ok)))
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_front(proxy)), base_url="http://front") as c:
+            first = [(await c.get("/proxy/")).json()["version"] for _ in range(3)]
+            split.set({"v2": 100})
+            after = (await c.get("/proxy/health")).headers["x-upstream-version"]
+        await proxy.aclose()
+        return first, after
+
+    first, after = _run(main())
+    assert first == ["v1", "v1", "v2"]
+    assert after == "v2"
+    assert seen[-1] == ("v2", True)
+    assert proxy.inflight == {"v1": 0, "v2": 0}
+
+
+def test_proxy_streams_request_and_response_bodies():
+    echo = FastAPI()
+
+    received = []
+
+    @echo.post("/echo")
+    async def do_echo(request: Request):
+        # The body must be fully read before the response starts: Starlette's
+        # StreamingResponse also listens on `receive` for a disconnect and would
+        # swallow request chunks that are read from inside the generator.
+        async for part in request.stream():
+            if part: received.append(part)
+
+        async def chunks():
+            for part in received:
+                yield part.upper()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    proxy = ReverseProxy(lambda v: "http://echo", TrafficSplit({"v1": 1}),
+                         transports={"v1": httpx.ASGITransport(app=echo)})
+
+    async def body():
+        for part in (b"abc", b"def"):
+            yield part
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_front(proxy)), base_url="http://front") as c:
+            r = await c.post("/proxy/echo?x=1", content=body())
+        await proxy.aclose()
+        return r
+
+    r = _run(main())
+    assert r.status_code == 200
+    assert r.text == "ABCDEF"
+    # Chunks are forwarded as they arrive instead of being joined into one buffer
+    assert received == [b"abc", b"def"]
+
+
+def test_unreachable_upstream_returns_502():
+    proxy = ReverseProxy(lambda v: "http://127.0.0.1:9", TrafficSplit({"v3": 1}), timeout=1)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_front(proxy)), base_url="http://front") as c:
+            r = await c.get("/proxy/")
+        await proxy.aclose()
+        return r
+
+    r = _run(main())
+    assert r.status_code == 502
+    assert r.headers["x-upstream-version"] == "v3"
+    assert proxy.snapshot()["errors"] == 1
+
+
+def test_inflight_released_when_client_disconnects_before_body():
+    proxy = ReverseProxy(lambda v: "http://v1", TrafficSplit({"v1": 1}),
+                         transports={"v1": httpx.ASGITransport(app=v1_app)})
+
+    class _Req:
+        method, headers, client = "GET", {}, None
+
+        class url:
+            scheme, query = "http", ""
+
+    async def main():
+        response = await proxy.handle(_Req(), "")
+        assert proxy.inflight["v1"] == 1
+
+        async def broken_send(message):
+            raise OSError("client went away")
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        try:
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, broken_send)
+        except Exception:
+            pass
+        await proxy.aclose()
+
+    _run(main())
+    assert proxy.inflight["v1"] == 0
@@ -0,0 +1,176 @@
+import os
+
+import pytest
+
+from reconciler import DockerRuntime, FakeRuntime, Reconciler, ServiceSpec, docker_image, load_spec_file
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "examples")
+
+
+def _spec(name):
+    return load_spec_file(os.path.join(EXAMPLES, name))[0]
+
+
+def test_examples_parse():
+    v1 = _spec("api-v1.yaml")
+    assert (v1.name, v1.image, v1.replicas, v1.grace, v1.strategy) == ("api", "local://demo@v1", 3, 30, "BlueGreen")
+    assert v1.readiness.path == "/healthz" and v1.liveness.failure_threshold == 3
+    assert v1.env == {"HEALTHY": "1"}
+
+    canary = _spec("api-canary.yaml")
+    assert (canary.strategy, canary.steps, canary.pause, canary.replicas) == ("Canary", [25, 50, 100], 5, 4)
+
+
+def test_blue_green_keeps_old_version_until_new_is_ready():
+    runtime = FakeRuntime(auto_ready=False)
+    rec = Reconciler(runtime, clock=lambda: 0)
+    rec.apply(_spec("api-v1.yaml"))
+    rec.tick()
+    for pod_id in list(rec.pods):
+        rec.pod_ready(pod_id)
+    rec.tick()
+
+    rec.apply(_spec("api-v2.yaml"))
+    rec.tick()
+    assert rec.summary()["api"]["pods"] == {"local://demo@v1": 3, "local://demo@v2": 3}
+
+    for pod in [p for p in rec.pods.values() if p.image.endswith("v2")]:
+        rec.pod_ready(pod.id)
+    rec.tick()
+    assert rec.summary()["api"]["pods"] == {"local://demo@v2": 3}
+    assert rec.summary()["api"]["stable"] == "local://demo@v2"
+
+
+def test_canary_steps_respect_pause():
+    clock = [0.0]
+    rec = Reconciler(FakeRuntime(), clock=lambda: clock[0])
+    rec.apply(ServiceSpec("api", "local://demo@v1", 4))
+    rec.tick(); rec.tick()
+
+    rec.apply(_spec("api-canary.yaml"))
+    seen = []
+    for t in range(0, 20):
+        clock[0] = float(t)
+        rec.tick()
+        pods = rec.summary()["api"]["pods"]
+        split = (pods.get("local://demo@v1", 0), pods.get("local://demo@v2", 0))
+        if not seen or seen[-1] != split:
+            seen.append(split)
+
+    assert seen == [(3, 1), (2, 2), (0, 4)]
+
+
+def test_tick_work_is_proportional_to_changes():
+    runtime = FakeRuntime()
+    rec = Reconciler(runtime, clock=lambda: 0)
+    for i in range(50):
+        rec.apply(ServiceSpec(f"svc-{i}", "local://demo@v1", 40))
+    rec.tick(); rec.tick()
+    assert runtime.calls["spawn"] == 2000
+
+    assert rec.tick() == 0
+    rec.pod_exited(next(iter(rec.pods)))
+    assert rec.tick() == 1
+    assert runtime.calls == {"spawn": 2001, "kill": 0}
+
+
+def test_docker_runtime_runs_and_removes_containers(docker_client):
+    rec = Reconciler(DockerRuntime(docker_client), clock=lambda: 0)
+    rec.apply(_spec("api-v1.yaml"))
+    rec.tick()
+
+    assert docker_image("local://demo@v2") == "demo:v2"
+    assert len(docker_client.containers.list()) == 3
+    assert all(c.image == "demo:v1" for c in docker_client.containers.list())
+    rec.delete("api")
+    rec.tick()
+    assert docker_client.containers.list() == []
+
+
+def test_failed_spawn_leaves_no_phantom_pod_and_is_retried():
+    class FlakyRuntime(FakeRuntime):
+        fail = 1
+
+        def spawn(self, pod_id, spec, image):
+            if self.fail:
+                self.fail -= 1
+                raise RuntimeError("ImageNotFound: demo:v1")
+            super().spawn(pod_id, spec, image)
+
+    rec = Reconciler(FlakyRuntime(), clock=lambda: 0)
+    rec.apply(_spec("api-v1.yaml"))
+    with pytest.raises(RuntimeError):
+        rec.tick()
+    assert rec.pods == {} and rec.summary()["api"]["pods"] == {}
+    assert rec.stats["errors"] == 1
+
+    # The service stays dirty, so the next tick reconciles it again
+    assert rec.tick() == 1
+    assert rec.summary()["api"]["pods"] == {"local://demo@v1": 3}
+
+
+def test_canary_keeps_one_pending_timer_per_service():
+    clock = [0.0]
+    rec = Reconciler(FakeRuntime(), clock=lambda: clock[0])
+    rec.apply(ServiceSpec("api", "local://demo@v1", 4))
+    rec.tick(); rec.tick()
+    rec.apply(_spec("api-canary.yaml"))
+    rec.tick(); rec.tick()
+    for _ in range(20):
+        rec.dirty.add("api")
+        rec.tick()
+    assert len(rec.timers) == 1
+
+
+def test_docker_runtime_gates_on_readiness_and_reports_exits(docker_client):
+    healthy = set()
+    clock = [0.0]
+    runtime = DockerRuntime(docker_client, http_get=lambda url: url in healthy, clock=lambda: clock[0])
+    rec = Reconciler(runtime, clock=lambda: clock[0])
+    rec.apply(_spec("api-v1.yaml"))
+    rec.tick()
+    runtime.poll(clock[0] + 1)
+    rec.apply(_spec("api-v2.yaml"))
+    rec.tick()
+
+    # v2 containers run but fail /healthz: BlueGreen must keep v1 serving
+    clock[0] = 5.0
+    runtime.poll()
+    rec.tick()
+    assert rec.summary()["api"]["pods"] == {"local://demo@v1": 3, "local://demo@v2": 3}
+
+    healthy.update(f"http://{c.attrs['NetworkSettings']['IPAddress']}:80/healthz"
+                   for c in docker_client.containers.list())
+    healthy.update(u.replace("/healthz", "/livez") for u in list(healthy))
+    clock[0] = 10.0
+    runtime.poll()
+    rec.tick()
+    assert rec.summary()["api"]["pods"] == {"local://demo@v2": 3}
+
+    # A container that dies on its own is noticed and replaced
+    victim = docker_client.containers.list()[0]
+    victim.status = "exited"
+    clock[0] = 20.0
+    runtime.poll()
+    assert victim.name not in rec.pods
+    rec.tick()
+    assert len(docker_client.containers.list()) == 3
+
+
+def test_docker_runtime_adopts_containers_after_restart(docker_client):
+    rec = Reconciler(DockerRuntime(docker_client, http_get=lambda url: True), clock=lambda: 0)
+    rec.apply(_spec("api-v1.yaml"))
+    rec.tick()
+    names = {c.name for c in docker_client.containers.list()}
+
+    runtime = DockerRuntime(docker_client, http_get=lambda url: True, clock=lambda: 0)
+    fresh = Reconciler(runtime, clock=lambda: 0)
+    assert runtime.adopt() == 3
+    fresh.apply(_spec("api-v1.yaml"))
+    fresh.tick()
+    assert {c.name for c in docker_client.containers.list()} == names
+
+    fresh.apply(ServiceSpec("api", "local://demo@v1", 4))
+    fresh.tick()
+    assert len(docker_client.containers.list()) == 4
+    assert "api-4" in {c.name for c in docker_client.containers.list()}
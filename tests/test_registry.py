@@ -0,0 +1,66 @@
+import sqlite3
+
+from probe_engine import ProbeSchedule
+from registry import ServiceRegistry
+from stats import FailoverPolicy
+import storage
+
+
+def _registry(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "reg.db"))
+    storage._create_services(conn)
+    reg = ServiceRegistry({}, {}, {}, {}, ProbeSchedule(2, 1, 0.2), FailoverPolicy(5, 10, 800))
+    return conn, reg
+
+
+def test_register_applies_overrides_and_defaults(tmp_path):
+    conn, reg = _registry(tmp_path)
+    reg.register(conn, "api", {"url": "http://api/health", "container": "api-1", "interval": 5, "fail_limit": 2})
+
+    assert reg.services["api"] == "http://api/health"
+    assert reg.containers["api"] == "api-1"
+    assert reg.schedules["api"].interval == 5
+    assert reg.schedules["api"].timeout == 1
+    assert reg.policies["api"].fail_limit == 2
+    assert reg.policies["api"].window == 10
+
+
+def test_registry_survives_restart_and_update(tmp_path):
+    conn, reg = _registry(tmp_path)
+    reg.register(conn, "api", {"url": "http://api/health", "interval": 5})
+    reg.update(conn, "api", {"timeout": 0.5, "url": None})
+    conn.commit()
+
+    _, fresh = _registry(tmp_path)
+    assert fresh.load(conn) == 1
+    d = fresh.describe("api")
+    assert d["url"] == "http://api/health"
+    assert (d["interval"], d["timeout"], d["persisted"]) == (5, 0.5, True)
+
+
+def test_deregister_removes_everything(tmp_path):
+    conn, reg = _registry(tmp_path)
+    reg.register(conn, "api", {"url": "http://api/health", "container": "api-1", "interval": 5})
+    reg.deregister(conn, "api")
+
+    assert not (reg.services or reg.containers or reg.schedules or reg.policies)
+    assert conn.execute("SELECT COUNT(*) FROM services").fetchone()[0] == 0
+
+
+def test_managed_service_keeps_live_url(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "reg.db"))
+    storage._create_services(conn)
+    services, containers = {"main": "http://localhost:8001/health"}, {"main": "my-v1-container"}
+    reg = ServiceRegistry(services, containers, {}, {}, ProbeSchedule(2, 1, 0.2), FailoverPolicy(5, 10, 800),
+                          managed=["main"])
+    reg.update(conn, "main", {"timeout": 0.5})
+
+    # Failover moves the service; a later update or reload must not revert it
+    services["main"], containers["main"] = "http://localhost:8002/health", "my-v2-container"
+    reg.update(conn, "main", {"interval": 3})
+    assert services["main"].endswith(":8002/health")
+    assert reg.schedules["main"].timeout == 0.5
+
+    reg.load(conn)
+    assert services["main"].endswith(":8002/health")
+    assert containers["main"] == "my-v2-container"
@@ -73,3 +73,69 @@ def test_v3_root_and_health():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json()["status"] == "healthy"
+
+
+def test_health_is_not_starved_by_cpu_burn():
+    import asyncio
+    import time
+
+    import httpx
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=v1_app), base_url="http://v1") as c:
+            await c.post("/simulate/cpu/20")
+            try:
+                roots = [asyncio.create_task(c.get("/")) for _ in range(8)]
+                await asyncio.sleep(0.05)
+                start = time.perf_counter()
+                health = await c.get("/health")
+                health_s = time.perf_counter() - start
+                await asyncio.gather(*roots)
+            finally:
+                await c.post("/simulate/reset")
+            return health, health_s
+
+    health, health_s = asyncio.run(main())
+    # Eight one-second CPU burns are in flight, yet the probe answers immediately
+    assert health.status_code == 200
+    assert health_s < 0.5
+
+
+def test_latency_profiles():
+    import random
+
+    from services.v1.app import sample_latency
+
+    rng = random.Random(3)
+    fixed = {"mode": "fixed", "ms": 40.0, "stddev_ms": 0, "tail_ratio": 0, "tail_ms": 0}
+    assert sample_latency(fixed, rng) == 40.0
+
+    normal = dict(fixed, mode="normal", stddev_ms=5.0)
+    samples = [sample_latency(normal, rng) for _ in range(2000)]
+    assert 39 < sum(samples) / len(samples) < 41
+
+    tail = dict(fixed, mode="longtail", ms=10.0, tail_ratio=0.01, tail_ms=1000.0)
+    samples = sorted(sample_latency(tail, rng) for _ in range(5000))
+    assert samples[len(samples) // 2] == 10.0
+    assert samples[-1] >= 1000.0
+
+    client = TestClient(v1_app)
+    assert client.post("/simulate/latency/bogus").status_code == 400
+
+
+@pytest.mark.parametrize("app,state", [(v1_app, v1_state), (v2_app, v2_state)])
+def test_response_size_and_memory_knobs(app, state):
+    client = TestClient(app)
+    client.post("/simulate/size/4")
+    assert len(client.get("/").json()["payload"]) == 4096
+
+    client.post("/simulate/memory/8")
+    assert state["memory_mb"] == 8
+
+    client.post("/simulate/latency/fixed?ms=30")
+    assert state["latency"]["mode"] == "fixed"
+
+    client.post("/simulate/reset")
+    assert "payload" not in client.get("/").json()
+    assert state["memory_mb"] == 0
+    assert state["latency"]["mode"] == "off"
@@ -0,0 +1,77 @@
+import random
+
+from stats import FailoverPolicy, LogHistogram, ServiceStats, SlidingWindow, StatsRegistry
+
+
+def test_log_histogram_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1) for _ in range(20000)]
+    hist = LogHistogram(accuracy=0.02)
+    for v in values:
+        hist.add(v)
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(hist.quantile(q) - exact) / exact <= 0.03
+    # Memory is bounded by the value range, not the sample count
+    assert len(hist.bins) < 400
+
+
+def test_sliding_window_expires_old_slots():
+    w = SlidingWindow(window=10, slots=10)
+    for t in range(10):
+        w.add(t % 2 == 0, 100.0, now=1000 + t)
+    assert (w.total, w.failures) == (10, 5)
+
+    w.add(True, 1.0, now=1015)
+    # Only t=6..9 and the new sample are left
+    assert (w.total, w.failures) == (5, 2)
+    assert w.hist.count == 5
+    assert abs(w.hist.quantile(0.0) - 1.0) < 0.05
+
+
+def test_failure_limit_and_latency_slo_verdicts():
+    stats = ServiceStats(FailoverPolicy(fail_limit=3, window=10, latency_slo_ms=500, min_samples=5))
+    for t in range(4):
+        stats.record(True, 50, now=100 + t)
+    assert stats.verdict(now=104) is None
+
+    # Alive but slow: p95 goes over the SLO once enough samples are in
+    for t in range(6):
+        stats.record(True, 2000, now=104 + t * 0.1)
+    assert stats.verdict(now=105) == "LATENCY_SLO"
+
+    stats.reset()
+    for t in range(3):
+        stats.record(False, 1, now=200 + t)
+    assert stats.verdict(now=203) == "FAIL_LIMIT"
+    # Failures outside the window no longer count
+    assert stats.verdict(now=215) is None
+
+
+def test_registry_uses_per_service_policy():
+    strict = FailoverPolicy(fail_limit=1)
+    registry = StatsRegistry(FailoverPolicy(fail_limit=5), {"payments": strict})
+    registry.get("payments").record(False, 1)
+    registry.get("search").record(False, 1)
+
+    assert registry.get("payments").verdict() == "FAIL_LIMIT"
+    assert registry.get("search").verdict() is None
+    assert registry.snapshot()["search"]["failure_rate"] == 1.0
+
+
+def test_registry_dump_and_load_round_trip():
+    import json
+    reg = StatsRegistry(FailoverPolicy(fail_limit=3, window=10))
+    for i in range(4):
+        reg.get("api").record(i % 2 == 0, 100.0 + i, now=1000 + i)
+
+    state = json.loads(json.dumps(reg.dump(now=1004)))
+    fresh = StatsRegistry(FailoverPolicy(fail_limit=3, window=10))
+    fresh.load(state, now=1004)
+    assert fresh.get("api").snapshot(now=1004) == reg.get("api").snapshot(now=1004)
+
+    # Slots that expired while the process was down are dropped
+    late = StatsRegistry(FailoverPolicy(fail_limit=3, window=10))
+    late.load(state, now=1100)
+    assert late.get("api").snapshot(now=1100)["count"] == 0
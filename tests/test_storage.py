@@ -0,0 +1,146 @@
+import sqlite3
+
+import storage
+from storage import BatchWriter, Retention, Rollups
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, v INTEGER);"
+
+
+def _count(db):
+    conn = sqlite3.connect(db)
+    n = conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_writer_batches_rows_in_wal_mode(tmp_path):
+    db = str(tmp_path / "w.db")
+    writer = BatchWriter(db, batch_size=100, flush_interval=0.05)
+    writer.execute_script(SCHEMA)
+    writer.start()
+    for i in range(1000):
+        writer.submit("INSERT INTO t (v) VALUES (?)", (i,))
+    writer.flush()
+
+    assert _count(db) == 1000
+    assert writer.stats["batches"] < 1000
+    assert writer.stats["max_batch"] <= 100
+    assert writer.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    writer.stop()
+
+
+def test_writer_survives_failing_hook(tmp_path):
+    db = str(tmp_path / "hook.db")
+    writer = BatchWriter(db, flush_interval=0.01)
+    writer.execute_script(SCHEMA)
+    failures = [1]
+
+    def hook(conn):
+        # Fail on the first batch that carries rows, not on an idle tick
+        if failures and conn.in_transaction:
+            failures.pop()
+            raise ValueError("collect() failed")
+
+    writer.hooks.append(hook)
+    writer.start()
+    writer.submit("INSERT INTO t (v) VALUES (?)", (1,))
+    # flush() returns even though the batch was rolled back
+    writer.flush()
+    writer.submit("INSERT INTO t (v) VALUES (?)", (2,))
+    writer.flush()
+
+    assert writer.thread.is_alive()
+    assert writer.stats["errors"] == 1
+    assert _count(db) == 1
+    writer.stop()
+
+
+def test_writer_drops_when_queue_full_and_flushes_on_stop(tmp_path):
+    db = str(tmp_path / "w.db")
+    writer = BatchWriter(db, max_queue=5, block_timeout=0)
+    writer.execute_script(SCHEMA)
+    # Pretend the background thread is running but stalled, so the queue fills up
+    writer.running = True
+    accepted = sum(writer.submit("INSERT INTO t (v) VALUES (?)", (i,)) for i in range(8))
+    assert accepted == 5
+    assert writer.snapshot()["dropped"] == 3
+
+    writer.running = False
+    writer.start()
+    writer.stop()
+    assert _count(db) == 5
+    assert writer.submit("INSERT INTO t (v) VALUES (?)", (99,)) is False
+
+
+def _health_db(tmp_path):
+    db = str(tmp_path / "h.db")
+    writer = BatchWriter(db)
+    writer.execute_script(
+        "CREATE TABLE health_logs (id INTEGER PRIMARY KEY, timestamp TEXT, service TEXT, status TEXT, latency REAL);"
+        "CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, timestamp TEXT, user TEXT, action TEXT, detail TEXT);"
+        "INSERT INTO health_logs (timestamp, service, status, latency) VALUES ('12:00:00', 'svc', 'AKTİF', 3.0);")
+    writer.call(storage.migrate)
+    return writer
+
+
+def test_migration_adds_epoch_column_and_index(tmp_path):
+    writer = _health_db(tmp_path)
+    cols = [r[1] for r in writer.conn.execute("PRAGMA table_info(health_logs)")]
+    indexes = [r[1] for r in writer.conn.execute("PRAGMA index_list(health_logs)")]
+
+    assert "ts" in cols
+    assert "idx_health_service_ts" in indexes
+    assert writer.conn.execute("SELECT ts FROM health_logs").fetchone()[0] is not None
+    # Running it again is a no-op
+    assert writer.call(storage.migrate) == len(storage.MIGRATIONS)
+    writer.stop()
+
+
+def test_migration_backfills_rollups_from_existing_rows(tmp_path):
+    writer = _health_db(tmp_path)
+    ts = writer.conn.execute("SELECT ts FROM health_logs").fetchone()[0]
+    for table, width in storage.ROLLUP_LEVELS:
+        row = writer.conn.execute(f"SELECT bucket, count, failures, lat_sum FROM {table} WHERE service = 'svc'").fetchone()
+        assert row == (ts // width * width, 1, 0, 3.0)
+    writer.stop()
+
+
+def test_rollups_merge_incrementally(tmp_path):
+    writer = _health_db(tmp_path)
+    rollups = Rollups()
+    base = 1_700_000_000 // 3600 * 3600
+    for i in range(100):
+        rollups.add("svc", base + i % 60, i % 10 != 0, float(i + 1))
+    writer.call(rollups)
+    # A second flush for the same minute must merge, not overwrite
+    rollups.add("svc", base + 30, True, 500.0)
+    writer.call(rollups)
+
+    res = storage.query_rollups(writer.conn, "svc", base, base + 59)
+    assert res["resolution"] == 60
+    point = res["points"][0]
+    assert point["count"] == 101
+    assert point["failure_ratio"] == round(10 / 101, 4)
+    assert point["min"] == 1.0 and point["max"] == 500.0
+    assert 90 <= point["p95"] <= 100
+
+    # Long ranges read the hourly table
+    res = storage.query_rollups(writer.conn, "svc", base - 30 * 86400, base + 3600)
+    assert res["resolution"] == 3600
+    assert res["points"][0]["count"] == 101
+    writer.stop()
+
+
+def test_retention_prunes_old_raw_samples(tmp_path):
+    writer = _health_db(tmp_path)
+    now = 1_700_000_000
+    writer.conn.execute("DELETE FROM health_logs")
+    writer.conn.executemany("INSERT INTO health_logs (ts, service, status, latency) VALUES (?, 'svc', 'AKTİF', 1)",
+                            [(now - 7200 + i,) for i in range(7200)])
+    retention = Retention(raw_seconds=3600, chunk=1000)
+    writer.call(lambda conn: retention.run(conn, now))
+
+    remaining = writer.conn.execute("SELECT MIN(ts), COUNT(*) FROM health_logs").fetchone()
+    assert remaining == (now - 3600, 3600)
+    assert retention.pruned == 3600
+    writer.stop()